@@ -14,23 +14,112 @@ Python objects such as lists, maps and tuples.
 
 Sessions are not used in this script to maintain state. Instead, for operations
 such as merging and splitting text, all initla data is re-POSTed along with any
-changes that need to be processed.
+changes that need to be processed: the text, and a signed token of where its
+sentences are (see module 'statetoken').
+
+Alternatively, with the DOCUMENT_STORE setting of the app turned on, parsed
+texts are kept on the server (see module 'storage'); only an id for the text,
+and the version of it the page shows, then need to be POSTed along with the
+changes to make. With PAGE_SIZE set as
+well, the results page shows a page of sentences at a time, so that texts far
+longer than WORD_MAX words can be counted (see PAGED_WORD_MAX).
+
+Programs rather than browsers can use the routes under /api/v1 instead: they
+carry out the same Count, Merge and Split actions, but return as JSON the data
+the results page would have been made from. Batch jobs can have many texts
+analyzed in a single request to /api/v1/bulk.
 """
 
+import atexit
+import collections
+import concurrent.futures
+import contextlib
+import json
+import os
+import secrets
+import threading
 import traceback as tb
-from flask import Flask, make_response
+from concurrent.futures.process import BrokenProcessPool
+from flask import Flask, Response, make_response
+from flask import jsonify
+from flask import stream_with_context
 from flask import render_template
 from flask import request
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest
 from leguincounter import LeGuinCounter
+from storage import DocumentStore, ParseCache
+import statetoken
 import textanalysis as ta
 
 app = Flask(__name__)
 
+# Opt in to keeping parsed texts on the server between requests
+app.config.setdefault('DOCUMENT_STORE', False)
+document_store = DocumentStore()
+
+# Results of parsing texts already submitted
+parse_cache = ParseCache()
+
+# Key state tokens are signed with; if None, the app's SECRET_KEY, failing
+# that a key made up when the app starts. Set it if more than one server
+# process serves the app, so that each accepts tokens made by the others;
+# worker processes of module 'asgi' are given the key of their server.
+app.config.setdefault('STATE_KEY', None)
+_random_key = secrets.token_bytes(32)
+
+# Worker processes analyzing the documents of bulk requests, shared by all of
+# them; if None, one per CPU. Read when the first bulk request comes in.
+app.config.setdefault('BULK_WORKERS', None)
+
+# Sentences shown per page of results; if 0, all of them on a single page.
+# Only texts kept in the document store are paged.
+app.config.setdefault('PAGE_SIZE', 0)
+
 # Server-side restriction on word-count in case client-side script disabled
-# Set WORD_MAX to 26000 if running test on metamorphis_kafka.txt
+# Set WORD_MAX to 26000 if running test on metamorphis_kafka.txt, or have
+# results paged (see PAGE_SIZE)
 WORD_MAX = 300
 CHAR_MAX = WORD_MAX * 10
 
+# Same, for when results are paged: only a page of sentences is rendered at a
+# time, however long the text
+PAGED_WORD_MAX = 30000
+PAGED_CHAR_MAX = PAGED_WORD_MAX * 10
+
+# Page of results shown
+#   number (int): index of page.
+#   count (int): number of pages.
+#   first (int): index of first sentence on page.
+_Page = collections.namedtuple('_Page', 'number count first')
+
+# Documents of a bulk request read ahead of those being analyzed, per worker
+BULK_BACKLOG = 2
+
+# Longest line of a bulk request, in bytes: enough for CHAR_MAX characters
+# even if each is escaped in JSON as a surrogate pair
+BULK_LINE_MAX = CHAR_MAX * 12 + 1024
+
+
+# Reasons a request can't be carried out, each reported in its own way by
+# the web page and by the API
+class _TooLongError(Exception):
+    """Raised when the text POSTed has too many words or characters."""
+
+
+class _MaxError(Exception):
+    """Raised when the word max POSTed is not a whole number."""
+
+
+class _ExpiredError(Exception):
+    """Raised when the text a request is about is no longer kept on the
+    server."""
+
+
+class _StaleError(Exception):
+    """Raised when the text a request is about has changed on the server
+    since the page the request was made from was shown."""
+
 
 def _is_over(text, word_max, char_max):
     """Checks whether 'text' contains more words or characters than given
@@ -51,13 +140,487 @@ def _is_over(text, word_max, char_max):
         False: number of words in text is NOT greater than word_max or
                char_max.
     """
-    word_over = len(ta.get_words(text)) > word_max
+    word_over = ta.count_words(text) > word_max
 
     char_over = len(text) > char_max
 
     return word_over or char_over
 
 
+def _html_whitespace(whitespace):
+    """Returns whitespace characters to be shown before a highlighted sentence.
+
+    Bug(?) in HTML rendering means newlines don't show up as they would in
+    the console. Adding an extra newline character seems to fix this.
+
+    Args:
+        whitespace (str): whitespace characters before a sentence in a text.
+
+    Returns:
+        whitespace (str): same, with an extra newline if it has any.
+    """
+    if '\n' in whitespace:
+        whitespace = '\n' + whitespace
+
+    return whitespace
+
+
+def _split_offset(sentence, position):
+    """Returns index in a sentence where split.js split it.
+
+    split.js shows the sentence trimmed of leading and trailing whitespace,
+    with any CRLF newline read as a single LF, and gives the split position
+    the way JavaScript counts characters: in UTF-16 code units, two for
+    any character outside the Basic Multilingual Plane (e.g. emoji).
+
+    Args:
+        sentence (str): sentence as found in the sentence list.
+        position (int): split position POSTed by split.js.
+
+    Raises:
+        IndexError: position is less than zero.
+
+    Returns:
+        offset (int): index in sentence where first part ends.
+    """
+    if position < 0:
+        raise IndexError("Split position cannot be less than zero.")
+
+    # Leading whitespace not shown to user
+    offset = len(sentence) - len(sentence.lstrip())
+
+    while position > 0 and offset < len(sentence):
+        char = sentence[offset]
+        offset += 1
+
+        # CR of a CRLF never made it to the browser
+        if char == '\r' and sentence[offset:offset + 1] == '\n':
+            continue
+
+        position -= 2 if ord(char) > 0xFFFF else 1
+
+    return offset
+
+
+def _paged():
+    """Returns whether results of texts counted are paged."""
+    return bool(app.config['PAGE_SIZE'] and app.config['DOCUMENT_STORE'])
+
+
+def _limits():
+    """Returns most words and characters a text counted can have.
+
+    Returns:
+        word_max (int): most words; WORD_MAX, or PAGED_WORD_MAX if results
+                        are paged.
+        char_max (int): most characters; CHAR_MAX, or PAGED_CHAR_MAX.
+    """
+    if _paged():
+        return PAGED_WORD_MAX, PAGED_CHAR_MAX
+
+    return WORD_MAX, CHAR_MAX
+
+
+def _state_key():
+    """Returns key state tokens are signed with, as bytes."""
+
+    key = app.config['STATE_KEY'] or app.secret_key or _random_key
+
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+
+    return key
+
+
+def _state(input_text, analysis):
+    """Returns state token holding where the sentences of a text are.
+
+    Args:
+        input_text (str): original text.
+        analysis (map): all sentences of text, as returned by
+                        textanalysis.analyze.
+
+    Returns:
+        state (str): token to be POSTed back with the text (see statetoken).
+    """
+
+    # Sentences include whitespace characters before them
+    spans = [(item['end'] - len(item['sentence']), item['end'])
+             for item in analysis['sentences']]
+
+    return statetoken.encode(input_text, spans, _state_key())
+
+
+@contextlib.contextmanager
+def _posted_counter(form, change=False):
+    """Holds the parsed text that a Merge, Split or Update request is about.
+
+    The text is taken from the document store if an id for it was POSTed,
+    along with the version of it the page shows. It is locked for as long as
+    it is held, so that no other request reads or changes it meanwhile.
+    Otherwise, its sentences are taken from the state token POSTed with it,
+    or, failing that, found again from the POSTed sentence list.
+
+    Args:
+        form (MultiDict): data POSTed with request.
+        change (bool): whether the text is about to be changed.
+
+    Raises:
+        _ExpiredError: text is no longer kept in document store.
+        _StaleError: text in document store has changed since the version
+                     POSTed.
+
+    Yields:
+        lgcounter (LeGuinCounter): parsed text, with any previous merges or
+                                   splits.
+        doc_id (str): id of text in document store; None if not stored.
+        version (int): version of text in document store, once changed;
+                       None if not stored.
+    """
+
+    # Text kept on the server since it was counted: no need to parse it again
+    if app.config['DOCUMENT_STORE'] and 'doc_id' in form:
+        doc_id = form['doc_id']
+        lock = document_store.lock(doc_id)
+
+        if lock is None:
+            raise _ExpiredError(doc_id)
+
+        # One request at a time, e.g. when a form is submitted twice
+        with lock:
+            lgcounter = document_store.get(doc_id)
+            version = document_store.version(doc_id)
+
+            # Dropped from the store while waiting for the lock
+            if lgcounter is None:
+                raise _ExpiredError(doc_id)
+
+            # Sentence indices POSTed are those of the version shown
+            if form.get('version') != str(version):
+                raise _StaleError(doc_id)
+
+            # Moved on before the change: should it fail half-way, pages
+            # showing the text as it was are turned away all the same
+            if change:
+                version = document_store.changed(doc_id)
+
+            yield lgcounter, doc_id, version
+
+        return
+
+    input_text = form['input_text']
+    sent_list = form.getlist('sent_list[]')
+
+    # Trailing whitespaces are superfluous
+    input_text = input_text.rstrip()
+
+    # Where each sentence is, with any previous merges or splits: no need
+    # to parse the text or search it
+    if 'state' in form:
+        spans = statetoken.decode(form['state'], input_text, _state_key())
+        yield LeGuinCounter.from_spans(input_text, spans), None, None
+        return
+
+    # Parse text
+    lgcounter = LeGuinCounter(input_text)
+
+    # The parsing above generates a sentence list based on the
+    # original text sent via form.html. However, if users have made
+    # merges or splits since then, they will not appear: only the
+    # results of the first parsing will.
+
+    # To keep track of any previous merges/splits made on the text,
+    # a modified sent_list is passed with every POST request.
+    # This requires, however, overriding the LeGuinCounter's
+    # sent_list. Admittedly, not the best design, but it works.
+    # Each sentence is located in the text once here; positions
+    # are then kept in step with the merge or split that follows.
+    lgcounter.sentences = sent_list
+
+    yield lgcounter, None, None
+
+
+def _posted_max(form):
+    """Returns the word max POSTed with a request.
+
+    Args:
+        form (MultiDict): data POSTed with request.
+
+    Raises:
+        _MaxError: max is not a whole number.
+
+    Returns:
+        word_max (int): max number of words allowed per sentence.
+    """
+
+    # LeGuinCounter expects an integer
+    try:
+        return int(form['max'])
+    except ValueError as err:
+        raise _MaxError(form['max']) from err
+
+
+#==============================ACTIONS=========================================
+# Each action carries out a request made by the web page or the API, and
+# returns the same six values:
+#   input_text (str): original text.
+#   word_max (int): max number of words allowed per sentence.
+#   analysis (map): sentences of text shown, as returned by
+#                   textanalysis.analyze.
+#   doc_id (str): id of text in document store; None if not stored.
+#   page (_Page): page of sentences shown; None if results aren't paged.
+#   version (int): version of text in document store; None if not stored.
+
+def _analysis(lgcounter, word_max, form, doc_id):
+    """Returns data about the sentences of a text shown in the results.
+
+    All sentences are shown, unless PAGE_SIZE is set and the text is kept in
+    the document store: then only those on the page POSTed, the first by
+    default, are gone over.
+
+    Args:
+        lgcounter (LeGuinCounter): parsed text.
+        word_max (int): max number of words allowed per sentence.
+        form (MultiDict): data POSTed with request.
+        doc_id (str): id of text in document store; None if not stored.
+
+    Returns:
+        analysis (map): sentences shown, as returned by
+                        textanalysis.analyze.
+        page (_Page): page shown; None if results aren't paged.
+    """
+
+    size = app.config['PAGE_SIZE']
+
+    if not size or doc_id is None:
+        return lgcounter.analyze(word_max), None
+
+    count = max(1, -(-len(lgcounter.wordcounts) // size))
+
+    # Last page if past it, e.g. after sentences were merged
+    number = min(max(int(form.get('page', 0)), 0), count - 1)
+    page = _Page(number, count, number * size)
+
+    return lgcounter.analyze_page(word_max, page.first, size), page
+
+
+def _count(form):
+    """Parses a text and counts the words of its sentences.
+
+    Args:
+        form (MultiDict): data POSTed with request.
+
+    Raises:
+        _TooLongError: text has too many words or characters.
+        _MaxError: max is not a whole number.
+
+    Returns:
+        See above.
+    """
+
+    # Get everything we'll need to parse the sentences from a text
+    input_text = form['input_text']
+
+    # Check that word_max has been respected
+    if _is_over(input_text, *_limits()):
+        raise _TooLongError(input_text)
+
+    word_max = _posted_max(form)
+
+    # Trailing whitespaces are superfluous
+    input_text = input_text.rstrip()
+
+    # Same text submitted before: no need to parse it or count
+    # the words of its sentences again
+    cached = parse_cache.get(input_text)
+
+    if cached is None:
+        spans = ta.get_sentence_spans(input_text)
+        wordcounts = None
+    else:
+        spans, wordcounts = cached
+
+    if app.config['DOCUMENT_STORE']:
+        # Keep parsed text for any merges or splits to come
+        lgcounter = LeGuinCounter.from_spans(input_text, spans)
+        doc_id = document_store.add(lgcounter)
+    else:
+        doc_id = None
+
+    if _paged() and doc_id is not None:
+        # Only the sentences of the first page are gone over
+        analysis, page = _analysis(lgcounter, word_max, form, doc_id)
+        wordcounts = lgcounter.wordcounts
+    else:
+        analysis = ta.analyze(input_text, word_max, spans, wordcounts)
+        wordcounts = [item['wordcount'] for item in analysis['sentences']]
+        page = None
+
+    if cached is None:
+        parse_cache.put(input_text, spans, wordcounts)
+
+    # Text as counted: not changed yet
+    version = None if doc_id is None else 0
+
+    return input_text, word_max, analysis, doc_id, page, version
+
+
+def _merge(form):
+    """Merges a sentence with the one following it.
+
+    Args:
+        form (MultiDict): data POSTed with request.
+
+    Raises:
+        _MaxError: max is not a whole number.
+        _ExpiredError: text is no longer kept in document store.
+        _StaleError: text in document store has changed since page shown.
+
+    Returns:
+        See above.
+    """
+
+    # pos of first sentence in merge
+    index = int(form['index'])
+
+    word_max = _posted_max(form)
+
+    # Text with any previous merges or splits
+    with _posted_counter(form, change=True) as (lgcounter, doc_id, version):
+
+        # Merge sentence at current index with the one following it
+        lgcounter.merge_next(index)
+
+        analysis, page = _analysis(lgcounter, word_max, form, doc_id)
+
+    return lgcounter.text, word_max, analysis, doc_id, page, version
+
+
+def _split(form):
+    """Splits a sentence in two parts.
+
+    Args:
+        form (MultiDict): data POSTed with request.
+
+    Raises:
+        _MaxError: max is not a whole number.
+        _ExpiredError: text is no longer kept in document store.
+        _StaleError: text in document store has changed since page shown.
+
+    Returns:
+        See above.
+    """
+
+    # Position of sentence to be split in sent_list; split.js gives it
+    # from the first sentence on the page
+    index = int(form['sentindex']) + int(form.get('first', 0))
+
+    # First segment of split sentence
+    first_part = form['firstpart']
+
+    word_max = _posted_max(form)
+
+    # Read comments under _merge
+    with _posted_counter(form, change=True) as (lgcounter, doc_id, version):
+
+        # Where the user clicked, if split.js sent it
+        position = form.get('splitposition', '')
+
+        if position:
+            start, end = lgcounter.spans[index]
+            sentence = lgcounter.index.clean[start:end]
+            offset = _split_offset(sentence, int(position))
+
+            # Whitespace before where the user clicked goes with the second
+            # part, as it does when the first part is searched for
+            offset = len(sentence[:offset].rstrip())
+
+            # Browsers send newlines as CRLF
+            first = sentence[:offset].replace('\r\n', '\n').strip()
+            posted = first_part.replace('\r\n', '\n').strip()
+
+        # Divide sentence at 'index' in two where the user clicked;
+        # failing that, e.g. the browser showed the sentence
+        # differently, where the argument 'first_part' ends
+        if position and first == posted:
+            lgcounter.split_at(index, offset)
+        else:
+            lgcounter.split_sentence(index, first_part)
+
+        analysis, page = _analysis(lgcounter, word_max, form, doc_id)
+
+    return lgcounter.text, word_max, analysis, doc_id, page, version
+
+
+def _update(form):
+    """Flags sentences against a new word max, or shows another page of them.
+
+    Only the word max or page has changed: sentences and their word counts
+    stay the same, and are not found again if the text is kept on the server.
+
+    Args:
+        form (MultiDict): data POSTed with request.
+
+    Raises:
+        _MaxError: max is not a whole number.
+        _ExpiredError: text is no longer kept in document store.
+        _StaleError: text in document store has changed since page shown.
+
+    Returns:
+        See above.
+    """
+
+    word_max = _posted_max(form)
+
+    with _posted_counter(form) as (lgcounter, doc_id, version):
+        analysis, page = _analysis(lgcounter, word_max, form, doc_id)
+
+    return lgcounter.text, word_max, analysis, doc_id, page, version
+
+
+# Action carried out for each submit button of the web page
+_ACTIONS = {'Count': _count, 'Merge': _merge, 'Split': _split,
+            'Update': _update, 'Page': _update}
+
+
+def _results(analysis, html=True):
+    """Returns what is shown of the sentences of a text.
+
+    Args:
+        analysis (map): sentences of text, as returned by
+                        textanalysis.analyze.
+        html (bool): whether whitespace before sentences is to be shown in
+                     HTML (see _html_whitespace).
+
+    Returns:
+        results (map): 'highlight_data', start and end indices, whether over
+                       word max and whitespace before each sentence;
+                       'sentences', content and word count of each;
+                       'wordcounts', number of words in original and parsed
+                       texts.
+    """
+
+    # Data to facilitate the highlighting of parsed text in the UI layer
+    highlight_data = [(item['start'], item['end'], item['is_over'],
+                       _html_whitespace(item['whitespace']) if html
+                       else item['whitespace'])
+                      for item in analysis['sentences']]
+
+    # Useful when printing a table that describes each sentence
+    sentences = [{'content': item['sentence'],
+                  'wordcount': item['wordcount']}
+                 for item in analysis['sentences']]
+
+    # Get number of words in original and parsed texts
+    # If they're not equal, then it's likely the last part of the
+    # original text got lobbed off because it was missing a terminating
+    # punctuation mark or was split in the middle of a word.
+    wordcounts = analysis['wordcounts']
+
+    return {'highlight_data': highlight_data, 'sentences': sentences,
+            'wordcounts': wordcounts}
+
+
 def _is_over_err_msg(input_text):
     """Returns form page with an error message stating that input text has too
     many words and/or characters.
@@ -69,14 +632,16 @@ def _is_over_err_msg(input_text):
         (template): data that will be used to render webpage on client-side.
 
     """
-    msg = f'''Text exceeds {WORD_MAX} words or
-                 {CHAR_MAX} characters:
-                 {len(ta.get_words(input_text))} words;
+    word_max, char_max = _limits()
+
+    msg = f'''Text exceeds {word_max} words or
+                 {char_max} characters:
+                 {ta.count_words(input_text)} words;
                  {len(input_text)} characters.'''
 
     return render_template("form.html", msg=msg,
                            input_text=input_text,
-                           max=WORD_MAX,
+                           max=word_max,
                            is_over=True)
 
 
@@ -98,9 +663,48 @@ def _max_err_msg():
     return response
 
 
+def _expired_err_msg():
+    """Returns page with an error message stating that the text a Merge, Split
+    or Update request is about is no longer kept on the server.
+
+    Returns:
+        (response): data that will be used to render webpage on client-side.
+    """
+    err = ("Your text is no longer available on the server; " +
+           "please enter it again.")
+    stack_trace = "Not an exception!"
+
+    # Add security policy
+    response = make_response(render_template("error.html",
+                                             err=err,
+                                             stack_trace=stack_trace))
+    response.headers['Content-Security-Policy'] = "default-src 'self'"
+    return response
+
+
+def _stale_err_msg():
+    """Returns page with an error message stating that the text a Merge, Split
+    or Update request is about has changed since the page it was made from
+    was shown, e.g. because the form was submitted twice.
+
+    Returns:
+        (response): data that will be used to render webpage on client-side.
+    """
+    err = ("Your text has changed on the server since this page was shown; " +
+           "please reload it from your latest results.")
+    stack_trace = "Not an exception!"
+
+    # Add security policy
+    response = make_response(render_template("error.html",
+                                             err=err,
+                                             stack_trace=stack_trace))
+    response.headers['Content-Security-Policy'] = "default-src 'self'"
+    return response
+
+
 def _unknown_post_err_msg():
     """Returns page with an error message stating that some other POST action
-    besides Count, Merge or Split was requested.
+    besides Count, Merge, Split or Update was requested.
 
     Returns:
         (response): data that will be used to render webpage on client-side.
@@ -207,9 +811,10 @@ def process_text():
         if request.method == 'GET':
             # Need a response object to add meta security policy tag in the
             # header of the returned page
+            word_max, char_max = _limits()
             response = make_response(render_template("form.html",
-                                                     max=WORD_MAX,
-                                                     char_max=CHAR_MAX))
+                                                     max=word_max,
+                                                     char_max=char_max))
             # Set security policy to minimize chances of XSS attack
             # Policy: only trust resources (scripts, stylsheets etc) from
             # this site (default-src)
@@ -218,151 +823,435 @@ def process_text():
 
         if request.method == 'POST':
 
-            # Request to parse text made from form.html
-            if request.form['submit_button'] == 'Count':
+            # Count requests are made from form.html; Merge, Split, Update
+            # and Page requests from results.html
+            action = _ACTIONS.get(request.form['submit_button'])
+            if action is None:
+                return _unknown_post_err_msg()
 
-                # Get everything we'll need to parse the sentences from a text
-                input_text = request.form['input_text']
+            try:
+                input_text, word_max, analysis, doc_id, page, version = \
+                    action(request.form)
+            except _TooLongError as err:
+                return _is_over_err_msg(err.args[0])
+            except _MaxError:
+                return _max_err_msg()
+            except _ExpiredError:
+                return _expired_err_msg()
+            except _StaleError:
+                return _stale_err_msg()
 
-                # Check that word_max has been respected
-                if _is_over(input_text, WORD_MAX, CHAR_MAX):
-                    return _is_over_err_msg(input_text)
+            results = _results(analysis)
 
-                # LeGuinCounter expects an integer
-                try:
-                    word_max = int(request.form['max'])
-                except ValueError:
-                    return _max_err_msg()
+            # Text not kept on the server: where its sentences are is sent
+            # back with it instead
+            state = _state(input_text, analysis) if doc_id is None else None
 
-                # Trailing whitespaces are superfluous
-                input_text = input_text.rstrip()
+            # Add security policy
+            response = make_response(render_template(
+                "results.html",
+                input_text=input_text,
+                sentences=results['sentences'],
+                max=word_max,
+                highlight_data=results['highlight_data'],
+                wordcounts=results['wordcounts'],
+                doc_id=doc_id,
+                version=version,
+                page=page,
+                state=state))
+
+            response.headers['Content-Security-Policy'] = "default-src 'self'"
+            return response
 
-                # Parse text
-                lgcounter = LeGuinCounter(input_text)
 
-            # Request to merge a sentence with the one following it.
-            # Made from results.html
-            elif request.form['submit_button'] == 'Merge':
+        # Server will return a 405 error code if GET or POST not made.
+        # Note that HEAD request will work as it only returns blank data
+        # HEAD request executes this conditional, even though the error
+        # page is technically not returned (Why??)
+        return _not_get_post_err_msg()
 
-                # Get everything we'll need to merge sentences
-                # and need to send data back to results.html
-                input_text = request.form['input_text']
-                word_max = request.form['max']
-                sent_list = request.form.getlist('sent_list[]')
 
-                # pos of first sentence in merge
-                index = int(request.form['index'])
+    except (ta.NotInTextError, ValueError, TypeError, IndexError,
+            MemoryError) as exception:
 
-                # LeGuinCounter expects an integer
-                try:
-                    word_max = int(word_max)
-                except ValueError:
-                    return _max_err_msg()
+        return _misc_err_msg(exception)
 
-                # Trailing whitespaces are superfluous
-                input_text = input_text.rstrip()
 
-                # Parse text
-                lgcounter = LeGuinCounter(input_text)
+#================================API===========================================
+# Routes for other programs rather than browsers. They take the same data as
+# the web page POSTs, either as a form or as a JSON object, carry out the same
+# actions, and return the data the results page is made from as JSON, without
+# any template being rendered.
 
-                # The parsing above generates a sentence list based on the
-                # original text sent via form.html. However, if users have made
-                # merges or splits since then, they will not appear: only the
-                # results of the first parsing will.
+# Fields that may be given as JSON numbers rather than strings
+_API_NUMBERS = {'max', 'index', 'sentindex', 'first', 'splitposition', 'page',
+                'version'}
 
-                # To keep track of any previous merges/splits made on the text,
-                # a modified sent_list is passed with every POST request.
-                # This requires, however, overriding the LeGuinCounter's
-                # sent_list. Admittedly, not the best design, but it works.
-                lgcounter.sentences = sent_list
+def _api_form():
+    """Returns data POSTed to an API route, as a form would have it.
 
-                # Merge sentence at current index with the one following it
-                lgcounter.merge_next(index)
+    A JSON object may be POSTed instead of a form: its keys are the names of
+    form fields; a list gives a field more than one value, e.g.
+    {"sent_list[]": ["Hi.", " Bye."]}. Values are strings, or whole numbers
+    for fields such as 'max' (see _API_NUMBERS).
 
-            # Request to split a sentence in two parts
-            # Made from results.html
-            elif request.form['submit_button'] == 'Split':
+    Raises:
+        TypeError: JSON POSTed is not an object, or one of its values is
+                   neither a string nor, where allowed, a whole number.
 
-                # Position of sentence to be split in sent_list
-                index = int(request.form['sentindex'])
+    Returns:
+        form (MultiDict): data POSTed.
+    """
 
-                # First segment of split sentence
-                first_part = request.form['firstpart']
+    data = request.get_json(silent=True)
+    if data is None:
+        return request.form
 
-                # The rest of the data that needs to be POSTed on every change
-                input_text = request.form['input_text']
-                word_max = request.form['max']
-                sent_list = request.form.getlist('sent_list[]')
+    if not isinstance(data, dict):
+        raise TypeError("TypeError in app._api_form: JSON POSTed not an " +
+                        "object.")
 
-                # LeGuinCounter expects an integer
-                try:
-                    word_max = int(word_max)
-                except ValueError:
-                    return _max_err_msg()
+    form = MultiDict()
+    for key, value in data.items():
+        for item in value if isinstance(value, list) else [value]:
+            # Anything else, e.g. null, would be read as its Python string;
+            # bool is a subclass of int
+            number = (key in _API_NUMBERS and isinstance(item, int) and
+                      not isinstance(item, bool))
 
-                # Trailing white spaces are suprefluous
-                input_text = input_text.rstrip()
+            if not isinstance(item, str) and not number:
+                raise TypeError("TypeError in app._api_form: value of " +
+                                f"{key!r} must be a string" +
+                                (" or a whole number." if key in _API_NUMBERS
+                                 else "."))
 
-                # Parse text
-                lgcounter = LeGuinCounter(input_text)
+            form.add(key, str(item))
 
-                # Read comments under 'Merge'
-                lgcounter.sentences = sent_list
+    return form
 
-                # Divide sentence at 'index' in to two with first having to
-                # match the argument 'first_part'
-                lgcounter.split_sentence(index, first_part)
 
-            else:
-                return _unknown_post_err_msg()
+def _api_error(err, status):
+    """Returns JSON response stating why a request failed.
 
-            # Get list of LeGuinSentence objects to facilitate the highlighting
-            # of parsed text in the UI layer
-            lg_sentlist = lgcounter.generate_LGSentenceList(input_text,
-                                                            lgcounter.sentences,
-                                                            word_max)
-
-            # Want to keep lgcounter classes, which are domain-level,
-            # decoupled from HTML/JS code which is UI level
-            highlight_data = [(l.start, l.end, l.is_over, l.whitespace)
-                              for l in lg_sentlist]
-
-            # Useful when printing a table that describes each sentence
-            sentences = [{'content': s, 'wordcount': lgcounter.count_words(s)}
-                         for s in lgcounter.sentences]
-
-            # Get number of words in original and parsed texts
-            # If they're not equal, then it's likely the last part of the
-            # original text got lobbed off because it was missing a terminating
-            # punctuation mark or was split in the middle of a word.
-            wordcounts = {
-                'original': len(ta.get_words(input_text)),
-                'parsed': sum(sentence['wordcount'] for sentence in sentences)
-            }
+    Args:
+        err (str): description of error.
+        status (int): HTTP status code of response.
 
-            # Add security policy
-            response = make_response(render_template("results.html",
-                                                     input_text=input_text,
-                                                     sentences=sentences,
-                                                     max=word_max,
-                                                     highlight_data=highlight_data,
-                                                     wordcounts=wordcounts))
+    Returns:
+        response (flask.Response): JSON object with an 'error' key.
+    """
+    response = jsonify(error=err)
+    response.status_code = status
 
-            response.headers['Content-Security-Policy'] = "default-src 'self'"
-            return response
+    return response
 
 
-        # Server will return a 405 error code if GET or POST not made.
-        # Note that HEAD request will work as it only returns blank data
-        # HEAD request executes this conditional, even though the error
-        # page is technically not returned (Why??)
-        return _not_get_post_err_msg()
+def _api_response(action):
+    """Carries out an action requested of the API.
 
+    Args:
+        action (function): one of _count, _merge or _split.
 
+    Returns:
+        response (flask.Response): JSON object with the word 'max', the
+                                   'doc_id' and 'version' of the text if
+                                   kept on the server, the 'page' of
+                                   sentences if paged, and the results
+                                   shown of its sentences (see _results);
+                                   or, if the request failed, an 'error'.
+    """
+
+    try:
+        input_text, word_max, analysis, doc_id, page, version = \
+            action(_api_form())
+
+    except _TooLongError:
+        return _api_error("Text exceeds {} words or {} characters."
+                          .format(*_limits()), 413)
+    except _MaxError:
+        return _api_error("Bad input: 'max' can only be a positive whole " +
+                          "number.", 400)
+    except _ExpiredError:
+        return _api_error("Text no longer available on the server.", 404)
+    except _StaleError:
+        return _api_error("Text on the server has changed since the " +
+                          "'version' POSTed.", 409)
+    except BadRequest as err:
+        return _api_error(err.description, 400)
     except (ta.NotInTextError, ValueError, TypeError, IndexError,
             MemoryError) as exception:
+        return _api_error(f"{type(exception).__name__}: {exception}", 400)
 
-        return _misc_err_msg(exception)
+    # Whitespace before sentences as is: there is no HTML to show it in
+    return jsonify(max=word_max, doc_id=doc_id, version=version,
+                   page=page._asdict() if page else None,
+                   **_results(analysis, html=False))
+
+
+@app.route("/api/v1/analyze", methods=['POST'])
+def api_analyze():
+    """Parses a text and counts the words of its sentences.
+
+    Takes the same data as a Count request: 'input_text' and 'max'.
+    """
+    return _api_response(_count)
+
+
+@app.route("/api/v1/merge", methods=['POST'])
+def api_merge():
+    """Merges a sentence with the one following it.
+
+    Takes the same data as a Merge request: 'max', 'index', and either
+    'doc_id' and 'version' or 'input_text' and 'sent_list[]'.
+    """
+    return _api_response(_merge)
+
+
+@app.route("/api/v1/split", methods=['POST'])
+def api_split():
+    """Splits a sentence in two parts.
+
+    Takes the same data as a Split request: 'max', 'sentindex', 'firstpart',
+    optionally 'splitposition', and either 'doc_id' and 'version' or
+    'input_text' and 'sent_list[]'.
+    """
+    return _api_response(_split)
+
+
+def _bulk_lines(stream):
+    """Yields each line of a bulk request, without reading all of it.
+
+    Args:
+        stream (file): body of request.
+
+    Yields:
+        line (bytes): next line; None in place of a line longer than
+                      BULK_LINE_MAX, which is skipped.
+    """
+
+    while True:
+        line = stream.readline(BULK_LINE_MAX + 1)
+        if not line:
+            return
+
+        # Too long: skip the rest of it without keeping any of it
+        if len(line) > BULK_LINE_MAX:
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(BULK_LINE_MAX)
+            yield None
+
+        elif line.strip():
+            yield line
+
+
+def _bulk_document(line):
+    """Returns the document a line of a bulk request holds.
+
+    Args:
+        line (bytes): JSON object with the 'id', 'text' and 'max' of a
+                      document; None if line was too long.
+
+    Raises:
+        ValueError: line is not a JSON object.
+
+    Returns:
+        document (map): document as given.
+    """
+
+    if line is None:
+        raise ValueError(f"Line exceeds {BULK_LINE_MAX} bytes.")
+
+    try:
+        document = json.loads(line)
+    except ValueError as err:
+        raise ValueError(f"Not a JSON document: {err}") from err
+
+    if not isinstance(document, dict):
+        raise ValueError("Not a JSON object.")
+
+    return document
+
+
+def _bulk_check(document):
+    """Returns the text of a document of a bulk request and its word max.
+
+    Args:
+        document (map): document as given.
+
+    Raises:
+        ValueError: text or max of document is missing or not valid.
+
+    Returns:
+        text (str): text of document, without trailing whitespace.
+        word_max (int): max number of words allowed per sentence.
+    """
+
+    text = document.get('text')
+    word_max = document.get('max')
+
+    if not isinstance(text, str):
+        raise ValueError("'text' must be a string.")
+
+    # bool is a subclass of int
+    if (not isinstance(word_max, int) or isinstance(word_max, bool) or
+            word_max < 1):
+        raise ValueError("'max' can only be a positive whole number.")
+
+    # Same restriction as on the web page
+    if _is_over(text, WORD_MAX, CHAR_MAX):
+        raise ValueError(f"Text exceeds {WORD_MAX} words or {CHAR_MAX} " +
+                         "characters.")
+
+    return text.rstrip(), word_max
+
+
+def _bulk_line(result):
+    """Returns a line of the response to a bulk request."""
+    return json.dumps(result, separators=(',', ':')) + '\n'
+
+
+# Pool of worker processes shared by bulk requests, and its number of workers;
+# started by the first of them
+_bulk_pool = None
+_bulk_pool_lock = threading.Lock()
+
+
+def _bulk_executor(broken=None):
+    """Returns the pool of worker processes shared by bulk requests, starting
+    it if need be.
+
+    Sharing the pool bounds the number of worker processes however many bulk
+    requests come in at once, and spares each the time it takes to start them.
+
+    Args:
+        broken (ProcessPoolExecutor): pool found broken, e.g. because one of
+                                      its workers was killed; replaced with a
+                                      new one, unless already replaced.
+
+    Returns:
+        pool (ProcessPoolExecutor): pool of worker processes.
+        workers (int): number of worker processes in pool.
+    """
+    global _bulk_pool
+
+    with _bulk_pool_lock:
+        if _bulk_pool is not None and _bulk_pool[0] is broken:
+            broken.shutdown(wait=False)
+            _bulk_pool = None
+
+        if _bulk_pool is None:
+            workers = app.config['BULK_WORKERS'] or os.cpu_count() or 1
+            _bulk_pool = (concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers), workers)
+
+        return _bulk_pool
+
+
+@atexit.register
+def _bulk_shutdown():
+    """Stops the worker processes of bulk requests, if started."""
+    global _bulk_pool
+
+    with _bulk_pool_lock:
+        if _bulk_pool is not None:
+            _bulk_pool[0].shutdown()
+            _bulk_pool = None
+
+
+def _bulk_results(stream):
+    """Yields the result of analyzing each document of a bulk request, as
+    soon as it is ready.
+
+    Only a few documents per worker are read ahead of those being analyzed,
+    so that however many documents there are, only that many are held in
+    memory at once. Results are yielded in the order documents finish, not
+    the order they were sent in. Should a worker process die, documents it
+    hadn't finished get an error; those after them are sent to a new pool.
+
+    Args:
+        stream (file): body of request, one JSON document per line.
+
+    Yields:
+        line (str): JSON object with the 'id' and 'max' of a document and
+                    the results shown of its sentences (see _results), or
+                    its 'id' and an 'error'.
+    """
+
+    pool, workers = _bulk_executor()
+
+    # future -> id and max of document being analyzed
+    pending = {}
+
+    def finished(timeout):
+        """Yields lines for documents done within timeout seconds."""
+        done, __ = concurrent.futures.wait(
+            pending, timeout,
+            return_when=concurrent.futures.FIRST_COMPLETED)
+
+        for future in done:
+            doc_id, word_max = pending.pop(future)
+            try:
+                analysis = future.result()
+            except (ValueError, TypeError, MemoryError,
+                    BrokenProcessPool) as exception:
+                yield _bulk_line({'id': doc_id, 'error':
+                                  f"{type(exception).__name__}: " +
+                                  f"{exception}"})
+            else:
+                yield _bulk_line({'id': doc_id, 'max': word_max,
+                                  **_results(analysis, html=False)})
+
+    try:
+        for line in _bulk_lines(stream):
+            # id of a document that couldn't be read is unknown
+            doc_id = None
+
+            try:
+                document = _bulk_document(line)
+                doc_id = document.get('id')
+                text, word_max = _bulk_check(document)
+            except ValueError as err:
+                yield _bulk_line({'id': doc_id, 'error': str(err)})
+                continue
+
+            # Wait for a worker to be free before reading any further
+            while len(pending) >= workers * BULK_BACKLOG:
+                yield from finished(None)
+
+            try:
+                future = pool.submit(ta.analyze, text, word_max)
+            except BrokenProcessPool:
+                # Documents already sent to the broken pool get an error
+                pool, workers = _bulk_executor(broken=pool)
+                future = pool.submit(ta.analyze, text, word_max)
+
+            pending[future] = (doc_id, word_max)
+
+            # Don't hold back documents already done
+            yield from finished(0)
+
+        while pending:
+            yield from finished(None)
+
+    finally:
+        # Client gone: leave the workers to other requests
+        for future in pending:
+            future.cancel()
+
+
+@app.route("/api/v1/bulk", methods=['POST'])
+def api_bulk():
+    """Analyzes many documents in a single request.
+
+    The body of the request is newline-delimited JSON: one object per line,
+    with the 'id', 'text' and 'max' of a document. The body of the response
+    is newline-delimited JSON too, streamed one line per document as soon as
+    that document is analyzed (see _bulk_results). A document that can't be
+    analyzed gets a line with an 'error' instead; the others still are.
+    """
+
+    return Response(stream_with_context(_bulk_results(request.stream)),
+                    mimetype='application/x-ndjson')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,555 @@
+"""Module that serves the Flask app of module 'app' to ASGI servers.
+
+Served as WSGI, each request holds a worker thread of the server until it is
+answered; a worst-case text takes long enough to parse that requests as cheap
+as loading the main page queue up behind it. Served through AsyncApp instead,
+requests that parse texts are answered by a pool of worker processes, while
+the event loop goes on accepting requests and answering the cheap ones.
+
+For instance, with uvicorn installed:
+
+    cd sentencecow
+    uvicorn asgi:application
+
+The environment variables SENTENCECOW_ASGI_WORKERS and
+SENTENCECOW_ASGI_QUEUE_DEPTH, if set, give the number of worker processes of
+'application' and how many requests may wait for one of them, e.g.
+
+    SENTENCECOW_ASGI_WORKERS=4 uvicorn asgi:application
+
+Each worker process imports its own copy of the app, given the settings the
+app has when the pool is started, and so has its own parse cache. The
+document store, however, has to be shared by every request: while the
+DOCUMENT_STORE setting of the app is on, no request is sent to the pool, and
+those that parse texts are answered in threads instead.
+"""
+
+import asyncio
+import concurrent.futures
+import importlib
+import io
+import os
+import sys
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+from app import app, _state_key
+
+
+# Default limits of an AsyncApp
+QUEUE_DEPTH = 64
+MAX_BODY = 2**20
+
+# Routes whose requests parse texts: these are sent to the pool
+POOLED_PATHS = {'/sentencecow', '/api/v1/analyze', '/api/v1/merge',
+                '/api/v1/split'}
+
+
+class AsyncApp:
+    """A class that serves a WSGI app as an ASGI app.
+
+    POST requests to POOLED_PATHS are answered in a pool of worker
+    processes, all other requests in threads. The body of pooled requests is
+    read in full before being sent to a worker; that of other requests is
+    read as the app asks for it, and their responses are sent as the app
+    yields them, e.g. the lines of a bulk request.
+
+    Worker processes can't be handed the app itself: each imports it from
+    the module it was made in, then takes on its settings.
+
+    Attributes:
+        wsgi_app (Flask): app served.
+        app_ref (str): where worker processes import wsgi_app from, as
+                       'module:name'.
+        workers (int): number of worker processes.
+        queue_depth (int): most requests waiting for a worker process to be
+                           free; any more are answered with an error 503.
+        max_body (int): most bytes in the body of a pooled request; any more
+                        are answered with an error 413.
+    """
+
+    def __init__(self, wsgi_app, workers=None, queue_depth=QUEUE_DEPTH,
+                 max_body=MAX_BODY, app_ref=None, mp_context=None):
+        """Inits AsyncApp; worker processes are started when first needed.
+
+        Args:
+            wsgi_app (Flask): app to serve.
+            workers (int): number of worker processes; if None, one per CPU.
+            queue_depth (int): most requests waiting for a worker process.
+            max_body (int): most bytes in the body of a pooled request.
+            app_ref (str): where worker processes import wsgi_app from, as
+                           'module:name'; if None, the name wsgi_app goes by
+                           in the module it was made in.
+            mp_context (multiprocessing.context.BaseContext): how worker
+                processes are started, e.g. forked or spawned; if None,
+                the default of the platform.
+
+        Raises:
+            ValueError: workers is less than one, queue_depth less than
+                        zero, or wsgi_app can't be imported by worker
+                        processes.
+        """
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers < 1 or queue_depth < 0:
+            raise ValueError("ValueError in asgi.AsyncApp: workers must be " +
+                             "greater than zero, queue_depth at least zero.")
+
+        self.wsgi_app = wsgi_app
+        self.app_ref = app_ref or _app_ref(wsgi_app)
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.max_body = max_body
+
+        self._mp_context = mp_context
+        self._pool = None
+
+        # Requests sent to the pool and not yet answered
+        self._pending = 0
+
+    async def __call__(self, scope, receive, send):
+        """Answers an ASGI request."""
+
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+
+        elif scope['type'] == 'http':
+            pooled = (scope['method'] == 'POST' and
+                      scope['path'] in POOLED_PATHS and
+                      not self.wsgi_app.config.get('DOCUMENT_STORE'))
+
+            if pooled:
+                await self._run_in_pool(scope, receive, send)
+            else:
+                await self._run_in_thread(scope, receive, send)
+
+        else:
+            raise ValueError("ValueError in asgi.AsyncApp: unsupported " +
+                             f"scope type {scope['type']!r}.")
+
+    def shutdown(self):
+        """Stops worker processes, once they are done with their requests."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    async def _lifespan(self, receive, send):
+        """Starts worker processes with the server, and stops them with it."""
+
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                self._start()
+                await send({'type': 'lifespan.startup.complete'})
+
+            elif message['type'] == 'lifespan.shutdown':
+                # Don't hold up the event loop while requests finish
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _start(self):
+        """Starts pool of worker processes, if not already started."""
+        if self._pool is None:
+            config = getattr(self.wsgi_app, 'config', None)
+
+            if config is not None:
+                config = dict(config)
+
+            # A state token made by one worker process is checked by another;
+            # unless a key is set, each would make up a key of its own
+            if self.wsgi_app is app:
+                config['STATE_KEY'] = _state_key()
+
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self._mp_context,
+                initializer=_init_worker, initargs=(self.app_ref, config))
+
+    async def _run_in_pool(self, scope, receive, send):
+        """Answers a request in a worker process."""
+
+        # Too many requests already waiting: turn this one away right now.
+        # A request takes its place before its body is read, so that those
+        # still sending their bodies count against the limit too
+        if self._pending >= self.workers + self.queue_depth:
+            await _send_error(send, 503, b'Server busy; try again later.')
+            return
+
+        self._pending += 1
+
+        try:
+            body = bytearray()
+            more = True
+
+            while more:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+
+                body += message.get('body', b'')
+                more = message.get('more_body', False)
+
+                if len(body) > self.max_body:
+                    await _send_error(send, 413, b'Request body too large.')
+                    return
+
+            self._start()
+            pool = self._pool
+
+            try:
+                status, headers, content = \
+                    await asyncio.get_running_loop().run_in_executor(
+                        pool, _call_pooled, _environ(scope), bytes(body))
+
+            except BrokenProcessPool:
+                # A worker process died, e.g. killed for lack of memory, and
+                # the pool with it: drop it, so that the next request starts
+                # a new one, unless another request already has
+                if self._pool is pool:
+                    self._pool = None
+                    pool.shutdown(wait=False)
+
+                await _send_error(send, 503,
+                                  b'Server busy; try again later.')
+                return
+
+        finally:
+            self._pending -= 1
+
+        await _send_start(send, status, headers)
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _run_in_thread(self, scope, receive, send):
+        """Answers a request in a thread, streaming its body both ways."""
+
+        loop = asyncio.get_running_loop()
+
+        environ = _environ(scope)
+        environ['wsgi.input'] = _Body(receive, loop)
+        environ['wsgi.errors'] = sys.stderr
+
+        # Status and headers, then each part of the body as soon as it is
+        # made, then None; one at a time, so that the app waits for each
+        # part to be sent before making the next
+        parts = asyncio.Queue(maxsize=1)
+        stop = threading.Event()
+
+        def serve():
+            """Calls app and goes over its response, all in one thread: the
+            app may keep the request in a context variable meanwhile."""
+
+            def put(item):
+                asyncio.run_coroutine_threadsafe(parts.put(item),
+                                                 loop).result()
+
+            try:
+                status, headers, app_iter = _call(self.wsgi_app, environ)
+            except BaseException:
+                put(None)
+                raise
+
+            try:
+                put((status, headers))
+
+                for chunk in app_iter:
+                    if stop.is_set():
+                        break
+                    put(chunk)
+
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+
+                put(None)
+
+        served = loop.run_in_executor(None, serve)
+
+        try:
+            head = await parts.get()
+            if head is None:
+                # Let app's exception through
+                await served
+
+            await _send_start(send, *head)
+
+            while True:
+                chunk = await parts.get()
+                if chunk is None:
+                    break
+
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk,
+                                'more_body': True})
+
+            await send({'type': 'http.response.body', 'body': b''})
+
+        finally:
+            # Client gone: let app stop, taking whatever it still puts
+            stop.set()
+            while True:
+                taken = asyncio.ensure_future(parts.get())
+                done, __ = await asyncio.wait(
+                    {served, taken}, return_when=asyncio.FIRST_COMPLETED)
+
+                if served in done:
+                    taken.cancel()
+                    break
+
+            await served
+
+
+class _Body(io.RawIOBase):
+    """Body of an ASGI request, read by a WSGI app running in a thread.
+
+    Each part of the body is received from the event loop only once the app
+    asks for it, so that a large body is never held all at once.
+    """
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = bytearray()
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while self._more and (size < 0 or len(self._buffer) < size):
+            self._fill()
+
+        return self._take(len(self._buffer) if size < 0 else size)
+
+    def readline(self, size=-1):
+        while (self._more and b'\n' not in self._buffer and
+               (size < 0 or len(self._buffer) < size)):
+            self._fill()
+
+        end = self._buffer.find(b'\n') + 1 or len(self._buffer)
+        if size >= 0:
+            end = min(end, size)
+
+        return self._take(end)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+
+        return len(data)
+
+    def _fill(self):
+        """Receives the next part of the body from the event loop."""
+        message = asyncio.run_coroutine_threadsafe(self._receive(),
+                                                   self._loop).result()
+
+        if message['type'] == 'http.disconnect':
+            self._more = False
+        else:
+            self._buffer += message.get('body', b'')
+            self._more = message.get('more_body', False)
+
+    def _take(self, size):
+        """Returns the first size bytes of the buffer, removing them."""
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+
+        return data
+
+
+def _app_ref(wsgi_app):
+    """Returns where a WSGI app can be imported from, as 'module:name'.
+
+    Args:
+        wsgi_app (function): WSGI app, e.g. a Flask app.
+
+    Raises:
+        ValueError: wsgi_app is not found under any name in the module it was
+                    made in.
+
+    Returns:
+        app_ref (str): name of module and name of app in it.
+    """
+
+    # A Flask app is named after the module it was made in
+    module_name = (getattr(wsgi_app, 'import_name', None) or
+                   getattr(wsgi_app, '__module__', None))
+    module = sys.modules.get(module_name)
+
+    for name, value in vars(module).items() if module else ():
+        if value is wsgi_app:
+            return f"{module_name}:{name}"
+
+    raise ValueError("ValueError in asgi.AsyncApp: app not found in module " +
+                     f"{module_name!r}; give app_ref.")
+
+
+# App a worker process serves (see _init_worker)
+_worker_app = None
+
+
+def _init_worker(app_ref, config):
+    """Imports the app a worker process serves, with the settings of the
+    app served by the server.
+
+    Args:
+        app_ref (str): where app is imported from, as 'module:name'.
+        config (map): settings of app; None if it has none.
+    """
+    global _worker_app
+
+    module_name, name = app_ref.split(':')
+    _worker_app = getattr(importlib.import_module(module_name), name)
+
+    if config is not None:
+        _worker_app.config.update(config)
+
+
+def _environ(scope):
+    """Returns WSGI environment of an ASGI request, without its input.
+
+    Args:
+        scope (map): ASGI connection scope.
+
+    Returns:
+        environ (map): WSGI environment, every value of which can be pickled.
+    """
+
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI strings hold bytes, one per character
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': str(client[0]),
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        # Body ends where the ASGI server says it does
+        'wsgi.input_terminated': True,
+    }
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+        else:
+            key = 'HTTP_' + name
+            environ[key] = (environ[key] + ',' + value if key in environ
+                            else value)
+
+    return environ
+
+
+def _call(wsgi_app, environ):
+    """Calls a WSGI app.
+
+    Args:
+        wsgi_app (function): WSGI app.
+        environ (map): WSGI environment.
+
+    Returns:
+        status (str): status line of response, e.g. '200 OK'.
+        headers (list <tuple>): names and values of headers of response.
+        app_iter (iterable): parts of body of response.
+    """
+
+    response = []
+
+    def start_response(status, headers, exc_info=None):
+        response[:] = [status, headers]
+
+        return None
+
+    app_iter = wsgi_app(environ, start_response)
+    status, headers = response
+
+    return status, headers, app_iter
+
+
+def _call_pooled(environ, body):
+    """Calls the app of a worker process; returns its whole response.
+
+    Args:
+        environ (map): WSGI environment, without its input.
+        body (bytes): body of request.
+
+    Returns:
+        status (str): status line of response.
+        headers (list <tuple>): names and values of headers of response.
+        content (bytes): body of response.
+    """
+
+    environ['wsgi.input'] = io.BytesIO(body)
+    environ['wsgi.errors'] = sys.stderr
+
+    status, headers, app_iter = _call(_worker_app, environ)
+
+    try:
+        content = b''.join(app_iter)
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+
+    return status, list(headers), content
+
+
+async def _send_start(send, status, headers):
+    """Sends status and headers of a response."""
+    await send({'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'),
+                             value.encode('latin-1'))
+                            for name, value in headers]})
+
+
+async def _send_error(send, status, message):
+    """Sends a plain-text error response."""
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')]})
+    await send({'type': 'http.response.body', 'body': message})
+
+
+def _env_int(name, default):
+    """Returns the whole number an environment variable is set to.
+
+    Args:
+        name (str): name of environment variable.
+        default (int): returned if variable is not set, or empty.
+
+    Raises:
+        ValueError: variable is not set to a whole number.
+
+    Returns:
+        value (int): number variable is set to.
+    """
+
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+
+    try:
+        return int(value)
+    except ValueError as err:
+        raise ValueError(f"ValueError in asgi: {name} must be a whole " +
+                         f"number, not {value!r}.") from err
+
+
+# Servers import this module, so the size of the pool and the depth of its
+# queue are set outside of it
+application = AsyncApp(app, _env_int('SENTENCECOW_ASGI_WORKERS', None),
+                       _env_int('SENTENCECOW_ASGI_QUEUE_DEPTH', QUEUE_DEPTH))
@@ -8,11 +8,14 @@ cases where 'textanalysis' parses a text incorrectly (read module
 documentation for more details).
 
 Two classes provide the functionality of this module: LeGuinSentence
-and LeGuinCounter. Both classes were not developed in isolation of
-the needs of the presentation layer of the greater app to which it belongs,
-but with them strongly in mind. While separation of concerns is mostly achieved
+and LeGuinCounter. For texts with many sentences, LeGuinSentenceTable stores
+the same metadata as a list of LeGuinSentence objects, column by column.
+
+LeGuinSentence and LeGuinCounter were not developed in isolation of the needs
+of the presentation layer of the greater app to which they belong, but with
+them strongly in mind. While separation of concerns is mostly achieved
 in these classes, there is some unwanted HTML UI accomodation in
-LeGuinCounter's sole private method. _whitespace_before. Any future
+LeGuinCounter's private method _whitespace_before. Any future
 improvements to this module should include shifting this code out of this class
 into the presentation layer.
 
@@ -27,6 +30,9 @@ Suggested improvements to be made:
 - Refactor generate_LGSentenceList to use attributes, not method arguments
 """
 
+from array import array
+from bisect import bisect_left
+
 import textanalysis as ta
 
 
@@ -44,6 +50,9 @@ class LeGuinSentence:
         whitespace (str): leadning whitespace before a sentence
     """
 
+    # No per-instance dict: there is one of these for every sentence
+    __slots__ = ('content', 'start', 'end', 'is_over', 'whitespace')
+
     def __init__(self, content="", start=0, end=0, is_over=False):
         """Inits LeGuinSentence class."""
         self.content = content
@@ -64,20 +73,155 @@ class LeGuinSentence:
                 '''
 
 
+class LeGuinSentenceTable:
+    """A class used to store metadata about all the sentences within a text.
+
+    Rather than one LeGuinSentence object per sentence, metadata is kept in
+    parallel arrays, one entry per sentence. Strings are not copied: content
+    and whitespace are sliced from the text when asked for. Indexing or
+    iterating over a table gives LeGuinSentenceView objects, which have the
+    same attributes as a LeGuinSentence.
+
+    Attributes:
+        text (str): original text.
+        clean (str): text from which sentences were parsed.
+        starts (array <int>): index where each sentence starts in text,
+                              after any leading whitespace.
+        ends (array <int>): index where each sentence ends in text.
+        is_over (array <int>): 1 if sentence is over word max, 0 if not.
+        ws_starts (array <int>): index where the whitespace before each
+                                 sentence starts in text.
+    """
+
+    __slots__ = ('text', 'clean', 'starts', 'ends', 'is_over', 'ws_starts')
+
+    def __init__(self, text, clean=None):
+        """Inits an empty LeGuinSentenceTable.
+
+        Args:
+            text (str): original text.
+            clean (str): text from which sentences were parsed; if None,
+                         text is cleaned.
+        """
+        self.text = text
+        self.clean = ta.clean_text(text) if clean is None else clean
+        self.starts = array('I')
+        self.ends = array('I')
+        self.is_over = array('B')
+        self.ws_starts = array('I')
+
+    def append(self, start, end, is_over, ws_start):
+        """Adds metadata about a sentence to the end of the table.
+
+        Args:
+            start (int): index where sentence starts in text.
+            end (int): index where sentence ends in text.
+            is_over (bool): whether sentence is over defined word max.
+            ws_start (int): index where whitespace before sentence starts.
+        """
+        self.starts.append(start)
+        self.ends.append(end)
+        self.is_over.append(is_over)
+        self.ws_starts.append(ws_start)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+
+        if i < 0 or i >= len(self):
+            raise IndexError("Index cannot be less than zero or larger " +
+                             "than table")
+
+        return LeGuinSentenceView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield LeGuinSentenceView(self, i)
+
+
+class LeGuinSentenceView:
+    """A read-only look at one sentence in a LeGuinSentenceTable.
+
+    Attributes are the same as those of a LeGuinSentence.
+    """
+
+    __slots__ = ('_table', '_i')
+
+    def __init__(self, table, i):
+        """Inits LeGuinSentenceView.
+
+        Args:
+            table (LeGuinSentenceTable): table holding the sentence.
+            i (int): position of sentence in table.
+        """
+        self._table = table
+        self._i = i
+
+    @property
+    def content(self):
+        """str: the content of the sentence, without surrounding whitespace."""
+        table = self._table
+
+        return table.clean[table.starts[self._i]:table.ends[self._i]].strip()
+
+    @property
+    def start(self):
+        """int: index where sentence starts in a text."""
+        return self._table.starts[self._i]
+
+    @property
+    def end(self):
+        """int: index where sentence ends in a text."""
+        return self._table.ends[self._i]
+
+    @property
+    def is_over(self):
+        """bool: whether sentence is over defined word max."""
+        return bool(self._table.is_over[self._i])
+
+    @property
+    def whitespace(self):
+        """str: leading whitespace before a sentence, as a LeGuinSentence
+        would have it after LeGuinCounter._whitespace_before.
+        """
+        table = self._table
+        whitespace = table.text[table.ws_starts[self._i]:table.starts[self._i]]
+
+        # See LeGuinCounter._whitespace_before
+        if '\n' in whitespace:
+            whitespace = '\n' + whitespace
+
+        return whitespace
+
+    __str__ = LeGuinSentence.__str__
+
+
 class LeGuinCounter:
     """A class that extracts, analyzes and modifies sentences in a text.
 
+    Sentences are not stored as strings of their own. Only where each one
+    starts and ends in the text is kept, as a flat array of offsets; strings
+    are sliced from the text when 'sentences' is read. Merges and splits
+    only ever remove or insert offsets.
+
     Attributes:
         text (str): original text
-        sentences (list <str>): list of sentences from parsed text. Note that
-                                sentences include any leading whitespace
-                                attached to them.
+        sentences (tuple <str>): sentences from parsed text, sliced from it
+                                 as given by 'spans'. Note that sentences
+                                 include any leading whitespace attached to
+                                 them.
+        spans (list <tuple>): start and end indices in text of each sentence
+                              in 'sentences'.
+        index (TextIndex): text cleaned once, for locating sentences in it.
     """
 
     def __init__(self, text):
         """Inits LeGuinCounter object.
 
-        Atrtibute 'sentences' initialized via parse method.
+        Atrtibutes 'sentences' and 'spans' initialized via parse method.
 
         Args:
             text (str): original text
@@ -92,26 +236,108 @@ class LeGuinCounter:
         Args:
             text (str): text to be parsed
         """
-        self.sentences = ta.get_sentences(text)
+        self._load(text, ta.get_sentence_spans(text))
+
+    @classmethod
+    def batch(cls, texts, workers=None):
+        """Returns a LeGuinCounter object for each text in a sequence of texts.
+
+        Texts are parsed in parallel by a pool of worker processes (see
+        textanalysis.get_sentences_batch); only the positions of their
+        sentences are sent back from the workers.
+
+        Args:
+            texts (sequence <str>): texts to be parsed
+            workers (int): number of worker processes; if None, one per CPU
+
+        Returns:
+            counters (list <LeGuinCounter>): one for each text, in order
+        """
+        texts = list(texts)
+        span_lists = ta.get_sentence_spans_batch(texts, workers)
+
+        return [cls.from_spans(text, spans)
+                for text, spans in zip(texts, span_lists)]
+
+    @classmethod
+    def from_spans(cls, text, spans):
+        """Returns a LeGuinCounter object for a text already parsed.
+
+        Args:
+            text (str): original text
+            spans (list <tuple>): start and end indices of each sentence in
+                                  text, e.g. as returned by
+                                  textanalysis.get_sentence_spans
+
+        Returns:
+            counter (LeGuinCounter): counter with those sentences
+        """
+        # Already parsed: no need to go through __init__
+        counter = cls.__new__(cls)
+        counter._load(text, spans)
+
+        return counter
+
+    @property
+    def sentences(self):
+        """tuple <str>: sentences from parsed text.
+
+        Not stored as such: each read slices every sentence from the text
+        anew, as given by 'spans', so a loop going over the sentences should
+        read this once into a local variable rather than index it each time.
+        A tuple, so that changing it in place fails rather than being lost;
+        merge, split or set the sentences instead.
+
+        Setting the list of sentences, e.g. to restore previous merges or
+        splits, locates each of them in text so that 'spans' stays in step.
+        Sentences must appear in the text in the order given, otherwise
+        NotInTextError is raised.
+        """
+        clean = self.index.clean
+        bounds = self._bounds
+
+        return tuple(clean[bounds[i]:bounds[i + 1]]
+                     for i in range(0, len(bounds), 2))
+
+    @sentences.setter
+    def sentences(self, sentlist):
+        self._store(self._locate(self.text, sentlist))
+
+    @property
+    def spans(self):
+        """list <tuple>: start and end indices in text of each sentence."""
+        bounds = self._bounds
+
+        return list(zip(bounds[0::2], bounds[1::2]))
 
 
     def count_words(self, sentence):
         """Counts the number of words in a sentence
 
+        A sentence may also be given by where it starts and ends in text, e.g.
+        an entry of 'spans' or any part of the text a user selected. Its words
+        are then counted with the word index of the text, without the
+        sentence being read again.
+
         Args:
-            sentence (str): string in which words are to be counted.
+            sentence (str or tuple): string in which words are to be counted,
+                                     or its (start, end) indices in text.
 
         Returns:
             (int): number of words in text,
         """
 
-        return len(ta.get_words(sentence))
+        if isinstance(sentence, tuple):
+            return self.index.count_words(*sentence)
+
+        return ta.count_words(sentence)
 
     def more_than(self, sentence, word_max=20):
         """Returns whether sentence has more than max words.
 
         Args:
-            sentence (str): sentence whose words are to be counted.
+            sentence (str or tuple): sentence whose words are to be counted,
+                                     or its (start, end) indices in text.
             word_max (int): max number of words allowed per sentence.
                             If no max, is specified the default is 20 words.
 
@@ -158,31 +384,194 @@ class LeGuinCounter:
 
         long_sentences = []
 
-        start_pos = 0 # Where to begin analysis of text
-
-        for sentence in self.sentences:
+        for sentence, (start, end) in zip(self.sentences, self.spans):
 
-            if self.more_than(sentence, word_max):
-
-                # Find where sentence starts and ends in a text
-                start, end = ta.find_start_end(sentence, self.text, start_pos)
+            if self.more_than((start, end), word_max):
 
                 item = {
                     'sentence':sentence,
                     'start': start,
                     'end': end,
-                    'wordcount': self.count_words(sentence)
+                    'wordcount': self.count_words((start, end))
                     }
 
                 long_sentences.append(item)
 
-                # Do not start searching for positions at beginning of text;
-                # Start from where the last sentence ended:
-                # what happens if you have same sentence more than once?!
+        return long_sentences
+
+    def analyze(self, word_max=20):
+        """Returns data about the sentences of this counter in a single pass.
 
-                start_pos = end + 1
+        Unlike textanalysis.analyze, sentences are not scanned for again, so
+        any merges or splits made are kept.
 
-        return long_sentences
+        Args:
+            word_max (int): max number of words allowed per sentence.
+
+        Raises:
+            ValueError: word_max is a non-positive integer (i.e. less than 1).
+
+        Returns:
+            analysis (map): see textanalysis.analyze.
+        """
+
+        return ta.analyze(self.text, word_max, self.spans, self.wordcounts)
+
+    def analyze_page(self, word_max, first, number):
+        """Returns data about a run of sentences of this counter only.
+
+        Only the sentences in the run are gone over, e.g. those shown on one
+        page of results, however many sentences there are; the totals of
+        word counts are still those of the whole text.
+
+        Args:
+            word_max (int): max number of words allowed per sentence.
+            first (int): index of first sentence in run.
+            number (int): most sentences in run.
+
+        Raises:
+            ValueError: word_max is a non-positive integer (i.e. less than 1).
+
+        Returns:
+            analysis (map): see textanalysis.analyze; 'sentences' has only
+                            the sentences in the run.
+        """
+
+        if word_max < 1:
+            raise ValueError("Max must be a number >= 1.")
+
+        clean = self.index.clean
+        bounds = self._bounds
+        wordcounts = self.wordcounts
+
+        first = max(first, 0)
+        last = min(first + number, len(wordcounts))
+
+        sentences = []
+
+        # Index where the previous sentence ended
+        prev_end = bounds[2*first - 1] if 0 < first <= len(wordcounts) else 0
+
+        for i in range(first, last):
+            start, end = bounds[2*i], bounds[2*i + 1]
+            sentence = clean[start:end]
+
+            # Sentences include whitespace characters; skip them
+            start = end - len(sentence.lstrip())
+
+            sentences.append({
+                'sentence': sentence,
+                'start': start,
+                'end': end,
+                'wordcount': wordcounts[i],
+                'is_over': wordcounts[i] > word_max,
+                'whitespace': self.text[prev_end:start]
+                })
+
+            prev_end = end
+
+        analysis = {
+            'sentences': sentences,
+            'wordcounts': {
+                'original': ta.count_words(self.text),
+                'parsed': sum(wordcounts)
+                },
+            'over': sum(wordcount > word_max for wordcount in wordcounts)
+            }
+
+        return analysis
+
+    @property
+    def wordcounts(self):
+        """array <int>: number of words in each sentence.
+
+        Words are counted the first time this is read, with the word index
+        of the text; counts are then kept in step with any merges, splits or
+        edits, so that they never have to be counted all over again.
+        """
+        if self._wordcounts is None:
+            self._wordcounts = self._count(0, len(self._bounds) // 2)
+
+        return self._wordcounts
+
+    def flag_over(self, word_max=20):
+        """Returns whether each sentence has more than a given number of words.
+
+        Only the word counts of sentences are compared against word_max: the
+        text is neither scanned nor are its words counted again, e.g. after
+        word_max is changed.
+
+        Args:
+            word_max (int): max number of words allowed per sentence.
+
+        Raises:
+            ValueError: word_max is a non-positive integer (i.e. less than 1).
+
+        Returns:
+            flags (list <bool>): True for each sentence over word_max; False
+                                 for the others.
+        """
+
+        if word_max < 1:
+            raise ValueError("Max must be a number >= 1.")
+
+        return [wordcount > word_max for wordcount in self.wordcounts]
+
+    @property
+    def tokens(self):
+        """array <int>: start and end indices in text of each word, in pairs.
+
+        Words are found as 'textanalysis.get_words' finds them (see
+        TextIndex.word_bounds). They are found the first time this is read,
+        then kept with the text until it is parsed again or edited.
+        """
+        return self.index.word_bounds
+
+    def word_spans(self, i):
+        """Returns where each word of a sentence starts and ends.
+
+        Args:
+            i (int): index of sentence in list of sentences.
+
+        Raises:
+            IndexError: i is out of range.
+
+        Returns:
+            spans (list <tuple>): start and end indices in text of each word
+                                  in sentence, e.g. to highlight them.
+        """
+
+        start, end = self._span(i)
+
+        return self.index.word_spans(start, end)
+
+    def clip(self, i, word_max=20):
+        """Returns a sentence cut short after a given number of words.
+
+        Args:
+            i (int): index of sentence in list of sentences.
+            word_max (int): number of words kept.
+
+        Raises:
+            IndexError: i is out of range.
+            ValueError: word_max is a non-positive integer (i.e. less than 1).
+
+        Returns:
+            sentence (str): sentence up to the end of its word_max-th word,
+                            leading whitespace included; the whole sentence
+                            if it has no more than word_max words.
+        """
+
+        if word_max < 1:
+            raise ValueError("Max must be a number >= 1.")
+
+        start, end = self._span(i)
+        words = self.index.word_spans(start, end)
+
+        if len(words) > word_max:
+            end = words[word_max - 1][1]
+
+        return self.index.clean[start:end]
 
     def merge_next(self, index):
         """Modifies list of sentences such that sentence referenced at index is
@@ -199,26 +588,28 @@ class LeGuinCounter:
                         sentences in the sentence list.
         """
 
+        count = len(self._bounds) // 2
+
         # No sentences to merge: do nothing.
-        if len(self.sentences) == 0:
+        if count == 0:
             raise ValueError("Merge cannot be performed on an empty " +
                              "sentence list.")
 
         # Index out of bounds
-        if index < 0 or index >= len(self.sentences):
+        if index < 0 or index >= count:
             raise IndexError("Index cannot be less than zero or larger " +
                              "than list")
 
         # Can't merge the last sentence with anything, so don't do anything.
-        if index != len(self.sentences) - 1:
+        if index != count - 1:
 
-            # Merge sentences
-            curr = self.sentences[index]
-            next_sentence = self.sentences[index + 1]
-            self.sentences[index] = curr + next_sentence
+            # Merged sentence runs from start of the current sentence to the
+            # end of the next: drop the offsets between them
+            del self._bounds[2*index + 1:2*index + 3]
 
-            # No need for that second sentence anymore
-            self.sentences.pop(index + 1)
+            # A word may have been split between the two sentences
+            if self._wordcounts is not None:
+                self._wordcounts[index:index + 2] = self._count(index, 1)
 
     def split_sentence(self, i, sub):
         """Cuts a sentence at end where substring sub ends; adds new sentence
@@ -235,13 +626,15 @@ class LeGuinCounter:
                         sentences in the sentence list.
         """
 
+        count = len(self._bounds) // 2
+
         # No sentences to split; shouldn't be splitting here
-        if len(self.sentences) == 0:
+        if count == 0:
             raise ValueError("Split cannot be performed on an empty " +
                              "sentence list.")
 
         # Index out of bounds
-        if i < 0 or i >= len(self.sentences):
+        if i < 0 or i >= count:
             raise IndexError("Index cannot be less than zero or larger " +
                              "than list")
 
@@ -250,7 +643,8 @@ class LeGuinCounter:
         if len(sub.strip()) == 0:
             return
 
-        sentence = self.sentences[i]
+        start, stop = self._bounds[2*i], self._bounds[2*i + 1]
+        sentence = self.index.clean[start:stop]
 
         # Because of newline characters given as CRLF in HTML/Windows and LF in
         # UNIX and JS normalizes CRLF to LF (I think), finding the substring i
@@ -258,18 +652,129 @@ class LeGuinCounter:
         # space in your text. Easiest just to find non-white space characters
         sub = sub.strip()
 
-        # Get first and second parts of sentence
+        # First part ends where sub ends
         __, end = ta.find_start_end(sub, sentence)
-        first_part = sentence[0:end]
-        second_part = sentence[end:]
+
+        self.split_at(i, end)
+
+    def split_at(self, i, char_offset):
+        """Cuts a sentence in two at a given position; adds new sentence to
+        sentence list.
+
+        Unlike 'split_sentence', the sentence is not searched: the position
+        is simply added to the start and end indices of sentences.
+
+        Args:
+            i (int): index of sentence in sentence list to be split.
+            char_offset (int): index in sentences[i] where first part ends and
+                               second part starts.
+
+        Raises:
+            ValueError: trying to split a sentence when sentence list is empty.
+
+            IndexError: index is less than zero or greater the number of
+                        sentences in the sentence list; char_offset is less
+                        than zero or greater than length of sentence.
+        """
+
+        count = len(self._bounds) // 2
+
+        # No sentences to split; shouldn't be splitting here
+        if count == 0:
+            raise ValueError("Split cannot be performed on an empty " +
+                             "sentence list.")
+
+        start, stop = self._span(i)
+
+        # Split position out of bounds
+        if char_offset < 0 or char_offset > stop - start:
+            raise IndexError("Split position cannot be less than zero or " +
+                             "larger than sentence")
+
+        first_part = self.index.clean[start:start + char_offset]
+        second_part = self.index.clean[start + char_offset:stop]
 
         # No point in modifying sentence list if one of the parts is empty.
         first_ok = bool(len(first_part.strip()))
         second_ok = bool(len(second_part.strip()))
 
         if first_ok and second_ok:
-            self.sentences[i] = first_part
-            self.sentences.insert(i+1, second_part)
+            # First part ends, and second part starts, at char_offset
+            self._bounds[2*i + 1:2*i + 1] = array('I',
+                                                  (start + char_offset,) * 2)
+
+            if self._wordcounts is not None:
+                self._wordcounts[i:i + 1] = self._count(i, 2)
+
+    def apply_edit(self, start, end, replacement):
+        """Replaces part of the text and finds the sentences around it again.
+
+        Scanning starts one sentence before the edit and stops at the first
+        sentence end, past the edit, where one of the sentences already there
+        starts: from there on the text has not changed, so neither have its
+        sentences. Those sentences, along with any merges or splits made to
+        them, are kept and just moved by the change in length of the text;
+        merges or splits of the sentences scanned again are undone.
+        Time spent scanning thus depends on the size of the edit, not on that
+        of the text.
+
+        Args:
+            start (int): index in text where the part to be replaced starts.
+            end (int): index in text where the part to be replaced ends.
+            replacement (str): text put in place of text[start:end].
+
+        Raises:
+            IndexError: start or end is less than zero or larger than the
+                        text, or start is after end.
+        """
+
+        if not 0 <= start <= end <= len(self.text):
+            raise IndexError("Edit cannot start before zero, end after " +
+                             "text, or start after its end")
+
+        bounds = self._bounds
+        count = len(bounds) // 2
+
+        # One sentence before the first that ends at or after start: where
+        # that one ends could depend on what follows it
+        first = max(bisect_left(bounds, start) // 2 - 1, 0)
+
+        # First sentence starting at or after end, whose text is untouched
+        kept = (bisect_left(bounds, end) + 1) // 2
+
+        self.index.replace(start, end, replacement)
+        self.text = self.index.text
+
+        shift = len(replacement) - (end - start)
+
+        spans = []
+
+        for span in self.index.scan(bounds[2*first] if first else None):
+            spans.append(span)
+
+            # Skip sentences already there that the new one runs over
+            while kept < count and bounds[2*kept] + shift < span[1]:
+                kept += 1
+
+            # Back in step with the sentences already there
+            if kept < count and bounds[2*kept] + shift == span[1]:
+                break
+        else:
+            # Scanned to the end of the text: nothing left to keep
+            kept = count
+
+        # Sentences after the scanned ones only move
+        after = bounds[2*kept:]
+        if shift:
+            after = array('I', map(shift.__add__, after))
+
+        del bounds[2*first:]
+        bounds.extend(pos for span in spans for pos in span)
+        bounds.extend(after)
+
+        # Only the sentences scanned again need their words counted
+        if self._wordcounts is not None:
+            self._wordcounts[first:kept] = self._count(first, len(spans))
 
     def generate_LGSentenceList(self, text, sentlist, word_max):
         """Converts list of string sentences into a list of LeGuinSentence
@@ -285,42 +790,141 @@ class LeGuinCounter:
                                              [] returned if sentlist empty.
         """
 
+        lg_sentlist = []
+
+        for view in self.generate_LGSentenceTable(text, sentlist, word_max):
+            # Unlike class attribute, only non whitespace contents written to
+            # a LeGuinSentence object
+            lg_sent = LeGuinSentence(view.content, start=view.start,
+                                     end=view.end, is_over=view.is_over)
+            lg_sentlist.append(lg_sent)
+
+        # Copy whitespace characters before each sentence
+        lg_sentlist = self._whitespace_before(lg_sentlist, text)
+
+        return lg_sentlist
+
+    def generate_LGSentenceTable(self, text, sentlist, word_max):
+        """Converts list of string sentences into a LeGuinSentenceTable.
+
+        Same as generate_LGSentenceList, but without an object per sentence.
+
+        Args:
+            text (str): text from sentences originally parsed.
+            sentlist (list <str>): list of sentences parsed from text
+            word_max (int): Max number of words per sentence
+
+        Returns:
+            table (LeGuinSentenceTable): metadata about each sentence. Empty
+                                         if sentlist empty.
+        """
+
+        # This counter's own text has already been cleaned
+        if text == self.text:
+            table = LeGuinSentenceTable(text, self.index.clean)
+        else:
+            table = LeGuinSentenceTable(text)
+
         # Empty list of sentences given as argument
         if not sentlist:
-            return []
+            return table
 
-        lg_sentlist = []
+        # Positions of this counter's own sentences are already known
+        if text == self.text and tuple(sentlist) == self.sentences:
+            spans = self.spans
+        else:
+            spans = self._locate(text, sentlist)
 
-        # Start scan at first non whitespace char
-        start_pos = ta.offset(text)
+        # Gather data about each sentence
+        analysis = ta.analyze(text, word_max, spans)
 
-        for sent in sentlist:
-            # Gather data about each sentence
+        for item in analysis['sentences']:
+            # Start already skips the whitespace before a sentence
+            table.append(item['start'], item['end'], item['is_over'],
+                         item['start'] - len(item['whitespace']))
 
-            # Find where sentence starts and ends in text
-            start, end = ta.find_start_end(sent, text, start_pos)
+        return table
 
-            # Sentences in sentlist include whitespace characters.
-            # Modify start such that you get first position of non-whitespace
-            # character
-            start += ta.offset(sent)
+    def _load(self, text, spans):
+        """Store a text along with the sentences found at the given spans.
 
-            is_over = self.more_than(sent, word_max)
+        Args:
+            text (str): original text
+            spans (list <tuple>): start and end indices of each sentence in
+                                  text, as returned by get_sentence_spans
+        """
+        # The scanner already knows where each sentence is; keep that so
+        # sentences never have to be searched for in the text again
+        self.index = ta.TextIndex(text)
+        self.text = text
+        self._store(spans)
 
-            # Unlike class attribute, only non whitespace contents written to
-            # a LeGuinSentence object
-            sent = sent.strip()
+    def _store(self, spans):
+        """Keep the start and end indices of each sentence as flat offsets.
 
-            lg_sent = LeGuinSentence(sent, start=start, end=end, is_over=is_over)
-            lg_sentlist.append(lg_sent)
+        Args:
+            spans (list <tuple>): start and end indices of each sentence in
+                                  text.
+        """
+        self._bounds = array('I', (pos for span in spans for pos in span))
 
-            # Continue text analysis at end of just-processed sentence
-            start_pos = end
+        # Counted when first needed
+        self._wordcounts = None
 
-        # Copy whitespace characters before each sentence
-        lg_sentlist = self._whitespace_before(lg_sentlist, text)
+    def _count(self, first, number):
+        """Returns number of words in each of a run of sentences.
 
-        return lg_sentlist
+        Args:
+            first (int): index of first sentence in run.
+            number (int): number of sentences in run.
+
+        Returns:
+            wordcounts (array <int>): number of words in each sentence.
+        """
+        count_words = self.index.count_words
+        bounds = self._bounds[2*first:2*(first + number)]
+
+        return array('I', (count_words(bounds[k], bounds[k + 1])
+                           for k in range(0, len(bounds), 2)))
+
+    def _span(self, i):
+        """Returns start and end indices in text of sentence i.
+
+        Raises:
+            IndexError: i is less than zero or not less than number of
+                        sentences.
+        """
+        if i < 0 or 2*i >= len(self._bounds):
+            raise IndexError("Index cannot be less than zero or larger " +
+                             "than list")
+
+        return self._bounds[2*i], self._bounds[2*i + 1]
+
+    def _locate(self, text, sentlist):
+        """Returns start and end indices of each sentence in a text.
+
+        Sentences are searched for in order, each search starting where the
+        previous sentence ended.
+
+        Args:
+            text (str): text from which sentences were originally parsed.
+            sentlist (list <str>): list of sentences parsed from text.
+
+        Raises:
+            NotInTextError: a sentence could not be found in text.
+
+        Returns:
+            spans (list <tuple>): (start, end) indices of each sentence.
+        """
+
+        # The text stored here has already been cleaned once; don't clean it
+        # again for every sentence
+        if text == self.text:
+            index = self.index
+        else:
+            index = ta.TextIndex(text)
+
+        return index.locate(sentlist)
 
     def _whitespace_before(self, lg_sentlist, text):
         """Returns list of LeGuinSentences such that any whitespace characters
@@ -0,0 +1,179 @@
+"""Module that packs where the sentences of a text are into a short token.
+
+Without the document store, every Merge or Split request has to carry the
+sentences of a text back to the server, merges and splits included. Sending
+each sentence as a string more than doubles the size of the page and of every
+request, and the server then has to search the text for each of them. A state
+token holds only where each sentence starts and ends:
+
+    * offsets are stored as the difference from the previous one, each as a
+      varint, i.e. in as few bytes as it takes, seven bits to a byte;
+    * the varints are compressed with zlib, if that makes them any shorter;
+    * the whole is signed with an HMAC over a digest of the text, so that the
+      token is only good for the text it was made for, and can't be forged;
+    * the result is encoded in URL-safe base64, to be put in a form.
+
+The server gets the sentences back from the text and the token alone.
+"""
+
+import base64
+import hashlib
+import hmac
+import zlib
+
+
+# First byte of every token; changes with the layout of tokens
+VERSION = 1
+
+# Bytes of the HMAC kept in a token
+MAC_SIZE = 16
+
+# How the offsets are stored
+_RAW = 0
+_ZLIB = 1
+
+
+class InvalidTokenError(ValueError):
+    """Raised when a token is malformed, was not made for a text, or was
+    signed with another key."""
+
+
+def encode(text, spans, key):
+    """Returns a token holding the start and end indices of sentences.
+
+    Args:
+        text (str): text the sentences are in.
+        spans (list <tuple>): start and end indices of each sentence in
+                              text, in order.
+        key (bytes): secret key tokens are signed with.
+
+    Raises:
+        ValueError: spans are out of order or outside text.
+
+    Returns:
+        token (str): URL-safe token, only good for text.
+    """
+
+    payload = bytearray()
+    _put_varint(payload, 2 * len(spans))
+
+    # Offsets never go back: store how far each is from the previous one
+    prev = 0
+    for span in spans:
+        for offset in span:
+            if offset < prev or offset > len(text):
+                raise ValueError("ValueError in statetoken.encode: spans out " +
+                                 "of order or outside text.")
+
+            _put_varint(payload, offset - prev)
+            prev = offset
+
+    # Small payloads only grow when compressed
+    compressed = zlib.compress(payload, 9)
+    if len(compressed) < len(payload):
+        body = bytes([_ZLIB]) + compressed
+    else:
+        body = bytes([_RAW]) + payload
+
+    header = bytes([VERSION])
+    token = header + _mac(key, text, header + body) + body
+
+    return base64.urlsafe_b64encode(token).rstrip(b'=').decode('ascii')
+
+
+def decode(token, text, key):
+    """Returns the start and end indices of sentences held by a token.
+
+    Args:
+        token (str): token returned by 'encode'.
+        text (str): text the token was made for.
+        key (bytes): secret key the token was signed with.
+
+    Raises:
+        InvalidTokenError: token is malformed, was made for another text or
+                           signed with another key.
+
+    Returns:
+        spans (list <tuple>): start and end indices of each sentence in text.
+    """
+
+    try:
+        token = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (ValueError, TypeError) as err:
+        raise InvalidTokenError("InvalidTokenError in statetoken.decode: " +
+                                "token not in base64.") from err
+
+    header, mac, body = (token[:1], token[1:1 + MAC_SIZE],
+                         token[1 + MAC_SIZE:])
+
+    if header != bytes([VERSION]) or not body:
+        raise InvalidTokenError("InvalidTokenError in statetoken.decode: " +
+                                "unknown token version.")
+
+    # Checked before anything else is read from the token
+    if not hmac.compare_digest(mac, _mac(key, text, header + body)):
+        raise InvalidTokenError("InvalidTokenError in statetoken.decode: " +
+                                "token not made for this text.")
+
+    payload = body[1:]
+    if body[0] == _ZLIB:
+        payload = zlib.decompress(payload)
+
+    count, pos = _get_varint(payload, 0)
+
+    bounds = []
+    offset = 0
+    for __ in range(count):
+        delta, pos = _get_varint(payload, pos)
+        offset += delta
+        bounds.append(offset)
+
+    # Only signed tokens get here, so these would be bugs rather than forgery
+    if count % 2 or pos != len(payload) or offset > len(text):
+        raise InvalidTokenError("InvalidTokenError in statetoken.decode: " +
+                                "offsets outside text.")
+
+    return list(zip(bounds[0::2], bounds[1::2]))
+
+
+def _mac(key, text, data):
+    """Returns HMAC of data and a digest of text, cut to MAC_SIZE bytes."""
+
+    digest = hashlib.sha256(text.encode('utf-8', 'surrogatepass')).digest()
+
+    return hmac.new(key, digest + data, hashlib.sha256).digest()[:MAC_SIZE]
+
+
+def _put_varint(buffer, number):
+    """Appends number to buffer, seven bits to a byte, lowest bits first."""
+
+    while number >= 0x80:
+        buffer.append(number & 0x7F | 0x80)
+        number >>= 7
+
+    buffer.append(number)
+
+
+def _get_varint(buffer, pos):
+    """Returns number stored in buffer at pos, and position after it.
+
+    Raises:
+        InvalidTokenError: buffer ends in the middle of the number.
+    """
+
+    number = 0
+    shift = 0
+
+    while True:
+        if pos >= len(buffer):
+            raise InvalidTokenError("InvalidTokenError in " +
+                                    "statetoken.decode: token cut short.")
+
+        byte = buffer[pos]
+        pos += 1
+
+        number |= (byte & 0x7F) << shift
+        shift += 7
+
+        if byte < 0x80:
+            return number, pos
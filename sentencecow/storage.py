@@ -0,0 +1,389 @@
+"""Module that keeps parsed documents and parsing results on the server.
+
+Without it, every Merge or Split request re-sends the original text along with
+its list of sentences, and the text is parsed all over again only to have its
+sentences replaced by the ones sent. A DocumentStore instead holds on to the
+LeGuinCounter object of each document counted, under an id that is the only
+thing the client needs to send back.
+
+Memory is bounded: documents not used for a while expire, and once the store
+holds too many documents or too many characters, the ones used least recently
+are dropped first. A client holding the id of a dropped document has to start
+again from the main page.
+
+Requests about the same document may come in at once, e.g. when a form is
+submitted twice. Each document has a lock, to be held while it is read or
+changed, and a version, to be moved on each time it is changed: a request
+made from a page showing an older version can then be turned away rather than
+applied to sentences that have since moved.
+
+A ParseCache keeps the results of parsing texts instead: where each sentence
+is and how many words it has. Since the same texts are often submitted over
+and over, they need only be parsed once. Results are looked up by a digest of
+the text, so no id needs to be handed out.
+"""
+
+import hashlib
+import secrets
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+import textanalysis as ta
+
+
+# Default limits of a DocumentStore
+MAX_DOCUMENTS = 1000
+MAX_CHARS = 10_000_000
+TTL = 30 * 60
+
+# Default limit of a ParseCache
+MAX_CACHE_BYTES = 64 * 2**20
+
+
+class DocumentStore:
+    """A class that holds parsed documents, evicting the least recently used.
+
+    The store is safe to share between threads: a lock guards its contents.
+    The documents themselves are guarded by a lock of their own (see
+    'lock'), which callers hold while they read or modify them.
+
+    Attributes:
+        max_documents (int): most documents held at once.
+        max_chars (int): most characters, over the text of every document,
+                         held at once.
+        ttl (float): seconds a document is kept after it was last used.
+    """
+
+    def __init__(self, max_documents=MAX_DOCUMENTS, max_chars=MAX_CHARS,
+                 ttl=TTL, clock=time.monotonic):
+        """Inits an empty DocumentStore.
+
+        Args:
+            max_documents (int): most documents held at once.
+            max_chars (int): most characters held at once.
+            ttl (float): seconds a document is kept after it was last used.
+            clock (function): returns the current time in seconds.
+
+        Raises:
+            ValueError: a limit is less than one.
+        """
+
+        if max_documents < 1 or max_chars < 1 or ttl <= 0:
+            raise ValueError("ValueError in storage.DocumentStore: limits " +
+                             "must be greater than zero.")
+
+        self.max_documents = max_documents
+        self.max_chars = max_chars
+        self.ttl = ttl
+
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # id -> _Entry of document; least recently used first
+        self._documents = OrderedDict()
+        self._chars = 0
+
+    def add(self, document):
+        """Stores a document under a new id.
+
+        A document larger than max_chars is not stored at all.
+
+        Args:
+            document (LeGuinCounter): parsed document; its 'text' attribute
+                                      gives its size.
+
+        Returns:
+            doc_id (str): id under which document can be retrieved; None if
+                          document is too large to store.
+        """
+
+        size = len(document.text)
+
+        if size > self.max_chars:
+            return None
+
+        # Unguessable, so that one user can't fetch another user's document
+        doc_id = secrets.token_urlsafe(16)
+
+        with self._lock:
+            self._documents[doc_id] = _Entry(document, size, self._clock())
+            self._chars += size
+            self._evict()
+
+        return doc_id
+
+    def get(self, doc_id):
+        """Returns the document stored under an id, marking it as used.
+
+        Args:
+            doc_id (str): id returned when document was added.
+
+        Returns:
+            document (LeGuinCounter): the document; None if no document is
+                                      stored under doc_id, or it expired.
+        """
+
+        with self._lock:
+            self._evict()
+
+            if doc_id not in self._documents:
+                return None
+
+            entry = self._documents[doc_id]
+            entry.used = self._clock()
+            self._documents.move_to_end(doc_id)
+
+        return entry.document
+
+    def lock(self, doc_id):
+        """Returns the lock of the document stored under an id.
+
+        The lock is to be held while the document is read or changed, so that
+        two requests about it are not carried out at once.
+
+        Args:
+            doc_id (str): id returned when document was added.
+
+        Returns:
+            lock (threading.Lock): lock of document; None if no document is
+                                   stored under doc_id, or it expired.
+        """
+
+        with self._lock:
+            self._evict()
+
+            if doc_id not in self._documents:
+                return None
+
+            return self._documents[doc_id].lock
+
+    def version(self, doc_id):
+        """Returns the number of times the document stored under an id was
+        changed.
+
+        Args:
+            doc_id (str): id returned when document was added.
+
+        Returns:
+            version (int): 0 for a document as added; None if no document is
+                           stored under doc_id.
+        """
+
+        with self._lock:
+            entry = self._documents.get(doc_id)
+
+            return None if entry is None else entry.version
+
+    def changed(self, doc_id):
+        """Moves on the version of the document stored under an id.
+
+        Args:
+            doc_id (str): id returned when document was added.
+
+        Returns:
+            version (int): new version of document; None if no document is
+                           stored under doc_id.
+        """
+
+        with self._lock:
+            entry = self._documents.get(doc_id)
+            if entry is None:
+                return None
+
+            entry.version += 1
+
+            return entry.version
+
+    def discard(self, doc_id):
+        """Removes the document stored under an id, if any.
+
+        Args:
+            doc_id (str): id returned when document was added.
+        """
+
+        with self._lock:
+            if doc_id in self._documents:
+                self._chars -= self._documents.pop(doc_id).size
+
+    def __len__(self):
+        with self._lock:
+            self._evict()
+            return len(self._documents)
+
+    def __contains__(self, doc_id):
+        with self._lock:
+            self._evict()
+            return doc_id in self._documents
+
+    def _evict(self):
+        """Drops expired documents, then least recently used ones until the
+        store is within its limits. Lock must be held.
+        """
+
+        expired = self._clock() - self.ttl
+
+        # Least recently used first: stop at the first document still fresh
+        while self._documents:
+            doc_id, entry = next(iter(self._documents.items()))
+
+            if (entry.used > expired and
+                    len(self._documents) <= self.max_documents and
+                    self._chars <= self.max_chars):
+                break
+
+            del self._documents[doc_id]
+            self._chars -= entry.size
+
+
+class _Entry:
+    """A document held by a DocumentStore, along with what the store keeps
+    about it.
+
+    Attributes:
+        document (LeGuinCounter): parsed document.
+        size (int): number of characters of its text.
+        used (float): time it was last used.
+        lock (threading.Lock): held while document is read or changed.
+        version (int): number of times document was changed.
+    """
+
+    __slots__ = ('document', 'size', 'used', 'lock', 'version')
+
+    def __init__(self, document, size, used):
+        self.document = document
+        self.size = size
+        self.used = used
+        self.lock = threading.Lock()
+        self.version = 0
+
+
+class ParseCache:
+    """A class that holds the results of parsing texts, evicting the least
+    recently used.
+
+    Results are kept under a digest of the cleaned text and the version of
+    the abbreviations it was parsed with, so that texts differing only in
+    their kind of double quotes share results, and results from before a
+    change to the abbreviations are never used. Like a DocumentStore, the
+    cache is safe to share between threads.
+
+    Attributes:
+        max_bytes (int): most bytes, over all results, held at once.
+        hits (int): number of lookups that found results.
+        misses (int): number of lookups that found none.
+        evictions (int): number of results dropped to stay within max_bytes.
+    """
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        """Inits an empty ParseCache.
+
+        Args:
+            max_bytes (int): most bytes held at once.
+
+        Raises:
+            ValueError: max_bytes is less than one.
+        """
+
+        if max_bytes < 1:
+            raise ValueError("ValueError in storage.ParseCache: limit must " +
+                             "be greater than zero.")
+
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+
+        # key -> (spans, wordcounts, size); least recently used first
+        self._results = OrderedDict()
+        self._bytes = 0
+
+    def get(self, text):
+        """Returns the results of parsing a text, if kept.
+
+        Args:
+            text (str): original text.
+
+        Returns:
+            spans (list <tuple>): start and end indices of each sentence.
+            wordcounts (list <int>): number of words in each sentence.
+            None is returned instead if no results are kept for text.
+        """
+
+        key = self._key(text)
+
+        with self._lock:
+            if key not in self._results:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._results.move_to_end(key)
+            bounds, counts, __ = self._results[key]
+
+        return list(zip(bounds[0::2], bounds[1::2])), counts.tolist()
+
+    def put(self, text, spans, wordcounts):
+        """Keeps the results of parsing a text.
+
+        Results larger than max_bytes are not kept at all.
+
+        Args:
+            text (str): original text.
+            spans (list <tuple>): start and end indices of each sentence, as
+                                  returned by textanalysis.get_sentence_spans.
+            wordcounts (list <int>): number of words in each sentence.
+        """
+
+        key = self._key(text)
+
+        # Flat arrays of numbers take far less room than lists of tuples
+        bounds = array('I', (pos for span in spans for pos in span))
+        counts = array('I', wordcounts)
+        size = sys.getsizeof(key) + sys.getsizeof(bounds) + \
+            sys.getsizeof(counts)
+
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._results:
+                self._bytes -= self._results.pop(key)[2]
+
+            self._results[key] = (bounds, counts, size)
+            self._bytes += size
+
+            # Least recently used first
+            while self._bytes > self.max_bytes:
+                __, (__, __, dropped) = self._results.popitem(last=False)
+                self._bytes -= dropped
+                self.evictions += 1
+
+    def stats(self):
+        """Returns how well the cache is doing.
+
+        Returns:
+            stats (map): counts of 'hits', 'misses' and 'evictions', along with
+                         number of 'entries' and 'bytes' held.
+        """
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._results), 'bytes': self._bytes}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
+
+    def _key(self, text):
+        """Returns digest of cleaned text and abbreviations version."""
+
+        digest = hashlib.sha256(ta.ABBREVIATIONS_VERSION.encode('ascii'))
+        digest.update(ta.clean_text(text).encode('utf-8', 'surrogatepass'))
+
+        return digest.digest()
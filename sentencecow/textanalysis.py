@@ -106,11 +106,18 @@ https://github.com/dunnesquared/abbrevscrape.
 """
 
 
-import os   # getcwd, path.join, path.dirname, path.realpath
+import os   # getcwd, path.join, path.dirname, path.realpath, getsize
 import sys # getsizeof, exit, stderr
 import re   # sub
 import textwrap  # dedent
 import string # punctuation
+import collections # namedtuple
+import mmap # mmap, ACCESS_READ
+import concurrent.futures # ProcessPoolExecutor
+import hashlib # sha256
+import itertools # accumulate
+import array # array
+import bisect # bisect_right
 
 
 #==============================SETTING MAX SIZE================================
@@ -123,6 +130,15 @@ MAX_TEXTSIZE = 100 * 1024 * 1024 # 100 MB
 if MAX_TEXTSIZE < 0:
     raise ValueError("MAX_TEXTSIZE set to value less than zero.")
 
+# Number of characters read at a time from a file by 'iter_sentences'.
+# Files streamed that way are not subject to MAX_TEXTSIZE.
+CHUNK_SIZE = 64 * 1024 # 64 K characters
+
+# Number of chunks of about the same total length that texts are split into for
+# each worker process by the batch functions. More chunks than workers keep
+# every worker busy even when some chunks take longer than others.
+CHUNKS_PER_WORKER = 4
+
 #==============================REGEX GLOBALS===================================
 
 # Unicode general punctuation encodes several punctuation marks that can
@@ -166,10 +182,15 @@ DQUOTES = (H_DQUOTE + LBIG_DQUOTE + RBIG_DQUOTE + FW_DQUOTE + LPRIME_DQUOTE
            + RPRIME_DQUOTE)
 SQUOTES = H_SQUOTE + L_SQUOTE + R_SQUOTE + LH_SQUOTE + RH_SQUOTE
 
+# Terminating punctuation marks, without the whitespace that must follow them
+_MARK_PERIOD = r'[\.' + LEADERS + r']'
+_MARK_QEXMARK = r'[\?!' + QEX  +  r']'
+_MARK_QUOTE = r'[\.\?!—' + LEADERS + QEX  + r']"'
+
 # End-of-sentence patterns to help determine the end of a sentence
-REGEX_PERIOD = r'[\.' + LEADERS + r']\s'
-REGEX_QEXMARK = r'[\?!' + QEX  +  r']\s'
-REGEX_QUOTE = r'[\.\?!—' + LEADERS + QEX  + r']"\s'
+REGEX_PERIOD = _MARK_PERIOD + r'\s'
+REGEX_QEXMARK = _MARK_QEXMARK + r'\s'
+REGEX_QUOTE = _MARK_QUOTE + r'\s'
 
 # These will be replaced by a simpler, straight single/double quotes: ' / "
 REGEX_DQUOTE = r'[\“\”' + DQUOTES  +  ']'
@@ -178,6 +199,53 @@ REGEX_DQUOTE = r'[\“\”' + DQUOTES  +  ']'
 REGEX_ALLSYMOBLS = (r'[' + string.punctuation + LEADERS + QEX + DQUOTES
                     + SQUOTES +']')
 
+# Every whitespace character, i.e. those for which str.isspace is True. All of
+# them lie in the Basic Multilingual Plane.
+_WHITESPACE = ''.join(chr(c) for c in range(0x10000) if chr(c).isspace())
+
+# Symbols removed from words, and the en and em dashes that separate them
+_SYMBOLS = string.punctuation + LEADERS + QEX + DQUOTES + SQUOTES
+_DASHES = '–—'
+
+# Words are found in the UTF-8 encoding of a text, where a translation table
+# deals with every ASCII character in a single pass. Non-ASCII symbols, dashes
+# and whitespace are dealt with beforehand, and only in non-ASCII texts.
+_NONASCII_SYMBOLS = re.compile(
+    '[' + re.escape(''.join(c for c in _SYMBOLS if not c.isascii())) + ']')
+_NONASCII_SPACES = re.compile(
+    '[' + _DASHES + ''.join(c for c in _WHITESPACE if not c.isascii()) + ']')
+_ASCII_SYMBOLS = ''.join(c for c in _SYMBOLS if c.isascii()).encode('ascii')
+
+# Whitespace characters that bytes.split doesn't split on become spaces
+_SPLIT_TABLE = bytes.maketrans(b'\x1c\x1d\x1e\x1f', b'    ')
+
+# ASCII whitespace characters become spaces, any other byte a 'w': each word
+# then starts where a 'w' follows a space
+_COUNT_TABLE = bytes(ord(' ') if c < 128 and chr(c).isspace() else ord('w')
+                     for c in range(256))
+
+# To index words, each character of a text is classed, one byte per character,
+# as part of a word ('w'), a separator ('s') or a symbol removed from words
+# ('d'). Non-ASCII characters are first swapped for ASCII ones of their class.
+_NONASCII = re.compile('[^\x00-\x7f]')
+_CLASS_TABLE = bytes(ord('s') if c < 128 and chr(c).isspace() else
+                     ord('d') if c in _ASCII_SYMBOLS else ord('w')
+                     for c in range(256))
+
+# Most words start right after a separator; the rest, e.g. words in quotes,
+# after symbols that follow a separator
+_SYMBOL_START = re.compile(rb'(?<![wd])d+w')
+_START_TABLE = bytes(1 if c == 1 else 0 for c in range(256))
+_NOT_SYMBOL = re.compile(rb'[^d]')
+
+# A word runs from its first character to its last, taking in any symbols in
+# between, e.g. "don't" or "U.S"
+_WORD = re.compile(rb'w(?:d*w)*')
+
+# Most edits a word index is kept in step with before being built again (see
+# TextIndex._replace_words)
+_MAX_WORD_SHIFTS = 1024
+
 #===================INITIALIZING ABBREVIATIONS SET=============================
 
 # Path of abbreviations.txt file
@@ -243,6 +311,117 @@ def _load_abbreviations():
 # Casting them as a set will allow efficient intersection with other data
 ABBREVIATIONS = set(_load_abbreviations())
 
+# Changes whenever the set of abbreviations does. Sentences found in a text
+# and saved for later are only good for the version they were found with.
+ABBREVIATIONS_VERSION = hashlib.sha256(
+    '\n'.join(sorted(ABBREVIATIONS)).encode('utf-8')).hexdigest()[:16]
+
+# Only the word ending at a period is ever looked up. Grouping abbreviations
+# by length means a lookup takes one set membership test per length, however
+# long the sentence around the period is.
+def _by_length(words):
+    """Returns dict of sets of words, keyed by the length of the words."""
+
+    buckets = {}
+    for word in words:
+        buckets.setdefault(len(word), set()).add(word)
+
+    return buckets
+
+
+#==============================SCANNER SYNTAX==================================
+
+# Everything the scanner needs to know to find sentences in one kind of text:
+#   boundary: all three end-of-sentence patterns fused into one alternation;
+#             the punctuation mark is captured in a group named after its kind
+#             (period, qexmark or quote), the whitespace after it is not
+#   space: matches the whitespace at the start of a text
+#   trailing: matches a whitespace character at the end of a text
+#   dots: a period followed by a blank space (or by nothing at all)
+#   decode: turns part of the text into a str
+#   abbreviations: abbreviations in the same form as the text, by length
+_Syntax = collections.namedtuple('_Syntax', ['boundary', 'space', 'trailing',
+                                             'dots', 'decode',
+                                             'abbreviations'])
+
+# Compiled once so that the text need only be run over a single time when
+# scanning for sentences. The three patterns never match overlapping parts of
+# a text, so the alternation finds every match each of them would.
+_TEXT_SYNTAX = _Syntax(boundary=re.compile(
+                           r'(?P<period>{})\s|(?P<qexmark>{})\s|(?P<quote>{})\s'
+                           .format(_MARK_PERIOD, _MARK_QEXMARK, _MARK_QUOTE)),
+                       space=re.compile(r'\s*'),
+                       trailing=re.compile(r'\s\Z'),
+                       dots=('. ',),
+                       decode=str,
+                       abbreviations=_by_length(ABBREVIATIONS))
+
+# Exclamation and question marks always end a sentence; a text can be split
+# into shards right after any of them (see _safe_cuts)
+_SAFE_CUT_PATTERN = re.compile('(' + _MARK_QEXMARK + r')\s')
+
+# Files are scanned as UTF-8 bytes (see segment_file). Each character above
+# becomes the alternation of its encodings.
+
+
+def _any_of(chars):
+    """Returns a bytes pattern matching any one of chars encoded in UTF-8."""
+    return (b'(?:' + b'|'.join(re.escape(c.encode('utf-8')) for c in chars)
+            + b')')
+
+
+def _decode(data):
+    """Returns UTF-8 encoded bytes as a str, replacing any malformed bytes."""
+    return data.decode('utf-8', 'replace')
+
+
+_SPACE_BYTES = _any_of(_WHITESPACE)
+_SPACE_OR_END = b'(?:' + _SPACE_BYTES + br'|\Z)'
+
+# A file is not cleaned like a str, so curly and other double quotes have to
+# be matched as they are, and the end of the file stands in for the space
+# clean_text would have added after the last sentence.
+_BYTES_SYNTAX = _Syntax(
+    boundary=re.compile(
+        b'(?P<period>%s)%s|(?P<qexmark>%s)%s|(?P<quote>%s)%s'
+        % (_any_of('.' + LEADERS), _SPACE_OR_END,
+           _any_of('?!' + QEX), _SPACE_OR_END,
+           _any_of('.?!—' + LEADERS + QEX) + _any_of('"“”' + DQUOTES),
+           _SPACE_OR_END)),
+    space=re.compile(_SPACE_BYTES + b'*'),
+    trailing=re.compile(_SPACE_BYTES + br'\Z'),
+    dots=(b'. ', b'.'),
+    decode=_decode,
+    abbreviations=_by_length(a.encode('utf-8') for a in ABBREVIATIONS))
+
+
+def _word_classes(text):
+    """Returns class of each character of a cleaned text as bytes: 'w' if
+    part of a word, 's' if a separator, 'd' if a symbol removed from words."""
+
+    # One ASCII character of the same class for each character
+    if not text.isascii():
+        text = _NONASCII_SYMBOLS.sub('.', text)
+        text = _NONASCII_SPACES.sub(' ', text)
+        text = _NONASCII.sub('a', text)
+
+    return text.encode('ascii').translate(_CLASS_TABLE)
+
+
+def _word_marks(classes):
+    """Returns 1 for each character of classes where a word starts, 0 for any
+    other, as a bytearray."""
+
+    # Mark where each word starts with a 1, anywhere else with a 0
+    marks = (b's' + classes).replace(b'sw', b's\x01')[1:]
+    marks = bytearray(marks.translate(_START_TABLE))
+
+    for match in _SYMBOL_START.finditer(classes):
+        marks[match.end() - 1] = 1
+
+    return marks
+
+
 #==============================CLASSES=========================================
 
 class NotInTextError(Exception):
@@ -258,6 +437,386 @@ class NotInTextError(Exception):
         self.message = message
 
 
+class TextIndex:
+    """A text cleaned once, in which sentences can be found over and over.
+
+    Cleaning a text runs a regular expression over all of it. Rather than do
+    so on every search, as 'find_start_end' has to, the cleaned text is kept
+    here. Searches start by default where the previous one ended, so that
+    finding each sentence of a text in turn never goes over the same
+    characters twice.
+
+    Attributes:
+        text (str): original text.
+        clean (str): text ready for parsing (see clean_text).
+        cursor (int): index in clean where the next search starts by default.
+    """
+
+    def __init__(self, text):
+        """Inits TextIndex by cleaning text.
+
+        Args:
+            text (str): text to be searched.
+        """
+        self.text = text
+        self.clean = clean_text(text)
+        self.cursor = 0
+
+        # Don't bother to find substrings in empty texts
+        self._blank = not text.strip()
+
+        # Indices of words built when first needed
+        self._classes = None
+        self._word_starts = None
+        self._word_bounds = None
+
+        # Where, after edits, _word_starts is off, and by how much from there
+        # on (see _replace_words)
+        self._shift_at = []
+        self._shift_by = []
+
+    def replace(self, start, end, replacement):
+        """Replaces part of the text, without cleaning all of it again.
+
+        Cleaning swaps characters one-for-one, so only the replacement needs
+        to be cleaned before being put in place of the old part. Likewise, the
+        index of words, if built, is only gone over around the replacement.
+        The cursor goes back to the start of the text.
+
+        Args:
+            start (int): index where the part to be replaced starts.
+            end (int): index where the part to be replaced ends.
+            replacement (str): text put in place of text[start:end].
+
+        Raises:
+            MemoryError: new text is larger than MAX_TEXTSIZE.
+        """
+
+        text = self.text[:start] + replacement + self.text[end:]
+
+        # Check to see whether text is less than defined, yet arbitrary
+        # memory max
+        _too_big(text)
+
+        # Whether the text ends with an extra space depends on it being empty
+        if self.text and text:
+            replacement = re.sub(REGEX_DQUOTE, '"', replacement)
+            self.clean = self.clean[:start] + replacement + self.clean[end:]
+
+            # Word index kept in step, if built, rather than built again
+            if self._classes is not None:
+                self._replace_words(start, end, replacement)
+        else:
+            self.clean = clean_text(text)
+            self._classes = None
+            self._word_starts = None
+
+        self.text = text
+        self.cursor = 0
+        self._blank = not text.strip()
+
+        # Built again when next needed
+        self._word_bounds = None
+
+    def count_words(self, start=0, end=None):
+        """Returns number of words in part of the text.
+
+        Words are found in the cleaned text, as 'count_words' finds them in
+        the sentences returned by 'get_sentences'. The first time words are
+        counted, an index is built of how many words start before each
+        character of the text; after that, the words of any part of the text,
+        e.g. a sentence or merged sentences, are counted with two lookups and
+        a subtraction.
+
+        Args:
+            start (int): index where the part starts.
+            end (int): index where the part ends; if None, the end of the text.
+
+        Returns:
+            count (int): count_words(clean[start:end]).
+        """
+
+        if self._word_starts is None:
+            self._index_words()
+
+        # Same indices as a slice of the text would take
+        start, end, __ = slice(start, end).indices(len(self.text))
+        if start >= end:
+            return 0
+
+        starts = self._words_before
+        count = starts(end) - starts(start)
+
+        # A word that starts before the part still counts, if any of its
+        # characters are in the part
+        match = _NOT_SYMBOL.search(self._classes, start, end)
+        if match:
+            first = match.start()
+            if (self._classes[first] == ord('w') and
+                    starts(first + 1) == starts(first)):
+                count += 1
+
+        return count
+
+    @property
+    def word_bounds(self):
+        """array <int>: start and end indices of each word in clean, in pairs.
+
+        Words are found as 'get_words' finds them: symbols are not part of
+        them, dashes and whitespace separate them, while hyphens and
+        apostrophes are kept. Each word runs from its first character to its
+        last, any symbols in between included; taking those out of
+        clean[start:end] gives the word 'get_words' returns. Built the first
+        time it is read.
+        """
+
+        if self._word_bounds is None:
+            if self._classes is None:
+                self._index_words()
+
+            self._word_bounds = array.array(
+                'I', (index for match in _WORD.finditer(self._classes)
+                      for index in match.span()))
+
+        return self._word_bounds
+
+    def word_spans(self, start=0, end=None):
+        """Returns start and end indices of each word in part of the text.
+
+        A word cut in two by either end of the part is cut there too, so that
+        the words found are those 'get_words' would find in the part alone.
+
+        Args:
+            start (int): index where the part starts.
+            end (int): index where the part ends; if None, the end of the text.
+
+        Returns:
+            spans (list <tuple>): start and end indices in clean of each word.
+        """
+
+        bounds = self.word_bounds
+
+        # Same indices as a slice of the text would take
+        start, end, __ = slice(start, end).indices(len(self.text))
+        if start >= end:
+            return []
+
+        # Words starting in the part, and the one before if it reaches in
+        first, last = self._words_before(start), self._words_before(end)
+        if first and bounds[2 * first - 1] > start:
+            first -= 1
+
+        spans = []
+        for i in range(2 * first, 2 * last, 2):
+            word_start = max(bounds[i], start)
+            word_end = min(bounds[i + 1], end)
+
+            # Only symbols of the word may be in the part
+            match = _WORD.search(self._classes, word_start, word_end)
+            if match:
+                spans.append(match.span())
+
+        return spans
+
+    def _index_words(self):
+        """Builds index of how many words start before each character."""
+
+        self._classes = _word_classes(self.clean)
+        self._word_starts = array.array(
+            'I', itertools.accumulate(_word_marks(self._classes), initial=0))
+
+        self._shift_at = []
+        self._shift_by = []
+
+    def _words_before(self, index):
+        """Returns number of words starting before a character of clean."""
+
+        k = bisect.bisect_right(self._shift_at, index)
+
+        return self._word_starts[index] + (self._shift_by[k - 1] if k else 0)
+
+    def _replace_words(self, start, end, replacement):
+        """Keeps the word index in step with the replacement of part of the
+        text, going over only the characters around the replacement.
+
+        Words after those gone over start as many words later or earlier as
+        were added or taken away. Rather than go over every one of them to say
+        so, how many is noted once, where they start (see _words_before).
+
+        Args:
+            start (int): index where the part replaced starts.
+            end (int): index where the part replaced ends.
+            replacement (str): cleaned text put in place of clean[start:end].
+        """
+
+        old = self._word_starts
+        classes = (self._classes[:start] + _word_classes(replacement) +
+                   self._classes[end:])
+        shift = len(replacement) - (end - start)
+
+        # Whether a word starts at a character depends on the characters
+        # before it, back to the first that isn't a symbol: go over the
+        # replacement, from that character before it to that one after it
+        low = start
+        while low > 0 and classes[low - 1] == ord('d'):
+            low -= 1
+        low = max(low - 1, 0)
+
+        high = start + len(replacement)
+        while high < len(classes) and classes[high] == ord('d'):
+            high += 1
+        high = min(high + 1, len(classes))
+
+        marks = _word_marks(classes[low:high])
+
+        # First character gone over is taken for the start of the text: what
+        # was known about it still holds
+        if low:
+            marks[0] = self._words_before(low + 1) - self._words_before(low)
+
+        # Characters after those gone over are the same as before, as are
+        # the words before them
+        starts = old[:low]
+        starts.extend(itertools.accumulate(marks, initial=old[low]))
+        starts.extend(old[high - shift + 1:])
+
+        # Words found before the characters gone over, and before those
+        # after them
+        found = self._words_before(low) + starts[high] - old[low]
+        delta = found - self._words_before(high - shift)
+
+        # Edits before the characters gone over hold as they were; those
+        # after them move with the characters
+        k = bisect.bisect_right(self._shift_at, low)
+        after = bisect.bisect_right(self._shift_at, high - shift + 1)
+
+        shift_at = self._shift_at[:k]
+        shift_by = self._shift_by[:k]
+
+        moved = delta + (self._shift_by[after - 1] if after else 0)
+        if high < len(classes) and moved != (shift_by[-1] if shift_by else 0):
+            shift_at.append(high + 1)
+            shift_by.append(moved)
+
+        for at, by in zip(self._shift_at[after:], self._shift_by[after:]):
+            shift_at.append(at + shift)
+            shift_by.append(by + delta)
+
+        self._classes = classes
+        self._word_starts = starts
+        self._shift_at = shift_at
+        self._shift_by = shift_by
+
+        # Too many edits to look up quickly: start afresh
+        if len(shift_at) > _MAX_WORD_SHIFTS:
+            self._index_words()
+
+    def scan(self, start=None):
+        """Yields start and end indices of each sentence from start on.
+
+        Sentences are found as 'get_sentence_spans' finds them, but only as
+        far as they are asked for: the text is not scanned ahead.
+
+        Args:
+            start (int): index where the first sentence starts, whitespace
+                         included; if None, the first non-whitespace character
+                         of the text.
+
+        Yields:
+            (start, end) (tuple): indices such that text[start:end] is a
+                                  sentence.
+        """
+        yield from _scan(self.clean, start)
+
+    def find(self, substring, start=None):
+        """Returns start and end indices of a substring within the text.
+
+        The cursor is moved to the end of the substring found.
+
+        Args:
+            substring (str): Substring to search within the text.
+            start (int): The index where the search should begin; if None,
+                         the cursor.
+
+        Raises:
+            ValueError: substring or text is empty, or start is negative.
+            NotInTextError: substring not in text.
+
+        Returns:
+            (start_pos, end_pos): An integer tuple representing the start and
+                                  end indices of the substring in the text.
+                                  start_pos is -1 if substring is only found
+                                  before start.
+        """
+
+        # Don't bother to find empty substrings in possibly empty texts
+        if self._blank or not substring.strip():
+            raise ValueError("ValueError in textanalysis.find_start_end:" +
+                             "empty string(s) passed to parameters " +
+                             "'substring' or 'text'.")
+
+        # Substrings are matched against the cleaned text; clean the substring
+        # too of curly quotes
+        substring = re.sub(r'[\“\”]', '"', substring)
+
+        if start is None:
+            start = self.cursor
+
+        # Make sure our start position is something sensible
+        if start < 0:
+            raise ValueError("ValueError in textanalysis.find_start_end:" +
+                             "argument for parameter 'start_search' less " +
+                             "than zero.")
+
+        start_pos = self.clean.find(substring, start)
+
+        # Only look through the whole text if the substring isn't after start
+        if start_pos == -1 and substring not in self.clean:
+            raise NotInTextError(f"Substring '{substring}' not found in " +
+                                 "text.'")
+
+        end_pos = start_pos + len(substring)
+
+        if start_pos != -1:
+            self.cursor = end_pos
+
+        return (start_pos, end_pos)
+
+    def locate(self, sentlist):
+        """Returns start and end indices of each of a list of sentences.
+
+        Sentences are searched for in order from the first non-whitespace
+        character, each search starting where the previous sentence ended.
+
+        Args:
+            sentlist (list <str>): sentences parsed from text.
+
+        Raises:
+            NotInTextError: a sentence could not be found in text after the
+                            sentence before it.
+
+        Returns:
+            spans (list <tuple>): (start, end) indices of each sentence.
+        """
+
+        # Start scan at first non whitespace char
+        self.cursor = max(offset(self.text), 0)
+
+        spans = []
+
+        for sent in sentlist:
+            span = self.find(sent)
+
+            # Sentences must come in the order they appear in the text
+            if span[0] == -1:
+                raise NotInTextError(f"Substring '{sent}' not found in " +
+                                     "text after previous sentence.")
+
+            spans.append(span)
+
+        return spans
+
+
 #==============================PUBLIC FUNCTIONS================================
 
 def get_sentences(text):
@@ -281,48 +840,248 @@ def get_sentences(text):
     _too_big(text)
 
     # Prepare text for parsing
-    text = _clean_text(text)
+    text = clean_text(text)
 
-    # Find index of first non-white space character
-    # start (int): index where parsing begins; moves as each sentence extracted
-    start = offset(text)
+    # Scan text...
+    sent_list = [text[start:end] for start, end in _scan(text)]
 
-    # Set it up...
-    # i (int): index of the end of a sentence
-    # sentence (str): extracted sentence from text
-    # sent_list (list): list of extracted sentences
-    i, sentence, sent_list = 0, "", []
+    return sent_list
 
-    # Scan text...
-    while start < (len(text)-1):
 
-        i = _get_first_punctuation_mark(text, start)
+def get_sentence_spans(text):
+    """Returns the start and end indices of each sentence in a text.
 
-        # No end-of-sentence punctuation marks in sentence
-        if i == -1:
-            return sent_list
+    Sentences are found exactly as they are in 'get_sentences', but only
+    their positions are returned. Since cleaning a text does not move any of
+    its characters, the indices are as valid for the original text as they are
+    for the cleaned one, i.e. for each span
 
-        # _get_first_punctuation_mark returns the index of a terminating
-        # punctuation mark, which in a sentence that ends in a quotation mark
-        # is does not point to the sentence's end.
-        # As such increment the index if sentence ends with a quotation mark.
-        pos_lastchar = i
-        if text[i+1] == "\"":
-            pos_lastchar = i + 1
+        get_sentences(text)[i] == clean_text(text)[start:end]
 
-        # Extract sentence and clean it up a bit
-        sentence = text[start:(pos_lastchar + 1)]
+    Args:
+        text (str): Text from which sentences are to be extracted.
 
-        # Add extracted sentence to list
-        sent_list.append(sentence)
+    Returns:
+        spans (list <tuple>): A sequence of (start, end) integer tuples, one for
+                              each sentence in text.
+    """
 
-        # The next sentence starts one character away from the end of the
-        # previous sentence
-        start = pos_lastchar + 1
+    # Check to see whether text is less than defined, yet arbitrary memory max
+    _too_big(text)
+
+    # Prepare text for parsing
+    text = clean_text(text)
+
+    spans = list(_scan(text))
+
+    return spans
+
+
+def get_sentences_batch(texts, workers=None):
+    """Returns a list of sentences for each text in a sequence of texts.
+
+    Texts are segmented in parallel by a pool of worker processes, each of
+    which loads the abbreviations once, when it first imports this module.
+    Texts are sent to the workers in chunks of consecutive texts of about the
+    same total length, so that a few long texts don't leave the other workers
+    idle.
+
+    Args:
+        texts (sequence <str>): Texts from which sentences are to be extracted.
+        workers (int): Number of worker processes; if None, as many as there
+                       are CPUs. With a single worker, texts are segmented in
+                       this process.
+
+    Returns:
+        sent_lists (list <list>): Sentences of each text, as returned by
+                                  'get_sentences', in the order of texts.
+    """
+
+    return _map_batch(get_sentences, texts, workers)
+
+
+def get_sentence_spans_batch(texts, workers=None):
+    """Returns the indices of the sentences of each text in a sequence of texts.
+
+    Texts are segmented in parallel, as in 'get_sentences_batch'.
+
+    Args:
+        texts (sequence <str>): Texts from which sentences are to be extracted.
+        workers (int): Number of worker processes; if None, as many as there
+                       are CPUs.
+
+    Returns:
+        span_lists (list <list>): Spans of each text, as returned by
+                                  'get_sentence_spans', in the order of texts.
+    """
+
+    return _map_batch(get_sentence_spans, texts, workers)
+
+
+def get_sentences_parallel(text, workers=None):
+    """Returns a list of sentences from a text, segmented in parallel.
+
+    The text is first cut into shards at 'safe' points: exclamation or
+    question marks followed by a whitespace character. Such a mark always
+    ends a sentence, whatever comes before it, so each shard can be scanned
+    on its own by a worker process. The sentences returned are exactly those
+    returned by 'get_sentences'; a text without any safe point is simply
+    scanned in this process.
+
+    Args:
+        text (str): Text from which sentences are to be extracted.
+        workers (int): Number of worker processes; if None, as many as there
+                       are CPUs.
+
+    Returns:
+        sent_list (list): A sequence of sentences extracted from argument.
+    """
+
+    # Check to see whether text is less than defined, yet arbitrary memory max
+    _too_big(text)
+
+    # Prepare text for parsing
+    text = clean_text(text)
+
+    sent_list = [text[start:end] for start, end in _scan_parallel(text,
+                                                                  workers)]
 
     return sent_list
 
 
+def get_sentence_spans_parallel(text, workers=None):
+    """Returns the start and end indices of each sentence, found in parallel.
+
+    Shards of the text are scanned as in 'get_sentences_parallel'; their
+    sentences' indices are then shifted back to positions in the whole text.
+
+    Args:
+        text (str): Text from which sentences are to be extracted.
+        workers (int): Number of worker processes; if None, as many as there
+                       are CPUs.
+
+    Returns:
+        spans (list <tuple>): same as returned by 'get_sentence_spans'.
+    """
+
+    # Check to see whether text is less than defined, yet arbitrary memory max
+    _too_big(text)
+
+    # Prepare text for parsing
+    text = clean_text(text)
+
+    spans = _scan_parallel(text, workers)
+
+    return spans
+
+
+def iter_sentences(source):
+    """Yields sentences, along with their positions, from a stream of text.
+
+    Unlike 'get_sentences', the text need not be held in memory all at once.
+    It is read from a file object, or taken from any iterable of strings,
+    one chunk at a time; only the part of it not yet returned as sentences is
+    kept from one chunk to the next. Memory used thus depends on the length of
+    the longest sentence rather than on the size of the text, which is why
+    streamed texts are not subject to MAX_TEXTSIZE.
+
+    The sentences and indices yielded are the same as those returned by
+    'get_sentences' and 'get_sentence_spans' for the whole text, even when
+    an abbreviation or a closing quotation mark straddles two chunks.
+
+    Args:
+        source: file object opened in text mode, or an iterable of strings.
+
+    Yields:
+        (start, end, sentence) (tuple): sentence and its start and end indices
+                                        in the whole text.
+    """
+
+    # buffer (str): cleaned text read, but not yet returned as sentences
+    # base (int): index in the whole text of the first character in buffer
+    # start (int): index in buffer where the next sentence starts; None until
+    #              the first sentence has been found
+    buffer, base, start = "", 0, None
+
+    # Chunks read since the buffer was last scanned, and their total length
+    chunks, fresh = [], 0
+
+    for chunk in _read_chunks(source):
+
+        chunks.append(chunk)
+        fresh += len(chunk)
+
+        # Scanning a long unfinished sentence again after every small chunk
+        # would be costly; wait until there is at least as much new text as
+        # there is text left over from the last scan.
+        if fresh < len(buffer):
+            continue
+
+        # Chunks are cleaned as they come in; parsing only works for straight
+        # quotes
+        buffer += re.sub(REGEX_DQUOTE, '"', "".join(chunks))
+        chunks, fresh = [], 0
+
+        consumed = 0
+
+        for first, last in _scan(buffer, start, final=False):
+            yield (base + first, base + last, buffer[first:last])
+            consumed = last
+
+        # Carry over only what comes after the last sentence found
+        if consumed:
+            buffer = buffer[consumed:]
+            base += consumed
+            start = 0
+
+    buffer += re.sub(REGEX_DQUOTE, '"', "".join(chunks))
+
+    # As in clean_text, add a space at the end of a non-empty text to make sure
+    # its last sentence is found
+    if base or buffer:
+        buffer += " "
+
+    for first, last in _scan(buffer, start):
+        yield (base + first, base + last, buffer[first:last])
+
+
+def segment_file(path):
+    """Yields sentences, along with their byte positions, from a UTF-8 file.
+
+    The file is memory-mapped and its sentences found by scanning the mapped
+    bytes directly: the file is neither read into a str nor decoded as a whole.
+    Only the sentences actually taken from the generator are decoded, so
+    memory used depends on the length of the longest sentence rather than on
+    the size of the file, which is why files are not subject to MAX_TEXTSIZE.
+
+    The sentences yielded are the same as those returned by 'get_sentences'
+    for the decoded contents of the file. Their positions, however, are byte
+    offsets into the file, e.g. for seeking back to a sentence later on.
+
+    Args:
+        path (str): path of a text file encoded in UTF-8 (or plain ASCII).
+
+    Raises:
+        OSError: file could not be opened or mapped.
+
+    Yields:
+        (start, end, sentence) (tuple): sentence, and the byte offsets in the
+                                        file where it starts and ends.
+    """
+
+    # An empty file can't be mapped, but has no sentences anyhow
+    if os.path.getsize(path) == 0:
+        return
+
+    with open(path, 'rb') as fin, \
+         mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+
+        for start, end in _scan(mapped, syntax=_BYTES_SYNTAX):
+            # Decoded sentences are cleaned just as get_sentences' would be
+            sentence = re.sub(REGEX_DQUOTE, '"', _decode(mapped[start:end]))
+            yield (start, end, sentence)
+
+
 def get_words(sentence):
     """Returns words in a sentence, excluding certain punctuation marks.
 
@@ -332,33 +1091,155 @@ def get_words(sentence):
     Args:
         sentence (str): Sentence from which words are to be extracted.
 
+    Raises:
+        TypeError: sentence is not a string.
+
     Returns:
         words (list): Sequence of words from the given sentence.
      """
 
+    if not isinstance(sentence, str):
+        raise TypeError("TypeError in textanalysis.get_words: argument for " +
+                        "parameter 'sentence' not a string.")
+
     # Remove all symbols and punctuation from sentence
     # e.g. Do not let something like "? ^ & * -" to count as five different
     # words: function should return no words
-    sentence = re.sub(REGEX_ALLSYMOBLS, '', sentence)
-
-    # Only symbol not removed from above. Not sure why not...
-    sentence = sentence.replace('\\', '')
 
-    # Remove en dash – and em dash —
+    # Replace en dash – and em dash — with a space
     # An en dash is used to denote a period, e.g. 1914–1918
     # An em dash is used to insert a parenthetical phrase in the middle of or
     # an interruption at the end of a sentence
     # Removing them will prevent two distinct words being counted as one
-    if '–' in sentence or '—' in sentence:
-        sentence = sentence.replace("–", " ") # en dash
-        sentence = sentence.replace("—", " ") # em dash
+
+    # Both done at once, along with any other whitespace character that
+    # bytes.split wouldn't split on
+    sentence = _word_bytes(sentence, _SPLIT_TABLE)
 
     # Default delimiter in split is blank space
-    words = sentence.split()
+    words = sentence.decode('utf-8', 'surrogatepass').split()
 
     return words
 
 
+def count_words(text):
+    """Returns number of words in a text, as 'get_words' would find them.
+
+    Words are counted as runs of bytes, without a list of them being made.
+
+    Args:
+        text (str): Text in which words are to be counted.
+
+    Raises:
+        TypeError: text is not a string.
+
+    Returns:
+        count (int): len(get_words(text)).
+    """
+
+    if not isinstance(text, str):
+        raise TypeError("TypeError in textanalysis.count_words: argument for " +
+                        "parameter 'text' not a string.")
+
+    text = _word_bytes(text, _COUNT_TABLE)
+
+    # Each word is a 'w' at the start of text or following a space
+    count = text.count(b' w') + text.startswith(b'w')
+
+    return count
+
+
+def analyze(text, word_max, spans=None, wordcounts=None):
+    """Returns sentences of a text along with everything needed to report on them.
+
+    The text is scanned once; each sentence is then gone over once to count
+    its words, see whether it has more than word_max of them, and note the
+    whitespace between it and the previous sentence.
+
+    The returned map contains the following data:
+        sentences (list <map>): one map for each sentence, with
+            sentence (str): the sentence as returned by 'get_sentences',
+                            including any leading whitespace.
+            start (int): index in text of the sentence's first
+                         non-whitespace character.
+            end (int): index in text where the sentence ends.
+            wordcount (int): number of words in the sentence.
+            is_over (bool): whether sentence has more than word_max words.
+            whitespace (str): characters in text between the end of the
+                              previous sentence (or the start of text) and
+                              'start'.
+        wordcounts (map): total number of words in the 'original' text, and
+                          in all of its 'parsed' sentences.
+        over (int): number of sentences with more than word_max words.
+
+    Args:
+        text (str): Text from which sentences are to be extracted.
+        word_max (int): max number of words allowed per sentence.
+        spans (list <tuple>): start and end indices of each sentence in text,
+                              e.g. after sentences have been merged or split;
+                              if None, text is scanned for sentences.
+        wordcounts (sequence <int>): number of words in each sentence at
+                                     spans, e.g. as counted by a previous
+                                     call; if None, words are counted.
+
+    Raises:
+        ValueError: word_max is a non-positive integer (i.e. less than 1).
+
+    Returns:
+        analysis (map): data about text and its sentences described above.
+    """
+
+    if word_max < 1:
+        raise ValueError("Max must be a number >= 1.")
+
+    # Check to see whether text is less than defined, yet arbitrary memory max
+    _too_big(text)
+
+    # Prepare text for parsing
+    clean = clean_text(text)
+
+    if spans is None:
+        spans = _scan(clean)
+
+    sentences = []
+
+    # Index where the previous sentence ended
+    prev_end = 0
+
+    for i, (start, end) in enumerate(spans):
+        sentence = clean[start:end]
+
+        # Sentences include whitespace characters; skip them
+        start = _TEXT_SYNTAX.space.match(clean, start, end).end()
+
+        if wordcounts is None:
+            wordcount = count_words(sentence)
+        else:
+            wordcount = wordcounts[i]
+
+        sentences.append({
+            'sentence': sentence,
+            'start': start,
+            'end': end,
+            'wordcount': wordcount,
+            'is_over': wordcount > word_max,
+            'whitespace': text[prev_end:start]
+            })
+
+        prev_end = end
+
+    analysis = {
+        'sentences': sentences,
+        'wordcounts': {
+            'original': count_words(text),
+            'parsed': sum(item['wordcount'] for item in sentences)
+            },
+        'over': sum(item['is_over'] for item in sentences)
+        }
+
+    return analysis
+
+
 def find_start_end(substring, text, start_search=0):
     """Returns start and end indices of a substring within a given text.
 
@@ -376,41 +1257,9 @@ def find_start_end(substring, text, start_search=0):
                               indices of the substring in the searched string.
     """
 
-    # Don't bother to find empty substrings in possibly empty texts
-    sublen = len(substring.strip())
-    textlen = len(text.strip())
-
-    if sublen == 0 or textlen == 0:
-        raise ValueError("ValueError in textanalysis.find_start_end:" +
-                         "empty string(s) passed to parameters 'substring' " +
-                         "or 'text'.")
-
-    # Substrings came from cleaned text. You won't get matches unless you
-    # make sure your text is cleaned too.
-    text = _clean_text(text)
-
-    # Clean the substring too of curly quotes
-    substring = re.sub(r'[\“\”]', '"', substring)
-
-    # Make sure our start position is something sensible
-    if start_search < 0:
-        raise ValueError("ValueError in textanalysis.find_start_end:" +
-                         "argument for parameter 'start_search' less than" +
-                         "zero.")
-
-    # No point in continuing if substring not in text
-    if substring not in text:
-        raise NotInTextError(f"Substring '{substring}' not found in text.'")
-
-    # Initialize start and end positions of substring in text
-    start_pos = 0
-    end_pos = 0
-
-    # Find or calculate the start and end positions of substring in text
-    start_pos = text.find(substring, start_search, len(text) + 1)
-    end_pos = start_pos + len(substring)
-
-    return (start_pos, end_pos)
+    # Text is cleaned for this one search; keep a TextIndex to search the
+    # same text many times
+    return TextIndex(text).find(substring, start_search)
 
 
 def offset(text):
@@ -435,11 +1284,12 @@ def offset(text):
     return index
 
 
-# =============================PRIVATE FUNCTIONS===============================
-
-def _clean_text(text):
+def clean_text(text):
     """Returns text that is ready for sentence-parsing.
 
+    Double quotation marks are swapped one-for-one for straight ones, so an
+    index into the cleaned text points to the same character in the original.
+
     Args:
         text (str): unedited text to be parsed.
 
@@ -460,9 +1310,10 @@ def _clean_text(text):
     return text
 
 
-def _get_first_punctuation_mark(text, start):
-    """Returns index of the first terminating punctuation mark encountered after
-       start position.
+# =============================PRIVATE FUNCTIONS===============================
+
+def _scan(text, start=None, final=True, syntax=_TEXT_SYNTAX):
+    """Yields start and end indices of each sentence in a cleaned text.
 
     To illustrate the principles implemented in this function, examine the
     following text:
@@ -475,138 +1326,468 @@ def _get_first_punctuation_mark(text, start):
      pick as the end of the first sentence of the text? The exclamation mark,
      of course.
 
-     This is what this function does.
+     All kinds of terminating punctuation marks are searched for at once, by
+     a single pattern run only once over the whole text. The marks it finds
+     are taken one at a time, in the order they appear, and each is either
+     chosen as the end of the current sentence or passed over for good. No
+     part of the text is thus searched again when looking for the end of the
+     next sentence, and time spent scanning grows linearly with the size of
+     the text.
 
-    Args:
-        text (str):  text being parsed.
-        start (int): index where to start search in text.
+     When text is only the first part of a longer text (final is False),
+     scanning stops at the first sentence whose end could still change once
+     the rest of the text is known, e.g. a period that is the last character
+     read so far.
 
-    Returns:
-        index (int): index of first terminating punctuation mark found; -1
-                     if no punctuation mark found
+    Args:
+        text (str): cleaned text being parsed (see clean_text); or, with
+                    _BYTES_SYNTAX, UTF-8 encoded bytes or a memory map.
+        start (int): index where the first sentence starts; if None, the
+                     first non-whitespace character of text.
+        final (bool): whether text is complete or more of it is to come.
+        syntax (_Syntax): patterns and helpers for the kind of text scanned.
+
+    Yields:
+        (start, end) (tuple): indices such that text[start:end] is a sentence.
     """
 
-    end_of_text = len(text)
+    # Find index of first non-white space character
+    # start (int): index where parsing begins; moves as each sentence extracted
+    if start is None:
+        start = syntax.space.match(text).end()
+
+    # Nothing to scan
+    if start >= len(text):
+        return
+
+    # Terminating punctuation marks in text, in order: periods, exclamation or
+    # question marks, and any of those followed by a quotation mark
+    marks = syntax.boundary.finditer(text, start)
+
+    # Anything from this index on is whitespace
+    last_end = _last_end(text, syntax)
 
-    # Search text for first occurence of the following punctuation marks:
+    # Scan text...
+    while start < len(text):
+
+        mark = _find_end(text, marks, start, last_end, syntax)
+
+        # No end-of-sentence punctuation marks in sentence
+        if not mark:
+            return
 
-    # Period
-    pos_period = 0
-    match = re.search(REGEX_PERIOD, text[start:])
-    pos_period = start + match.start() if match else -1
+        # In a sentence that ends in a quotation mark, the punctuation mark
+        # does not point to the sentence's end: the end of the group does.
+        pos, end = mark.start(), mark.end(mark.lastgroup)
 
-    # Exclamation or question mark
-    pos_exqmark = 0
-    match = re.search(REGEX_QEXMARK, text[start:])
-    pos_exqmark = start + match.start() if match else -1
+        # Characters not read yet could still move the end of this sentence:
+        # a quote might turn out to be followed by a lowercase word, or an
+        # abbreviation might not be at the very end of the text after all.
+        if not final and (mark.end() >= len(text) or pos + 1 >= last_end):
+            return
 
-    # Period, question, exclamation, em-dash followed by a quotation mark
-    pos_quote = 0
-    match = re.search(REGEX_QUOTE, text[start:])
-    pos_quote = start + match.start() if match else -1
+        yield (start, end)
+
+        # The next sentence starts one character away from the end of the
+        # previous sentence
+        start = end
+
+
+def _find_end(text, marks, start, last_end, syntax):
+    """Returns the terminating punctuation mark that ends a sentence.
+
+    Marks are taken from the iterator until one of them ends the sentence:
+    any exclamation or question mark; the first quotation in the sentence,
+    unless followed by a lowercase word; or a period that is not part of an
+    abbreviation. Once a period has been skipped because of an abbreviation,
+    only a period followed by a blank space can end the sentence.
+
+    Args:
+        text (str): text being parsed.
+        marks (iterator <re.Match>): matches of syntax.boundary in text, from
+                                     start on.
+        start (int): index where the current sentence starts.
+        last_end (int): index right after the last non-whitespace character of
+                        text.
+        syntax (_Syntax): patterns and helpers for the kind of text scanned.
+
+    Returns:
+        mark (re.Match): match of the punctuation mark ending the sentence;
+                         None if none found.
+    """
 
-    # Handle abbreviations
     # Variable will hold the index num right after the period of an
     # abbreviation that should be 'skipped'
     new_start = start
+    skipped = False
+
+    # Whether an abbreviation ends at one of the periods passed over on the
+    # way to the current one
+    passed_abbreviation = False
+
+    # Only the first quotation in a sentence is considered
+    quoted = False
+
+    for mark in marks:
 
-    while True:
+        kind = mark.lastgroup
+
+        if kind == 'qexmark':
+            return mark
+
+        if kind == 'quote':
+            # Check to see whether first non-whitespace character after end
+            # of a quotation is lowercase. If it is, don't treat the end of
+            # the quotation as the end of the sentence
+            if not quoted and not _ignore_quote(mark, text, syntax):
+                return mark
+            quoted = True
+            continue
+
+        pos_period = mark.start()
+
+        # Past an abbreviation, move on to the next period followed by a
+        # blank space. Abbreviations ending at the periods passed along the
+        # way still count for the sentence.
+        if skipped and text[pos_period:mark.end()] not in syntax.dots:
+            passed_abbreviation = (passed_abbreviation or
+                                   _is_abbreviation(text, new_start,
+                                                    pos_period, syntax))
+            continue
 
         # See whether there's any meaningful text to parse after a period
-        not_blank = bool(text[pos_period+1:].strip())
+        not_blank = pos_period + 1 < last_end
 
         # Abbreviations at the very end of the text should not be skipped
         # and be recognized as the end of a sentence. Unfortunately, I could
         # not think of a way to make my program smart enough to skip
         # abbreviations in the middle of a sentence, but not at the end of one!
-        if _is_abbreviation(text, new_start, pos_period) and not_blank:
-            new_start = pos_period + 1
-            pos_period = text.find('. ', new_start, end_of_text+1)
-        else:
+        if not (not_blank and (passed_abbreviation or
+                               _is_abbreviation(text, new_start, pos_period,
+                                                syntax))):
+            return mark
+
+        new_start = pos_period + 1
+        skipped = True
+        passed_abbreviation = False
+
+    return None
+
+
+def _scan_parallel(text, workers):
+    """Returns indices of each sentence in a cleaned text, scanned in shards.
+
+    Args:
+        text (str): cleaned text being parsed (see clean_text).
+        workers (int): number of worker processes; if None, one per CPU.
+
+    Raises:
+        ValueError: workers is less than one.
+
+    Returns:
+        spans (list <tuple>): indices of each sentence, as given by _scan.
+    """
+
+    workers = _check_workers(workers)
+
+    cuts = _safe_cuts(text, workers * CHUNKS_PER_WORKER)
+
+    # Not worth starting processes for
+    if workers == 1 or not cuts:
+        return list(_scan(text))
+
+    # Each shard runs from one cut to the whitespace right after the next, so
+    # that the mark ending its last sentence is still seen as one. Sentences
+    # of all but the first shard start right at the cut.
+    bounds = [0] + cuts
+    shards = [text[bound:cut+1] for bound, cut in zip(bounds, cuts)]
+    shards.append(text[cuts[-1]:])
+    starts = [None] + [0] * len(cuts)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        shard_spans = pool.map(_scan_shard, shards, starts)
+        spans = [(bound + start, bound + end)
+                 for bound, shard in zip(bounds, shard_spans)
+                 for start, end in shard]
+
+    return spans
+
+
+def _scan_shard(shard, start):
+    """Returns indices of each sentence in a shard; runs in a worker."""
+    return list(_scan(shard, start))
+
+
+def _safe_cuts(text, count):
+    """Returns indices where a text can be cut without changing its sentences.
+
+    Every exclamation or question mark followed by a whitespace character
+    ends a sentence: no abbreviation or quotation can make the scanner pass
+    over it. The next sentence thus starts right after it, whether the text
+    before it has been scanned or not. One such point is taken after each
+    of count - 1 evenly spaced positions in the text.
+
+    Args:
+        text (str): cleaned text to be cut.
+        count (int): number of shards wanted.
+
+    Returns:
+        cuts (list <int>): increasing indices where sentences start.
+    """
+
+    cuts = []
+
+    for k in range(1, count):
+        target = max(len(text) * k // count, cuts[-1] if cuts else 0)
+
+        match = _SAFE_CUT_PATTERN.search(text, target)
+        if not match:
             break
 
-    # Check to see whether first non-whitespace character after end of a
-    # quotation is lowercase. If it is, don't treat the end of the
-    # quotation as the end of the sentence
+        # Searching from the last cut finds the one after it
+        cuts.append(match.end(1))
+
+    return cuts
+
+
+def _map_batch(func, texts, workers):
+    """Returns func applied to each text, computed by a pool of processes.
+
+    Args:
+        func (function): module-level function taking a single text.
+        texts (sequence <str>): texts to apply func to.
+        workers (int): number of worker processes; if None, one per CPU.
+
+    Raises:
+        ValueError: workers is less than one.
+
+    Returns:
+        results (list): func(text) for each text, in the order of texts.
+    """
+
+    workers = _check_workers(workers)
+
+    texts = list(texts)
+
+    # Not worth starting processes for
+    if workers == 1 or len(texts) < 2:
+        return [func(text) for text in texts]
+
+    chunks = _balanced_chunks(texts, workers * CHUNKS_PER_WORKER)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        # map hands back the results of the chunks in the order submitted
+        chunk_results = pool.map(_map_chunk, [func] * len(chunks), chunks)
+        results = [result for chunk in chunk_results for result in chunk]
+
+    return results
+
+
+def _map_chunk(func, chunk):
+    """Returns func applied to each text of a chunk; runs in a worker."""
+    return [func(text) for text in chunk]
+
+
+def _balanced_chunks(texts, count):
+    """Splits texts into about count chunks of about the same total length.
+
+    Each chunk is a list of consecutive texts, so that joining the chunks
+    back together gives texts in their original order.
+
+    Args:
+        texts (list <str>): texts to be split.
+        count (int): number of chunks wanted.
+
+    Returns:
+        chunks (list <list>): lists of consecutive texts.
+    """
+
+    # Empty texts still take some time to deal with; count them as one
+    # character long
+    target = sum(max(len(text), 1) for text in texts) / count
 
-    if pos_quote != -1: # quote found
-        pos_quote = _ignore_quote(pos_quote, text)
+    chunks, chunk, size = [], [], 0
 
-    # Get position of the punctuation mark at the end of the current
-    # sentence
+    for text in texts:
+        chunk.append(text)
+        size += max(len(text), 1)
 
-    pos_list = [pos_period, pos_exqmark, pos_quote]
+        if size >= target:
+            chunks.append(chunk)
+            chunk, size = [], 0
 
-    # Negative values will always be the smaller index; get rid of them!!
-    pos_list = list(filter(lambda x: x != -1, pos_list))
+    if chunk:
+        chunks.append(chunk)
 
-    # Return position of the punctuation mark at the end of the current
-    # sentence assuming there's a mark in the first place!
-    index = min(pos_list) if pos_list else -1
+    return chunks
+
+
+def _check_workers(workers):
+    """Returns number of worker processes to use.
+
+    Args:
+        workers (int): number of worker processes asked for; None for one
+                       per CPU.
+
+    Raises:
+        ValueError: workers is less than one.
+
+    Returns:
+        workers (int): number of worker processes.
+    """
+
+    if workers is None:
+        return os.cpu_count() or 1
+
+    if workers < 1:
+        raise ValueError("ValueError in textanalysis: argument for " +
+                         "parameter 'workers' less than one.")
+
+    return workers
+
+
+def _word_bytes(text, table):
+    """Returns text encoded in UTF-8, without symbols, ready to find words in.
+
+    Args:
+        text (str): text in which words are to be found.
+        table (bytes): translation table applied to the remaining bytes.
+
+    Returns:
+        text (bytes): UTF-8 encoding of text, without any symbol, with any dash
+                      or non-ASCII whitespace character replaced by a space,
+                      and translated by table.
+    """
+
+    if not text.isascii():
+        text = _NONASCII_SYMBOLS.sub('', text)
+        text = _NONASCII_SPACES.sub(' ', text)
+
+    return text.encode('utf-8', 'surrogatepass').translate(table,
+                                                           _ASCII_SYMBOLS)
+
+
+def _read_chunks(source):
+    """Yields chunks of text from a file object or an iterable of strings.
+
+    Args:
+        source: file object opened in text mode, or an iterable of strings.
+
+    Yields:
+        chunk (str): next part of the text.
+    """
+
+    # A string is a single chunk, not an iterable of one-character chunks
+    if isinstance(source, str):
+        yield source
+
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    else:
+        yield from source
+
+
+def _last_end(text, syntax=_TEXT_SYNTAX):
+    """Returns index right after the last non-whitespace character in a text.
+
+    Args:
+        text (str): text to be searched.
+        syntax (_Syntax): patterns and helpers for the kind of text searched.
+
+    Returns:
+        index (int): index following last non-whitespace character; 0 if none
+                     found.
+    """
+
+    # Only trailing whitespace characters are ever looked at; none is more
+    # than four characters (bytes) long
+    index = len(text)
+    while index > 0:
+        match = syntax.trailing.search(text, max(index - 4, 0), index)
+        if not match:
+            break
+        index = match.start()
 
     return index
 
 
-def _is_abbreviation(text, start, end):
+def _is_abbreviation(text, start, end, syntax=_TEXT_SYNTAX):
     """Returns True if abbreviation found; False otherwise.
 
     An abbreviation is only considered found if exists in the file
     "abbreviations.txt" accompanying this module.
 
+    Only the word ending at index end is looked at. Since every abbreviation
+    ends with a period and contains no whitespace, it can only be found where
+    a period is followed by a whitespace character; that is, where a period
+    is found by the scanner. Checking each of those periods in turn is thus
+    the same as searching a whole part of the text for abbreviations, but
+    costs no more than the length of the longest abbreviation each time.
+
     Args:
         text (str): String being scanned for abbreviation.
-        start (int): Index where to start search in text.
-        end (int): Index where to end search in text.
+        start (int): Index before which the word may not start.
+        end (int): Index of the period ending the word.
+        syntax (_Syntax): patterns and helpers for the kind of text scanned.
 
     Returns:
         True (bool):  abbreviation found.
         False (bool): No abbreviation found.
     """
 
-    # Focus only on the part of text that may contain an abbreviation
-    part = text[start:end+1]
+    for length, abbreviations in syntax.abbreviations.items():
 
-    # See whether any of the abbreviations are in that part.
+        word_start = end + 1 - length
+        if word_start < start:
+            continue
 
-    # Need words of sentence since we want to check for a whole abbreviation
-    # not a substring of it
-    # E.g. In the text "Back in the U.S.S.R." we don't want the abbreviation
-    # 'U.S.' cause this function to return True!
-    sent_words = set(part.split())
+        # Need a whole word, since we want to check for a whole abbreviation
+        # not a substring of it
+        # E.g. In the text "Back in the U.S.S.R." we don't want the
+        # abbreviation 'U.S.' cause this function to return True!
+        if text[word_start:end+1] in abbreviations and (
+                word_start == start or
+                syntax.trailing.search(text, max(word_start - 4, 0),
+                                       word_start)):
+            return True
 
-    # Disjoint means two sets share nothing in common (essentially their
-    # intersection is the null set). So, if the two sets are NOT disjoint,
-    # then you've found an abbreviation; otherwise you (maybe) haven't.
-    disjoint = sent_words.isdisjoint(ABBREVIATIONS)
-
-    return not disjoint
+    return False
 
 
-def _ignore_quote(pos, text):
+def _ignore_quote(quote, text, syntax=_TEXT_SYNTAX):
     """Check whether quote is truly end of a sentence.
 
     The end of a quotation may not be the end of the sentence. This function
     does a 'weak' test to find out: if the next non-whitespace character is
     lower case, then you don't have a full-sentence. As such, the quote
-    does not mark the end of a sentence; set its position to -1.
+    does not mark the end of a sentence.
 
     Args:
-        pos (int): Relevant index near where quote detected.
+        quote (re.Match): match of the quote detected.
         text (str): Text being parsed.
+        syntax (_Syntax): patterns and helpers for the kind of text parsed.
 
     Returns:
-        -1 (int): if quote is not the end of the sentence.
-        pos (int): if quote is the end of the sentence.
+        True (bool): if quote is not the end of the sentence.
+        False (bool): if quote 'may' be the end of the sentence.
     """
 
+    # Index of the character after the whitespace following the quote
+    after = quote.end()
+
     # Don't want to look at something outside the bounds of text
-    if (pos + 3) < len(text):
-        # The 'weak' criterion...
-        if text[pos + 3].islower():
-            return -1
+    if after < len(text):
+        # The 'weak' criterion... No character is more than four bytes long
+        if syntax.decode(text[after:after+4])[:1].islower():
+            return True
 
     # Quote 'may' be end of sentence
-    return pos
+    return False
 
 
 def _too_big(text):
@@ -662,6 +1843,16 @@ if __name__ == "__main__":
           "in a bucket!', 'What about you?']")
     print("")
 
+    print("\nget_sentence_spans:")
+    print("-------------------")
+    print("Scans input string for sentences; returns their start and end " +
+          "indices.")
+    print("\n>>> text = 'There once was a man from Nantucket. He liked " +
+          "living in a bucket!'")
+    print(">>> get_sentence_spans(text)")
+    print("[(0, 36), (36, 65)]")
+    print("")
+
     print("\nget_words:")
     print("----------")
     print("Scans input string for words; returns list of words " +
@@ -672,6 +1863,13 @@ if __name__ == "__main__":
     print("[Dog-lovers, like, me, hate, cats, false]")
     print("")
 
+    print("\ncount_words:")
+    print("------------")
+    print("Counts words in input string, as get_words would find them.")
+    print("\n>>> count_words(\"Dog-lovers, like me, hate cats—false!\")")
+    print("6")
+    print("")
+
     print("\nfind_start_end:")
     print("---------------")
     print("Returns start and end indices of a substring in a string.")
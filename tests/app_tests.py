@@ -1,3 +1,6 @@
+import concurrent.futures
+import json
+import re
 from nose.tools import *
 from flask import request
 
@@ -138,7 +141,7 @@ def test_results():
     input_text = "Once upon a time, there was a dog called Tutu. He was nice. If you met him, you would like him too."
     max = 7
     index = 1
-    sentences = LeGuinCounter(input_text).sentences
+    sentences = list(LeGuinCounter(input_text).sentences)
     data = {"input_text" : input_text, 'max' : max, 'index': index, 'sent_list[]': sentences, 'submit_button': button}
     expected = b"He was nice. If you met him, you would like him too. (# words: 12)"
     rv = web.post(resource_name, follow_redirects=True, data=data)
@@ -156,7 +159,7 @@ def test_results():
     # Merge with no sentences
     input_text = ''
     index = 0
-    sentences = LeGuinCounter(input_text).sentences
+    sentences = list(LeGuinCounter(input_text).sentences)
     data = {"input_text" : input_text, 'max' : max, 'index': index, 'sent_list[]': sentences, 'submit_button': button}
     expected = b"Merge cannot be performed on an empty sentence list."
     rv = web.post(resource_name, follow_redirects=True, data=data)
@@ -166,7 +169,7 @@ def test_results():
     input_text = "Once upon a time, there was a dog called Tutu."
     max = 7
     index = 0
-    sentences = LeGuinCounter(input_text).sentences
+    sentences = list(LeGuinCounter(input_text).sentences)
     data = {"input_text" : input_text, 'max' : max, 'index': index, 'sent_list[]': sentences, 'submit_button': button}
     expected = b"Once upon a time, there was a dog called Tutu. (# words: 10)"
 
@@ -179,7 +182,7 @@ def test_results():
     #Initial state
     def setup():
         input_text = "Once upon a time, there was a dog called Tutu. He was nice. If you met him, you would like him too."
-        max = 7; index = 0; sentences = LeGuinCounter(input_text).sentences
+        max = 7; index = 0; sentences = list(LeGuinCounter(input_text).sentences)
         return {
                 "input_text" : input_text,
                 'max' : max,
@@ -268,13 +271,13 @@ def test_results():
 
     data = setup()
     data['input_text'] = data['input_text'][:-1] # take away period at end
-    data['sent_list[]'] = LeGuinCounter(data['input_text']).sentences
+    data['sent_list[]'] = list(LeGuinCounter(data['input_text']).sentences)
     rv = web.post(resource_name, follow_redirects=True, data=data)
     assert_in(b'13 words', rv.data)
 
     data = setup()
     data['input_text'] = ""# take away period at end
-    data['sent_list[]'] = LeGuinCounter(data['input_text']).sentences
+    data['sent_list[]'] = list(LeGuinCounter(data['input_text']).sentences)
     rv = web.post(resource_name, follow_redirects=True, data=data)
     assert_in(b'Nothing to process', rv.data)
 
@@ -333,7 +336,7 @@ def test_split():
         max = 7
         index = 1
         sub = 'He was nice.[1]'
-        sentences = LeGuinCounter(input_text).sentences
+        sentences = list(LeGuinCounter(input_text).sentences)
         return {
                 "input_text" : input_text,
                 'max' : max,
@@ -373,6 +376,185 @@ def test_split():
     rv = web.post(resource_name, follow_redirects=True, data=data)
     assert_in(b'ValueError', rv.data)
 
+    # Split where split.js says the user clicked; emoji count twice in JS
+    data = setup()
+    data['input_text'] = "Tutu barked.\r\n\r\nI \U0001F600 dogs and cats."
+    data['sent_list[]'] = list(LeGuinCounter(data['input_text']).sentences)
+    data['firstpart'] = "I \U0001F600 dogs"
+    data['splitposition'] = 9
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_in("I \U0001F600 dogs (# words: 3)".encode(), rv.data)
+    assert_in(b'and cats. (# words: 2)', rv.data)
+
+    # Clicked after a space or newline: same split as by first part alone
+    for text, position in [("I \U0001F600 dogs and cats.", 10),
+                           ("I \U0001F600 dogs\r\n and cats.", 10)]:
+        data['input_text'] = "Tutu barked.\r\n\r\n" + text
+        data['sent_list[]'] = list(LeGuinCounter(data['input_text']).sentences)
+        del data['splitposition']
+        expected = web.post(resource_name, follow_redirects=True,
+                            data=data).data
+        data['splitposition'] = position
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_equal(rv.data, expected)
+        assert_in("I \U0001F600 dogs</pre>".encode(), rv.data)
+
+    # First part not where split.js says: fall back on first part
+    data['splitposition'] = 4
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_in("I \U0001F600 dogs (# words: 3)".encode(), rv.data)
+
+    # Bad split position
+    data['splitposition'] = -20
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_in(b'IndexError', rv.data)
+
+
+def test_split_offset():
+    # TEST CASES
+    # Leading whitespace skipped
+    # CRLF counted once, characters outside BMP twice
+    # Position past end of sentence
+    # Negative position
+
+    from app import _split_offset
+
+    # Leading whitespace skipped
+    assert_equal(_split_offset(" He ran home.", 6), 7)
+
+    # CRLF counted once, characters outside BMP twice
+    assert_equal(_split_offset("\r\nHe\r\nran \U0001F600 home.", 10), 12)
+
+    # Position past end of sentence
+    assert_equal(_split_offset("He ran.", 100), 7)
+
+    # Negative position
+    assert_raises(IndexError, _split_offset, "He ran.", -1)
+
+
+def test_update():
+    # TEST CASES
+    # New max flags sentences again, keeping merges
+    # Bad max
+
+    input_text = "Once upon a time, there was a dog called Tutu. He was nice. If you met him, you would like him too."
+    sentences = ["Once upon a time, there was a dog called Tutu. He was nice.",
+                 " If you met him, you would like him too."]
+    data = {"input_text" : input_text, 'max' : 12, 'sent_list[]': sentences,
+            'submit_button': 'Update'}
+
+    # New max flags sentences again, keeping merges
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_in(b'More than 12 words?', rv.data)
+    assert_in(b'He was nice. (# words: 13)', rv.data)
+    assert_equal(rv.data.count(b'<tr class="highlight">'), 1)
+
+    # Bad max
+    data['max'] = 'x'
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_in(b"Bad input: &#39;max&#39; can only be a positive whole number.", rv.data)
+
+
+def test_parse_cache():
+    # TEST CASES
+    # Same text counted twice: parsed once, same results
+    # Different max: cached results flagged against it
+
+    input_text = "Once upon a time, there was a cat called Mimi. She was nice."
+    data = {"input_text" : input_text, 'max' : 7, 'submit_button': 'Count'}
+
+    # Same text counted twice: parsed once, same results
+    hits = parse_cache.hits
+    first = web.post(resource_name, follow_redirects=True, data=data).data
+    second = web.post(resource_name, follow_redirects=True, data=data).data
+    assert_equal(parse_cache.hits, hits + 1)
+    assert_equal(first, second)
+
+    # Different max: cached results flagged against it
+    data['max'] = 20
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_equal(parse_cache.hits, hits + 2)
+    assert_not_in(b'class="highlight', rv.data)
+
+
+def test_document_store():
+    # TEST CASES
+    # Count keeps text on server; only its id is sent back
+    # Merge, split and update with only the id
+    # Page shown before the last change
+    # Same form submitted at once, many times over
+    # Text no longer in store
+
+    app.config['DOCUMENT_STORE'] = True
+
+    try:
+        # Count keeps text on server; only its id is sent back
+        input_text = "Once upon a time, there was a dog called Tutu. He was nice.[1] If you met him, you would like him too."
+        data = {"input_text" : input_text, 'max' : 7, 'submit_button': 'Count'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        match = re.search(rb'name="doc_id" value="([^"]+)"', rv.data)
+        assert_not_equal(match, None)
+        assert_not_in(b'name="sent_list[]"', rv.data)
+        doc_id = match.group(1).decode()
+        assert_in(doc_id, document_store)
+
+        # Merge, split and update with only the id
+        assert_in(b'name="version" value="0"', rv.data)
+
+        data = {'doc_id': doc_id, 'version': 0, 'max': 7, 'index': 0,
+                'submit_button': 'Merge'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        expected = b"Once upon a time, there was a dog called Tutu. He was nice.[1] If you met him, you would like him too. (# words: 22)"
+        assert_in(expected, rv.data)
+        assert_in(b'name="version" value="1"', rv.data)
+
+        data = {'doc_id': doc_id, 'version': 1, 'max': 7, 'sentindex': 0,
+                'firstpart': 'He was nice.[1]', 'submit_button': 'Split'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        expected = b"Once upon a time, there was a dog called Tutu. He was nice.[1] (# words: 13)"
+        assert_in(expected, rv.data)
+
+        # New word max: counts kept from before, text unchanged
+        data = {'doc_id': doc_id, 'version': 2, 'max': 12,
+                'submit_button': 'Update'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'More than 12 words?', rv.data)
+        assert_in(b'name="version" value="2"', rv.data)
+
+        # Page shown before the last change
+        data = {'doc_id': doc_id, 'version': 1, 'max': 7, 'index': 0,
+                'submit_button': 'Merge'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'has changed on the server', rv.data)
+        assert_equal(document_store.get(doc_id).sentences[0],
+                     "Once upon a time, there was a dog called Tutu. He was nice.[1]")
+
+        del data['version']
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'has changed on the server', rv.data)
+
+        # Same form submitted at once, many times over: only one merges
+        data['version'] = 2
+
+        def merge(__):
+            return web.post(resource_name, data=data).data
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            pages = list(pool.map(merge, range(16)))
+
+        assert_equal(sum(b'(# words: 22)' in page for page in pages), 1)
+        assert_equal(sum(b'has changed on the server' in page
+                         for page in pages), 15)
+        assert_equal(document_store.version(doc_id), 3)
+
+        # Text no longer in store
+        document_store.discard(doc_id)
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'no longer available', rv.data)
+
+    finally:
+        app.config['DOCUMENT_STORE'] = False
+
 
 # def test_split():
 #     #Initial state
@@ -437,3 +619,303 @@ def test_split():
 #     data = {"input_text" : input_text, 'max' : max, 'submit_button' : button}
 #     rv = web.post(resource_name, follow_redirects=True, data=data)
 #     assert_in(b'Parsed Text', rv.data)
+
+
+def test_api():
+    # TEST CASES
+    # Analyze: same data as the results page, as JSON
+    # Analyze from a JSON object
+    # Merge and split
+    # Bad max
+    # Missing field
+    # Values neither strings nor whole numbers
+    # Text too long
+    # Sentence not in text
+
+    input_text = "Once upon a time, there was a dog called Tutu. He was nice.[1] If you met him, you would like him too."
+
+    # Analyze: same data as the results page, as JSON
+    data = {"input_text" : input_text, 'max' : 7}
+    rv = web.post('/api/v1/analyze', data=data)
+    assert_equal(rv.status_code, 200)
+    result = rv.get_json()
+    assert_equal(result['max'], 7)
+    assert_equal(result['doc_id'], None)
+    assert_equal(result['wordcounts'], {'original': 22, 'parsed': 22})
+    assert_equal(result['sentences'],
+                 [{'content': 'Once upon a time, there was a dog called Tutu.',
+                   'wordcount': 10},
+                  {'content': ' He was nice.[1] If you met him, you would like him too.',
+                   'wordcount': 12}])
+    assert_equal(result['highlight_data'],
+                 [[0, 46, True, ''], [47, 102, True, ' ']])
+
+    # Analyze from a JSON object
+    rv = web.post('/api/v1/analyze', json=data)
+    assert_equal(rv.get_json(), result)
+
+    # Merge and split
+    sentences = [item['content'] for item in result['sentences']]
+    data = {"input_text" : input_text, 'max' : 7, 'sent_list[]': sentences,
+            'index': 0}
+    rv = web.post('/api/v1/merge', json=data)
+    assert_equal([item['wordcount'] for item in rv.get_json()['sentences']],
+                 [22])
+
+    data = {"input_text" : input_text, 'max' : 7, 'sent_list[]': sentences,
+            'sentindex': 1, 'firstpart': 'He was nice.[1]'}
+    rv = web.post('/api/v1/split', data=data)
+    assert_equal([item['wordcount'] for item in rv.get_json()['sentences']],
+                 [10, 3, 9])
+
+    # Bad max
+    rv = web.post('/api/v1/analyze', json={"input_text" : input_text,
+                                           'max' : 'x'})
+    assert_equal(rv.status_code, 400)
+    assert_in('max', rv.get_json()['error'])
+
+    # Missing field
+    rv = web.post('/api/v1/merge', json={'max' : 7})
+    assert_equal(rv.status_code, 400)
+    assert_in('error', rv.get_json())
+
+    # Values neither strings nor whole numbers
+    for data in [{'input_text': None, 'max': 7},
+                 {'input_text': {'a': 1}, 'max': 7},
+                 {'input_text': [['Hi.']], 'max': 7},
+                 {'input_text': 12, 'max': 7},
+                 {'input_text': input_text, 'max': 7.5},
+                 {'input_text': input_text, 'max': True}]:
+        rv = web.post('/api/v1/analyze', json=data)
+        assert_equal(rv.status_code, 400)
+        assert_in('TypeError', rv.get_json()['error'])
+
+    # Text too long
+    rv = web.post('/api/v1/analyze', json={"input_text" : 'P' * (CHAR_MAX + 1),
+                                           'max' : 7})
+    assert_equal(rv.status_code, 413)
+
+    # Sentence not in text
+    data = {"input_text" : input_text, 'max' : 7, 'sent_list[]': ['Nope.'],
+            'index': 0}
+    rv = web.post('/api/v1/merge', json=data)
+    assert_equal(rv.status_code, 400)
+    assert_in('NotInTextError', rv.get_json()['error'])
+
+
+def test_bulk():
+    # TEST CASES
+    # One result line per document, whatever order they finish in
+    # Same results as analyzing each document alone
+    # Bad documents don't stop the others
+    # Line too long
+
+    texts = ["Once upon a time, there was a dog called Tutu. He was nice.",
+             "Hi! " * 50, "", "No end to this one"]
+    body = ''.join(json.dumps({'id': i, 'text': text, 'max': 3}) + '\n'
+                   for i, text in enumerate(texts))
+    body += 'Not JSON\n' + json.dumps({'id': 'x', 'text': 'Hi.'}) + '\n'
+    body += json.dumps({'id': 'y', 'text': 'P' * (BULK_LINE_MAX + 1),
+                        'max': 3}) + '\n'
+
+    app.config['BULK_WORKERS'] = 2
+
+    try:
+        rv = web.post('/api/v1/bulk', data=body,
+                      content_type='application/x-ndjson')
+    finally:
+        app.config['BULK_WORKERS'] = None
+
+    assert_equal(rv.mimetype, 'application/x-ndjson')
+
+    # One result line per document, whatever order they finish in
+    lines = [json.loads(line) for line in rv.data.decode().splitlines()]
+    assert_equal(len(lines), 7)
+    results = {line['id']: line for line in lines if 'error' not in line}
+    errors = [line for line in lines if 'error' in line]
+    assert_equal(sorted(results), [0, 1, 2, 3])
+
+    # Same results as analyzing each document alone
+    for i, text in enumerate(texts):
+        expected = web.post('/api/v1/analyze',
+                            json={'input_text': text, 'max': 3}).get_json()
+        del expected['doc_id'], expected['page'], expected['version']
+        expected['id'] = i
+        assert_equal(results[i], expected)
+
+    # Bad documents don't stop the others
+    assert_equal([line['id'] for line in errors], [None, 'x', None])
+    assert_in('JSON', errors[0]['error'])
+    assert_in('max', errors[1]['error'])
+
+    # Line too long
+    assert_in('exceeds', errors[2]['error'])
+
+
+def test_bulk_pool():
+    # TEST CASES
+    # One pool of workers shared by every bulk request
+    # Worker dies: documents sent to it get an error, later ones a new pool
+
+    import os
+    from app import _bulk_executor, _bulk_results, _bulk_shutdown
+
+    def body(count):
+        return [json.dumps({'id': i, 'text': 'Hi. Bye.', 'max': 3}) + '\n'
+                for i in range(count)]
+
+    _bulk_shutdown()
+    app.config['BULK_WORKERS'] = 1
+
+    try:
+        # One pool of workers shared by every bulk request
+        rv = web.post('/api/v1/bulk', data=''.join(body(2)))
+        assert_equal(len(rv.data.splitlines()), 2)
+        pool, workers = _bulk_executor()
+        assert_equal(workers, 1)
+        rv = web.post('/api/v1/bulk', data=''.join(body(3)))
+        assert_equal(len(rv.data.splitlines()), 3)
+        assert_is(_bulk_executor()[0], pool)
+
+        # Worker dies: documents sent to it get an error, later ones a new
+        # pool
+        lines = body(2)
+        killed = []
+
+        class Stream:
+            """Kills the worker once the first document is read, and waits
+            for it to die before the second is."""
+
+            def readline(self, size=-1):
+                if not lines:
+                    return b''
+
+                if not killed:
+                    killed.append(pool.submit(os._exit, 1))
+                else:
+                    concurrent.futures.wait(killed)
+
+                return lines.pop(0).encode()
+
+        results = [json.loads(line) for line in _bulk_results(Stream())]
+        results.sort(key=lambda result: result['id'])
+
+        assert_equal(len(results), 2)
+        assert_in('BrokenProcessPool', results[0]['error'])
+        assert_equal(results[1]['wordcounts'], {'original': 2, 'parsed': 2})
+        assert_is_not(_bulk_executor()[0], pool)
+
+    finally:
+        _bulk_shutdown()
+        app.config['BULK_WORKERS'] = None
+
+
+def test_pages():
+    # TEST CASES
+    # Long text allowed, first page only
+    # Next page
+    # Merge across pages, staying on page
+    # Split on a page
+    # Page past the last one
+    # Not paged without the document store
+
+    app.config['DOCUMENT_STORE'] = True
+    app.config['PAGE_SIZE'] = 2
+
+    try:
+        # Long text allowed, first page only
+        input_text = "Hi there. Bye now. " * 200 + "The end."
+        data = {"input_text" : input_text, 'max' : 1, 'submit_button': 'Count'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'Page 1 of 201', rv.data)
+        assert_equal(rv.data.count(b'<td class="cell-content">'), 2)
+        assert_not_in(b'<pre>' + input_text.rstrip().encode(), rv.data)
+        assert_in(b'Word Count: 802', rv.data)
+        doc_id = re.search(rb'name="doc_id" value="([^"]+)"', rv.data).group(1)
+
+        # Next page
+        data = {'doc_id': doc_id, 'version': 0, 'max': 1,
+                'submit_button': 'Page', 'page': 1}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'Page 2 of 201', rv.data)
+        assert_in(b'<td class="cell">3</td>', rv.data)
+        assert_in(b'value="3">\n              4)  Bye now.', rv.data)
+        assert_in(b'name="first" value="2"', rv.data)
+
+        # Merge across pages, staying on page
+        data = {'doc_id': doc_id, 'version': 0, 'max': 1, 'index': 3,
+                'page': 1, 'submit_button': 'Merge'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'Page 2 of 200', rv.data)
+        assert_in(b'Bye now. Hi there. (# words: 4)', rv.data)
+
+        # Split on a page
+        data = {'doc_id': doc_id, 'version': 1, 'max': 1, 'sentindex': 1,
+                'first': 2, 'page': 1, 'firstpart': 'Bye now.',
+                'submit_button': 'Split'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'Page 2 of 201', rv.data)
+        assert_in(b'Bye now. (# words: 2)', rv.data)
+
+        # Page past the last one
+        data = {'doc_id': doc_id, 'version': 2, 'max': 1,
+                'submit_button': 'Page', 'page': 500}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'Page 201 of 201', rv.data)
+        assert_in(b'The end.', rv.data)
+
+    finally:
+        app.config['DOCUMENT_STORE'] = False
+        app.config['PAGE_SIZE'] = 0
+
+    # Not paged without the document store
+    app.config['PAGE_SIZE'] = 2
+
+    try:
+        data = {"input_text" : input_text, 'max' : 1, 'submit_button': 'Count'}
+        rv = web.post(resource_name, follow_redirects=True, data=data)
+        assert_in(b'Text exceeds 300 words', rv.data)
+    finally:
+        app.config['PAGE_SIZE'] = 0
+
+
+def test_state():
+    # TEST CASES
+    # Page sends back a state token instead of the sentence list
+    # Merge and split with the text and token, as a browser would POST them
+    # Token not made for text
+
+    from html import unescape
+
+    input_text = "Once upon a time, there was a dog called Tutu.\r\n\r\nHe was nice.[1] If you met him, you would like him too."
+
+    # Page sends back a state token instead of the sentence list
+    data = {"input_text" : input_text, 'max' : 7, 'submit_button': 'Count'}
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_not_in(b'name="sent_list[]"', rv.data)
+    assert_equal(rv.data.count(b'name="state"'), 3)
+
+    def posted(page):
+        # Browsers read newlines in a page as LF, send them back as CRLF
+        html = page.decode().replace('\r\n', '\n')
+        text = re.search(r'name="input_text" value="([^"]*)"', html).group(1)
+        state = re.search(r'name="state" value="([^"]*)"', html).group(1)
+        return unescape(text).replace('\n', '\r\n'), state
+
+    # Merge and split with the text and token, as a browser would POST them
+    text, state = posted(rv.data)
+    data = {'input_text': text, 'state': state, 'max': 7, 'index': 0,
+            'submit_button': 'Merge'}
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_in(b'(# words: 22)', rv.data)
+
+    text, state = posted(rv.data)
+    data = {'input_text': text, 'state': state, 'max': 7, 'sentindex': 0,
+            'firstpart': 'He was nice.[1]', 'submit_button': 'Split'}
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_in(b'He was nice.[1] (# words: 13)', rv.data)
+
+    # Token not made for text
+    data['input_text'] = text.replace('Tutu', 'Toto')
+    rv = web.post(resource_name, follow_redirects=True, data=data)
+    assert_in(b'InvalidTokenError', rv.data)
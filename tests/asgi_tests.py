@@ -0,0 +1,337 @@
+import asyncio
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlencode
+from nose.tools import *
+from flask import Flask
+
+from .context import app
+from app import app as flask_app
+from app import CHAR_MAX
+
+from .context import asgi
+from asgi import AsyncApp
+
+web = flask_app.test_client()
+
+# Some other app, served through AsyncApp all the same
+other_app = Flask(__name__)
+
+
+@other_app.route('/sentencecow', methods=['POST'])
+def greet():
+    return f"{other_app.config.get('GREETING')} from {os.getpid()}"
+
+
+def call(asgi_app, method, path, parts=(b'',), headers=()):
+    """Returns status, headers and body parts sent back by an ASGI app for
+    a request whose body is sent in parts."""
+    return asyncio.run(request(asgi_app, method, path, parts, headers))
+
+
+async def request(asgi_app, method, path, parts=(b'',), headers=(),
+                  pause=0):
+    """Same as call, but awaited, so that several requests can be made at
+    once; the client waits pause seconds before sending each part of the
+    body but the first."""
+
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': b'', 'headers': list(headers),
+             'server': ('testserver', 80), 'client': ('127.0.0.1', 1234)}
+
+    messages = [{'type': 'http.request', 'body': part,
+                 'more_body': i < len(parts) - 1}
+                for i, part in enumerate(parts)]
+    sent = []
+
+    async def receive():
+        if messages:
+            if len(messages) < len(parts):
+                await asyncio.sleep(pause)
+            return messages.pop(0)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi_app(scope, receive, send)
+
+    start = sent[0]
+    assert_equal(start['type'], 'http.response.start')
+    bodies = [message['body'] for message in sent[1:]]
+    assert_equal(sent[-1].get('more_body', False), False)
+
+    return start['status'], dict(start['headers']), bodies
+
+
+def form(data):
+    """Returns body and headers of a form POST."""
+    return ([urlencode(data, doseq=True).encode()],
+            [(b'content-type', b'application/x-www-form-urlencoded')])
+
+
+def test_thread():
+    # TEST CASES
+    # GET answered in a thread, same page as Flask gives
+    # Bad scope type
+
+    asgi_app = AsyncApp(flask_app, workers=1)
+
+    # GET answered in a thread, same page as Flask gives
+    status, headers, bodies = call(asgi_app, 'GET', '/sentencecow')
+    assert_equal(status, 200)
+    assert_equal(b''.join(bodies), web.get('/sentencecow').data)
+    assert_equal(headers[b'content-security-policy'], b"default-src 'self'")
+    assert_equal(asgi_app._pool, None)
+
+    # Bad scope type
+    assert_raises(ValueError, asyncio.run,
+                  asgi_app({'type': 'websocket'}, None, None))
+
+
+def test_pool():
+    # TEST CASES
+    # Invalid pool size or queue depth
+    # POST answered in a worker process, same page as Flask gives
+    # API answered in a worker process
+    # Queue full, counting requests still sending their bodies
+    # Body too large
+    # Pool started again after a worker process dies
+
+    # Invalid pool size or queue depth
+    assert_raises(ValueError, AsyncApp, flask_app, 0)
+    assert_raises(ValueError, AsyncApp, flask_app, 1, -1)
+
+    asgi_app = AsyncApp(flask_app, workers=1, queue_depth=0, max_body=1000)
+
+    try:
+        # POST answered in a worker process, same page as Flask gives
+        data = {'input_text': 'Hi there. Bye now!', 'max': 1,
+                'submit_button': 'Count'}
+        parts, headers = form(data)
+        status, __, bodies = call(asgi_app, 'POST', '/sentencecow', parts,
+                                  headers)
+        assert_equal(status, 200)
+        assert_equal(b''.join(bodies),
+                     web.post('/sentencecow', data=data).data)
+        assert_not_equal(asgi_app._pool, None)
+
+        # API answered in a worker process
+        parts, headers = form({'input_text': 'Hi there.', 'max': 1})
+        status, headers, bodies = call(asgi_app, 'POST', '/api/v1/analyze',
+                                       parts, headers)
+        assert_equal(status, 200)
+        assert_equal(headers[b'content-type'], b'application/json')
+        assert_equal(json.loads(b''.join(bodies))['wordcounts'],
+                     {'original': 2, 'parsed': 2})
+
+        # Queue full, counting requests still sending their bodies
+        (body,), headers = form({'input_text': 'Hi there.', 'max': 1})
+        parts = [body[:5], body[5:]]
+
+        async def run():
+            return await asyncio.gather(*[
+                request(asgi_app, 'POST', '/api/v1/analyze', parts, headers,
+                        pause=0.1)
+                for __ in range(3)])
+
+        statuses = sorted(status for status, __, __ in asyncio.run(run()))
+        assert_equal(statuses, [200, 503, 503])
+        assert_equal(asgi_app._pending, 0)
+
+        # Body too large
+        parts, headers = form({'input_text': 'P' * 1000, 'max': 1})
+        status, __, __ = call(asgi_app, 'POST', '/api/v1/analyze', parts,
+                              headers)
+        assert_equal(status, 413)
+
+        # Pool started again after a worker process dies
+        pool = asgi_app._pool
+        assert_raises(BrokenProcessPool,
+                      pool.submit(os._exit, 1).result)
+        parts, headers = form({'input_text': 'Hi there.', 'max': 1})
+        status, __, __ = call(asgi_app, 'POST', '/api/v1/analyze', parts,
+                              headers)
+        assert_equal(status, 503)
+        assert_equal(asgi_app._pool, None)
+
+        status, __, __ = call(asgi_app, 'POST', '/api/v1/analyze', parts,
+                              headers)
+        assert_equal(status, 200)
+        assert_not_equal(asgi_app._pool, pool)
+
+    finally:
+        asgi_app.shutdown()
+
+
+def test_stream():
+    # TEST CASES
+    # Bulk request body received in parts, response sent in parts
+    # No pool while document store is on
+
+    asgi_app = AsyncApp(flask_app, workers=1)
+
+    # Bulk request body received in parts, response sent in parts
+    lines = [json.dumps({'id': i, 'text': 'Hi. ' * i, 'max': 1}).encode() +
+             b'\n' for i in range(4)]
+    parts = [b''.join(lines[:2]), lines[2][:7], lines[2][7:] + lines[3]]
+    flask_app.config['BULK_WORKERS'] = 1
+
+    try:
+        status, headers, bodies = call(
+            asgi_app, 'POST', '/api/v1/bulk', parts,
+            [(b'content-type', b'application/x-ndjson')])
+    finally:
+        flask_app.config['BULK_WORKERS'] = None
+
+    assert_equal(status, 200)
+    results = [json.loads(line) for line in b''.join(bodies).splitlines()]
+    assert_equal(sorted(result['id'] for result in results), [0, 1, 2, 3])
+    assert_true(len([body for body in bodies if body]) > 1)
+
+    # No pool while document store is on
+    flask_app.config['DOCUMENT_STORE'] = True
+
+    try:
+        parts, headers = form({'input_text': 'Hi there.', 'max': 1,
+                               'submit_button': 'Count'})
+        status, __, bodies = call(asgi_app, 'POST', '/sentencecow', parts,
+                                  headers)
+    finally:
+        flask_app.config['DOCUMENT_STORE'] = False
+
+    assert_equal(status, 200)
+    assert_in(b'name="doc_id"', b''.join(bodies))
+    assert_equal(asgi_app._pool, None)
+
+
+def test_lifespan():
+    # TEST CASES
+    # Pool started with server, stopped with it
+
+    asgi_app = AsyncApp(flask_app, workers=1)
+
+    async def run():
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+        pools = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+            pools.append(asgi_app._pool)
+
+        await asgi_app({'type': 'lifespan'}, receive, send)
+        return sent, pools
+
+    # Pool started with server, stopped with it
+    sent, pools = asyncio.run(run())
+    assert_equal(sent, ['lifespan.startup.complete',
+                        'lifespan.shutdown.complete'])
+    assert_not_equal(pools[0], None)
+    assert_equal(pools[1], None)
+
+
+def test_other_app():
+    # TEST CASES
+    # Worker processes import the app given, under its name in its module
+    # POST answered by the app given, in a worker process
+    # Worker processes take on the settings of the app served
+    # App not found in its module
+
+    # Worker processes import the app given, under its name in its module
+    asgi_app = AsyncApp(other_app, workers=1)
+    assert_equal(asgi_app.app_ref, __name__ + ':other_app')
+    assert_equal(AsyncApp(flask_app).app_ref, 'app:app')
+
+    # POST answered by the app given, in a worker process
+    other_app.config['GREETING'] = 'Hello'
+
+    try:
+        status, __, bodies = call(asgi_app, 'POST', '/sentencecow')
+    finally:
+        asgi_app.shutdown()
+
+    assert_equal(status, 200)
+    greeting, pid = b''.join(bodies).decode().split(' from ')
+    assert_equal(greeting, 'Hello')
+    assert_not_equal(int(pid), os.getpid())
+
+    # Worker processes take on the settings of the app served
+    try:
+        asgi._init_worker(asgi_app.app_ref, {'GREETING': 'Hi'})
+        assert_is(asgi._worker_app, other_app)
+        assert_equal(other_app.config['GREETING'], 'Hi')
+    finally:
+        asgi._worker_app = None
+        del other_app.config['GREETING']
+
+    # App not found in its module
+    assert_raises(ValueError, AsyncApp, Flask('nowhere'))
+
+
+def test_env_int():
+    # TEST CASES
+    # Unset or empty: default
+    # Whole number
+    # Anything else
+
+    name = 'SENTENCECOW_TEST_SETTING'
+
+    try:
+        # Unset or empty: default
+        os.environ.pop(name, None)
+        assert_equal(asgi._env_int(name, 64), 64)
+        os.environ[name] = ' '
+        assert_equal(asgi._env_int(name, None), None)
+
+        # Whole number
+        os.environ[name] = '4'
+        assert_equal(asgi._env_int(name, None), 4)
+
+        # Anything else
+        os.environ[name] = 'four'
+        assert_raises(ValueError, asgi._env_int, name, None)
+
+    finally:
+        os.environ.pop(name, None)
+
+
+def test_state_key():
+    # TEST CASES
+    # State token made by one worker process accepted by another, even when
+    # neither is forked from the server
+
+    import multiprocessing
+    import re
+    from html import unescape
+
+    spawn = multiprocessing.get_context('spawn')
+    counter = AsyncApp(flask_app, workers=1, mp_context=spawn)
+    merger = AsyncApp(flask_app, workers=1, mp_context=spawn)
+
+    try:
+        # State token made by one worker process accepted by another
+        parts, headers = form({'input_text': 'Hi there. Bye now!', 'max': 1,
+                               'submit_button': 'Count'})
+        status, __, bodies = call(counter, 'POST', '/sentencecow', parts,
+                                  headers)
+        page = b''.join(bodies).decode()
+        text = re.search(r'name="input_text" value="([^"]*)"', page).group(1)
+        state = re.search(r'name="state" value="([^"]*)"', page).group(1)
+
+        parts, headers = form({'input_text': unescape(text),
+                               'state': state, 'max': 1, 'index': 0,
+                               'submit_button': 'Merge'})
+        status, __, bodies = call(merger, 'POST', '/sentencecow', parts,
+                                  headers)
+        assert_equal(status, 200)
+        assert_in(b'Hi there. Bye now! (# words: 4)', b''.join(bodies))
+
+    finally:
+        counter.shutdown()
+        merger.shutdown()
@@ -18,3 +18,6 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
 import textanalysis
 import leguincounter
 import app
+import storage
+import asgi
+import statetoken
@@ -8,6 +8,7 @@ from nose.tools import *
 
 from .context import leguincounter
 from leguincounter import LeGuinCounter
+from textanalysis import NotInTextError
 
 
 def test_init():
@@ -31,7 +32,7 @@ def test_init():
     assert_equal(lg.text, expected)
 
     # Check contents of attribute sentences
-    expected = ["Blah!", " Blah, blah."]
+    expected = ("Blah!", " Blah, blah.")
     assert_equal(lg.sentences, expected)
 
     # Pass invalid Argument
@@ -40,13 +41,13 @@ def test_init():
 
     # Pass empty string ""
     text = ""
-    expected = ("", [])
+    expected = ("", ())
     lg = LeGuinCounter(text)
     assert_equal((lg.text, lg.sentences), expected)
 
     # Pass empty string  "   \n\t  \r\n  "
     text = "   \n\t  \r\n  "
-    expected = expected = ("   \n\t  \r\n  ", [])
+    expected = expected = ("   \n\t  \r\n  ", ())
     lg = LeGuinCounter(text)
     assert_equal((lg.text, lg.sentences), expected)
 
@@ -62,7 +63,7 @@ def test_parse():
     text = "Blah! Blah, blah."
     lg = LeGuinCounter(text)
     lg.parse(text)
-    expected = ["Blah!", " Blah, blah."]
+    expected = ("Blah!", " Blah, blah.")
     assert_equal(lg.sentences, expected)
 
     # Pass invalid argument
@@ -70,6 +71,31 @@ def test_parse():
     assert_raises(TypeError, lg.parse , text)
 
 
+def test_batch():
+    '''Test Cases:
+        # No texts
+        # Same sentences and spans as constructing each counter
+        # Invalid argument in one of the texts
+    '''
+
+    # No texts
+    assert_equal(LeGuinCounter.batch([], workers=2), [])
+
+    # Same sentences and spans as constructing each counter
+    texts = ["Blah! Blah, blah.", "", "  Mr. Smith went home. He slept."] * 5
+    counters = LeGuinCounter.batch(texts, workers=2)
+    assert_equal(len(counters), len(texts))
+
+    for text, lg in zip(texts, counters):
+        expected = LeGuinCounter(text)
+        assert_equal(lg.text, text)
+        assert_equal(lg.sentences, expected.sentences)
+        assert_equal(lg.spans, expected.spans)
+
+    # Invalid argument in one of the texts
+    assert_raises(TypeError, LeGuinCounter.batch, ["Blah.", None], workers=2)
+
+
 def test_count_words():
     '''Test Cases:
         - invalid input
@@ -77,6 +103,7 @@ def test_count_words():
         - empty string with spaces
         - non-empty string = 1 word
         - non-empty = random number of words
+        - span of the counter's own text
     '''
 
     # invalid input
@@ -111,6 +138,13 @@ def test_count_words():
     expected = val
     assert_equal(lg.count_words(text), expected)
 
+    # span of the counter's own text
+    lg.parse("Don't panic. It's only a “towel,” Arthur.")
+    assert_equal(lg.count_words((0, 12)), 2)
+    assert_equal(lg.count_words(lg.spans[1]), 5)
+    assert_equal(lg.count_words((3, 15)), 3)
+    assert_equal(lg.wordcounts.tolist(), [2, 5])
+
 
 def test_morethan():
     '''Test Cases
@@ -191,6 +225,147 @@ def test_sentence_morethan():
     assert_equal(actual, expected)
 
 
+def test_analyze():
+    '''Test Cases:
+        # Merges and splits are kept
+        # Same data as generate_LGSentenceList
+    '''
+
+    # Merges and splits are kept
+    text = "Hi there. Dr. Smith is here!\n\nBye."
+    lg = LeGuinCounter(text)
+    lg.merge_next(0)
+    result = lg.analyze(3)
+    assert_equal(tuple(item['sentence'] for item in result['sentences']),
+                 lg.sentences)
+    assert_equal([item['is_over'] for item in result['sentences']],
+                 [True, False])
+
+    # Same data as generate_LGSentenceList
+    lg_sentlist = lg.generate_LGSentenceList(text, lg.sentences, 3)
+    assert_equal([(l.content, l.start, l.end, l.is_over) for l in lg_sentlist],
+                 [(item['sentence'].strip(), item['start'], item['end'],
+                   item['is_over']) for item in result['sentences']])
+
+
+def test_analyze_page():
+    '''Test Cases:
+        # Non-positive word max
+        # Each run of sentences as in analyze, totals of whole text
+        # Run past the last sentence
+    '''
+
+    text = "Hi there. Dr. Smith is here!\n\nBye. Done, for now."
+    lg = LeGuinCounter(text)
+    result = lg.analyze(3)
+
+    # Non-positive word max
+    assert_raises(ValueError, lg.analyze_page, 0, 0, 2)
+
+    # Each run of sentences as in analyze, totals of whole text
+    for first in range(4):
+        page = lg.analyze_page(3, first, 2)
+        assert_equal(page['sentences'], result['sentences'][first:first + 2])
+        assert_equal(page['wordcounts'], result['wordcounts'])
+        assert_equal(page['over'], result['over'])
+
+    # Run past the last sentence
+    assert_equal(lg.analyze_page(3, 10, 2)['sentences'], [])
+
+
+def test_generate_LGSentenceTable():
+    '''Test Cases:
+        # Same attributes as generate_LGSentenceList
+        # Indexing and bounds
+        # Empty sentence list
+        # No per-instance dict on sentences
+    '''
+
+    # Same attributes as generate_LGSentenceList
+    text = "  Hi there. Dr. Smith is here!\r\n\r\nBye.\tNow."
+    lg = LeGuinCounter(text)
+    table = lg.generate_LGSentenceTable(text, lg.sentences, 3)
+    lg_sentlist = lg.generate_LGSentenceList(text, lg.sentences, 3)
+    attrs = lambda l: (l.content, l.start, l.end, l.is_over, l.whitespace)
+    assert_equal([attrs(l) for l in table], [attrs(l) for l in lg_sentlist])
+    assert_equal(str(table[0]), str(lg_sentlist[0]))
+
+    # Indexing and bounds
+    assert_equal(len(table), 4)
+    assert_equal(table[-1].content, "Now.")
+    assert_raises(IndexError, table.__getitem__, 4)
+    assert_raises(IndexError, table.__getitem__, -5)
+
+    # Empty sentence list
+    assert_equal(len(lg.generate_LGSentenceTable(text, [], 3)), 0)
+
+    # No per-instance dict on sentences
+    assert_raises(AttributeError, getattr, lg_sentlist[0], '__dict__')
+    assert_raises(AttributeError, setattr, table[0], 'content', "Hi.")
+
+
+def test_flag_over():
+    '''Test Cases:
+        # Non-positive word max
+        # Flags follow word max
+        # Word counts kept in step with merges, splits and edits
+    '''
+
+    text = "Hi there. Dr. Smith is here!\n\nBye."
+    lg = LeGuinCounter(text)
+
+    # Non-positive word max
+    assert_raises(ValueError, lg.flag_over, 0)
+
+    # Flags follow word max
+    assert_equal(list(lg.wordcounts), [2, 4, 1])
+    assert_equal(lg.flag_over(1), [True, True, False])
+    assert_equal(lg.flag_over(3), [False, True, False])
+
+    # Word counts kept in step with merges, splits and edits
+    lg.merge_next(0)
+    assert_equal(list(lg.wordcounts), [6, 1])
+    lg.split_sentence(0, "Hi the")
+    assert_equal(list(lg.wordcounts), [2, 5, 1])
+    lg.apply_edit(0, 2, "Oh, hi")
+    assert_equal(list(lg.wordcounts), [3, 4, 1])
+    assert_equal(lg.flag_over(3), [False, True, False])
+
+
+def test_word_spans():
+    '''Test Cases:
+        # Out of bounds index
+        # Non-positive word max
+        # Words of each sentence, symbols and dashes left out
+        # Sentences clipped to their first words
+        # Words found again after an edit
+    '''
+
+    text = "Don't panic. It's only a “towel,” Arthur—really."
+    lg = LeGuinCounter(text)
+
+    # Out of bounds index
+    assert_raises(IndexError, lg.word_spans, -1)
+    assert_raises(IndexError, lg.word_spans, 2)
+    assert_raises(IndexError, lg.clip, 2)
+
+    # Non-positive word max
+    assert_raises(ValueError, lg.clip, 0, 0)
+
+    # Words of each sentence, symbols and dashes left out
+    assert_equal(len(lg.tokens), 2 * sum(lg.wordcounts))
+    assert_equal([text[start:end] for start, end in lg.word_spans(1)],
+                 ["It's", "only", "a", "towel", "Arthur", "really"])
+
+    # Sentences clipped to their first words
+    assert_equal(lg.clip(1, 4), ' It\'s only a "towel')
+    assert_equal(lg.clip(0, 2), "Don't panic.")
+
+    # Words found again after an edit
+    lg.apply_edit(0, 5, "Never")
+    assert_equal(lg.word_spans(0), [(0, 5), (6, 11)])
+
+
 def test_mergenext():
     '''Text Cases
     # Nothing to merge
@@ -262,6 +437,123 @@ def test_mergenext():
     assert_equal(actual, expected)
 
 
+def test_spans():
+    '''Test Cases:
+        - Spans match sentences after parsing
+        - Spans follow merges and splits
+        - Setting sentences locates them in text
+        - Setting sentences not found in text
+        - Setting sentences out of order
+        - Sentences sliced from text after split of restored sentences
+    '''
+
+    def check(lg):
+        # Sentences are exact slices of the text
+        for sentence, (start, end) in zip(lg.sentences, lg.spans):
+            assert_equal(lg.text[start:end], sentence)
+        assert_equal(len(lg.sentences), len(lg.spans))
+
+    # Spans match sentences after parsing
+    text = "  One. Two three! Four? Five."
+    lg = LeGuinCounter(text)
+    assert_equal(lg.spans, [(2, 6), (6, 17), (17, 23), (23, 29)])
+    check(lg)
+
+    # Spans follow merges and splits
+    lg.merge_next(1)
+    assert_equal(lg.spans, [(2, 6), (6, 23), (23, 29)])
+    check(lg)
+
+    lg.split_sentence(1, "Two three!")
+    assert_equal(lg.spans, [(2, 6), (6, 17), (17, 23), (23, 29)])
+    check(lg)
+
+    # Setting sentences locates them in text
+    lg.sentences = ["One.", " Two three! Four?", " Five."]
+    assert_equal(lg.spans, [(2, 6), (6, 23), (23, 29)])
+    check(lg)
+
+    # Setting sentences not found in text
+    assert_raises(NotInTextError, setattr, lg, 'sentences', ["Six."])
+
+    # Setting sentences out of order
+    assert_raises(NotInTextError, setattr, lg, 'sentences',
+                  [" Five.", "One."])
+
+    # Sentences sliced from text after split of restored sentences
+    lg.sentences = ["One. Two three!", " Four? Five."]
+    lg.split_sentence(1, "Four?")
+    assert_equal(lg.sentences, ("One. Two three!", " Four?", " Five."))
+    check(lg)
+
+
+def test_apply_edit():
+    '''Test Cases:
+        - Same sentences as parsing the edited text
+        - Edit undoes an abbreviation further back in the sentence
+        - Merges and splits away from the edit are kept
+        - Edits at the very start and end of text; emptying the text
+        - Edit out of bounds
+        - Word counts kept in step without indexing the words again
+    '''
+
+    # Same sentences as parsing the edited text
+    text = "One. Two three! Four? Five."
+    lg = LeGuinCounter(text)
+    lg.apply_edit(5, 8, "Six seven")
+    assert_equal(lg.text, "One. Six seven three! Four? Five.")
+    assert_equal(lg.spans, LeGuinCounter(lg.text).spans)
+    assert_equal(lg.sentences, LeGuinCounter(lg.text).sentences)
+
+    # Edit undoes an abbreviation further back in the sentence
+    text = "\t\nend. end.\nUMr. ."
+    lg = LeGuinCounter(text)
+    lg.apply_edit(3, 5, "")
+    assert_equal(lg.spans, LeGuinCounter(lg.text).spans)
+
+    # Merges and splits away from the edit are kept
+    text = "One. Two three! Four? Five. Six. Seven."
+    lg = LeGuinCounter(text)
+    lg.merge_next(0)
+    lg.split_sentence(4, "Se")
+    lg.apply_edit(22, 26, "“Eight”")
+    assert_equal(lg.sentences, ('One. Two three!', ' Four?', ' "Eight".',
+                                ' Six.', ' Se', 'ven.'))
+
+    # Edits at the very start and end of text; emptying the text
+    lg.apply_edit(0, 0, "Zero. ")
+    lg.apply_edit(len(lg.text), len(lg.text), " Eight!")
+    assert_equal(lg.sentences[0], "Zero.")
+    assert_equal(lg.sentences[-1], " Eight!")
+    lg.apply_edit(0, len(lg.text), "")
+    assert_equal((lg.text, lg.sentences), ("", ()))
+    lg.apply_edit(0, 0, "Nine.")
+    assert_equal(lg.sentences, ("Nine.",))
+
+    # Edit out of bounds
+    assert_raises(IndexError, lg.apply_edit, -1, 2, "")
+    assert_raises(IndexError, lg.apply_edit, 2, 1, "")
+    assert_raises(IndexError, lg.apply_edit, 0, 6, "")
+
+    # Word counts kept in step without indexing the words again
+    text = "One. Two three! “Four,” five? Six—seven. Eight nine ten."
+    lg = LeGuinCounter(text)
+    assert_equal(list(lg.wordcounts), [1, 2, 2, 2, 3])
+
+    rebuilt = []
+    lg.index._index_words = lambda: rebuilt.append(True)
+
+    for start, end, replacement in [(5, 8, "Twenty-two"), (0, 4, ""),
+                                    (30, 31, "…“"), (12, 12, " and. Then"),
+                                    (len(lg.text) - 4, len(lg.text), " x.")]:
+        lg.apply_edit(start, end, replacement)
+        assert_equal(list(lg.wordcounts),
+                     list(LeGuinCounter(lg.text).wordcounts))
+
+    assert_equal(rebuilt, [])
+    assert_is_not(lg.index._word_starts, None)
+
+
 # def test_split_sentence():
 #     # 1. Normal case, minimal white spacing
 #     # Check first sentence
@@ -546,7 +838,7 @@ This sentence is on a separate line, but still atttached to the previous sentenc
     lg.parse("This is a sentence with a footnote.[1] Crazy!")
     i = 0
     sub = ""
-    expected = ["This is a sentence with a footnote.[1] Crazy!"]
+    expected = ("This is a sentence with a footnote.[1] Crazy!",)
     result = lg.sentences
     assert_equal(result, expected)
 
@@ -578,20 +870,20 @@ This sentence is on a separate line, but still atttached to the previous sentenc
     result = len(lg.sentences)
     assert_equal(result, expected)
 
-    expected = ["0.", "1.",  "2.",  "3.",  "4."]
+    expected = ("0.", "1.",  "2.",  "3.",  "4.")
     result = lg.sentences
     assert_equal(result, expected)
 
     # Split when there's nothing to split
     lg.split_sentence(2, "2.")
-    expected = ["0.", "1.",  "2.",  "3.",  "4."]
+    expected = ("0.", "1.",  "2.",  "3.",  "4.")
     result = lg.sentences
     assert_equal(result, expected)
 
     #Split again and again
     lg.split_sentence(2, "2")
     lg.split_sentence(2, "2")
-    expected = ["0.", "1.",  "2", ".", "3.",  "4."]
+    expected = ("0.", "1.",  "2", ".", "3.",  "4.")
     result = lg.sentences
     assert_equal(result, expected)
 
@@ -607,7 +899,7 @@ This sentence is on a separate line, but still atttached to the previous sentenc
     result = len(lg.sentences)
     assert_equal(result, expected)
 
-    expected = ["You!", "\n\t\r\n123!"]
+    expected = ("You!", "\n\t\r\n123!")
     result = lg.sentences
     assert_equal(result, expected)
 
@@ -0,0 +1,64 @@
+from random import randint
+from nose.tools import *
+
+from .context import statetoken
+from statetoken import *
+
+KEY = b'k' * 32
+
+
+def test_encode_decode():
+    '''CASES:
+    1. No sentences
+    2. Sentences back as they were, with gaps and empty ones
+    3. Many sentences: compressed, far shorter than the sentences themselves
+    4. Spans out of order or outside text
+    '''
+
+    # 1
+    token = encode("", [], KEY)
+    assert_equal(decode(token, "", KEY), [])
+
+    # 2
+    text = "Hi there.  Bye.\r\n\r\nDone, “really”. 😀 Last."
+    spans = [(0, 9), (9, 15), (15, 15), (19, 34), (36, len(text))]
+    assert_equal(decode(encode(text, spans, KEY), text, KEY), spans)
+
+    # 3
+    text = "Hi there, how are you? " * 10000
+    spans = [(i, i + 23) for i in range(0, len(text), 23)]
+    token = encode(text, spans, KEY)
+    assert_equal(decode(token, text, KEY), spans)
+    assert_true(len(token) < len(spans))
+
+    # 4
+    assert_raises(ValueError, encode, "Hi. Bye.", [(4, 8), (0, 3)], KEY)
+    assert_raises(ValueError, encode, "Hi. Bye.", [(0, 3), (4, 9)], KEY)
+
+
+def test_invalid_token():
+    '''CASES:
+    1. Another text
+    2. Another key
+    3. Token tampered with
+    4. Not a token at all
+    '''
+
+    text = "Hi there. Bye. Done."
+    token = encode(text, [(0, 9), (9, 14), (14, 20)], KEY)
+
+    # 1
+    assert_raises(InvalidTokenError, decode, token, "Hi there. Bye. Done!", KEY)
+
+    # 2
+    assert_raises(InvalidTokenError, decode, token, text, b'j' * 32)
+
+    # 3
+    for i in range(len(token)):
+        char = 'A' if token[i] != 'A' else 'B'
+        tampered = token[:i] + char + token[i + 1:]
+        assert_raises(InvalidTokenError, decode, tampered, text, KEY)
+
+    # 4
+    for token in ["", "!!!", "A", "AQ", encode(text, [], KEY)[:-randint(1, 5)]]:
+        assert_raises(InvalidTokenError, decode, token, text, KEY)
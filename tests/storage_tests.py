@@ -0,0 +1,155 @@
+from nose.tools import *
+
+from .context import storage
+from storage import DocumentStore, ParseCache
+import textanalysis as ta
+from leguincounter import LeGuinCounter
+
+
+class Clock:
+    """Clock whose time only moves when told to."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_add_get():
+    '''CASES:
+    1. Stored document found under its id
+    2. Unknown id
+    3. Ids differ for each document, even the same one
+    4. Discarded document gone
+    5. Bad limits
+    6. Lock and version of each document
+    '''
+
+    store = DocumentStore()
+    lg = LeGuinCounter("One. Two.")
+
+    # 1
+    doc_id = store.add(lg)
+    assert_is(store.get(doc_id), lg)
+    assert_in(doc_id, store)
+    assert_equal(len(store), 1)
+
+    # 2
+    assert_equal(store.get("nothing"), None)
+
+    # 3
+    assert_not_equal(store.add(lg), doc_id)
+    assert_equal(len(store), 2)
+
+    # 4
+    store.discard(doc_id)
+    store.discard(doc_id)
+    assert_equal(store.get(doc_id), None)
+    assert_equal(len(store), 1)
+
+    # 5
+    assert_raises(ValueError, DocumentStore, max_documents=0)
+    assert_raises(ValueError, DocumentStore, max_chars=0)
+    assert_raises(ValueError, DocumentStore, ttl=0)
+
+    # 6
+    doc_id = store.add(lg)
+    assert_is(store.lock(doc_id), store.lock(doc_id))
+    assert_is_not(store.lock(doc_id), store.lock(store.add(lg)))
+    assert_equal(store.version(doc_id), 0)
+    assert_equal(store.changed(doc_id), 1)
+    assert_equal(store.version(doc_id), 1)
+    assert_equal(store.lock("nothing"), None)
+    assert_equal(store.version("nothing"), None)
+    assert_equal(store.changed("nothing"), None)
+
+
+def test_eviction():
+    '''CASES:
+    1. Least recently used document dropped past max_documents
+    2. Least recently used documents dropped past max_chars
+    3. Document larger than max_chars not stored
+    4. Documents expire ttl seconds after last use
+    '''
+
+    # 1
+    store = DocumentStore(max_documents=2)
+    first = store.add(LeGuinCounter("One."))
+    second = store.add(LeGuinCounter("Two."))
+    store.get(first)
+    third = store.add(LeGuinCounter("Three."))
+    assert_equal([doc_id in store for doc_id in (first, second, third)],
+                 [True, False, True])
+
+    # 2
+    store = DocumentStore(max_chars=10)
+    first = store.add(LeGuinCounter("One."))
+    second = store.add(LeGuinCounter("Two."))
+    third = store.add(LeGuinCounter("Three."))
+    assert_equal([doc_id in store for doc_id in (first, second, third)],
+                 [False, True, True])
+
+    # 3
+    assert_equal(store.add(LeGuinCounter("Eleven long.")), None)
+    assert_equal(len(store), 2)
+
+    # 4
+    clock = Clock()
+    store = DocumentStore(ttl=10, clock=clock)
+    first = store.add(LeGuinCounter("One."))
+    clock.now = 5
+    second = store.add(LeGuinCounter("Two."))
+    clock.now = 9
+    store.get(first)
+    clock.now = 16
+    assert_equal([doc_id in store for doc_id in (first, second)],
+                 [True, False])
+    clock.now = 19
+    assert_equal(store.get(first), None)
+
+
+def test_parse_cache():
+    '''CASES:
+    1. Miss, then hit with the same results
+    2. Texts differing only in their double quotes share results
+    3. Least recently used results evicted past max_bytes
+    4. Results larger than max_bytes not kept
+    5. Bad limit
+    '''
+
+    text = "One. Two three! “Four?”"
+    spans = ta.get_sentence_spans(text)
+    wordcounts = [1, 2, 1]
+
+    # 1
+    cache = ParseCache()
+    assert_equal(cache.get(text), None)
+    cache.put(text, spans, wordcounts)
+    assert_equal(cache.get(text), (spans, wordcounts))
+    assert_equal((cache.hits, cache.misses, cache.evictions), (1, 1, 0))
+
+    # 2
+    assert_equal(cache.get('One. Two three! "Four?"'), (spans, wordcounts))
+    assert_equal(len(cache), 1)
+
+    # 3
+    cache.put(text, spans, wordcounts)
+    size = cache.stats()['bytes']
+    cache = ParseCache(max_bytes=2 * size)
+    cache.put("A.", [(0, 2)], [1])
+    cache.put("B.", [(0, 2)], [1])
+    cache.get("A.")
+    cache.put("C.", [(0, 2)], [1])
+    assert_equal(cache.get("B."), None)
+    assert_not_equal(cache.get("A."), None)
+    assert_equal(cache.stats()['evictions'], 1)
+    assert_equal(cache.stats()['entries'], 2)
+
+    # 4
+    cache = ParseCache(max_bytes=size - 1)
+    cache.put(text, spans, wordcounts)
+    assert_equal(len(cache), 0)
+
+    # 5
+    assert_raises(ValueError, ParseCache, max_bytes=0)
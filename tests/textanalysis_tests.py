@@ -240,6 +240,168 @@ def test_get_sentences():
     assert_equal(get_sentences(text), expected)
 
 
+def test_get_sentence_spans():
+    '''CASES:
+        1. No sentences
+        2. Spans match sentences returned by get_sentences
+        3. Spans index curly quotes in the original text
+    '''
+
+    # 1
+    assert_equal(get_sentence_spans(""), [])
+    assert_equal(get_sentence_spans(" \n\t "), [])
+    assert_raises(TypeError, get_sentence_spans, None)
+
+    # 2
+    text = "  Hello, Mr. Darcy! Would you like a cup of tea? No."
+    expected = [(2, 19), (19, 48), (48, 52)]
+    assert_equal(get_sentence_spans(text), expected)
+
+    clean = clean_text(text)
+    sentences = [clean[start:end] for start, end in get_sentence_spans(text)]
+    assert_equal(sentences, get_sentences(text))
+
+    # 3
+    text = "“Stop!” She left."
+    expected = [(0, 7), (7, 17)]
+    assert_equal(get_sentence_spans(text), expected)
+    assert_equal(text[0:7], "“Stop!”")
+
+
+def test_get_sentences_batch():
+    '''CASES:
+        1. No texts
+        2. Same results, in the same order, as segmenting one text at a time
+        3. Single worker
+        4. Invalid number of workers
+    '''
+
+    # 1
+    assert_equal(get_sentences_batch([], workers=2), [])
+
+    # 2
+    with open("./tests/metamorphosis_kafka.txt") as fin:
+        kafka = fin.read()
+
+    texts = [kafka[i:i+3000] for i in range(0, len(kafka), 3000)]
+    texts += ["", "   ", "Hi. Bye!", kafka]
+
+    expected = [get_sentences(text) for text in texts]
+    assert_equal(get_sentences_batch(texts, workers=3), expected)
+
+    expected = [get_sentence_spans(text) for text in texts]
+    assert_equal(get_sentence_spans_batch(texts, workers=3), expected)
+
+    # 3
+    assert_equal(get_sentences_batch(["Hi. Bye!"], workers=1),
+                 [["Hi.", " Bye!"]])
+
+    # 4
+    assert_raises(ValueError, get_sentences_batch, ["Hi."], workers=0)
+
+
+def test_get_sentences_parallel():
+    '''CASES:
+        1. Empty text
+        2. Text without any safe cut point
+        3. Same results as the serial functions on a long text
+    '''
+
+    # 1
+    assert_equal(get_sentences_parallel("", workers=2), [])
+
+    # 2
+    text = "Mr. Smith went home. He slept."
+    assert_equal(get_sentences_parallel(text, workers=2), get_sentences(text))
+
+    # 3
+    with open("./tests/metamorphosis_kafka.txt") as fin:
+        text = fin.read()
+
+    assert_equal(get_sentences_parallel(text, workers=3), get_sentences(text))
+    assert_equal(get_sentence_spans_parallel(text, workers=3),
+                 get_sentence_spans(text))
+
+
+def test_iter_sentences():
+    '''CASES:
+        1. Empty source
+        2. Abbreviation straddling two chunks
+        3. Closing quote straddling two chunks
+        4. File object, same results as get_sentences and get_sentence_spans
+        5. Long text in small chunks
+    '''
+    from io import StringIO
+
+    # 1
+    assert_equal(list(iter_sentences([])), [])
+    assert_equal(list(iter_sentences(["", "  \n"])), [])
+
+    # 2
+    chunks = ["Hello, M", "r. Darcy. Tea", "?"]
+    expected = [(0, 17, "Hello, Mr. Darcy."), (17, 22, " Tea?")]
+    assert_equal(list(iter_sentences(chunks)), expected)
+
+    # 3
+    chunks = ['"He ate a donut!', '" she', ' said. Yes.']
+    expected = [(0, 27, '"He ate a donut!" she said.'), (27, 32, ' Yes.')]
+    assert_equal(list(iter_sentences(chunks)), expected)
+
+    # 4
+    text = "  “Stop!” She left. Dr. Dunne stayed.\nThe end"
+    result = list(iter_sentences(StringIO(text)))
+    assert_equal([item[2] for item in result], get_sentences(text))
+    assert_equal([item[:2] for item in result], get_sentence_spans(text))
+
+    # 5
+    with open("./tests/metamorphosis_kafka.txt") as fin:
+        text = fin.read()
+
+    chunks = (text[i:i+50] for i in range(0, len(text), 50))
+    result = list(iter_sentences(chunks))
+    assert_equal([item[2] for item in result], get_sentences(text))
+    assert_equal([item[:2] for item in result], get_sentence_spans(text))
+
+
+def test_segment_file():
+    '''CASES:
+        1. Empty file
+        2. Byte offsets with multi-byte quotes and whitespace
+        3. Same sentences as get_sentences
+    '''
+    import os
+    from tempfile import TemporaryDirectory
+
+    with TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "text.txt")
+
+        # 1
+        open(path, 'w').close()
+        assert_equal(list(segment_file(path)), [])
+
+        # 2
+        with open(path, 'w', encoding='utf-8') as fout:
+            fout.write("“Stop!” She left.　Dr. Dunne stayed.")
+
+        expected = [(0, 11, '"Stop!"'), (11, 21, ' She left.'),
+                    (21, 41, '　Dr. Dunne stayed.')]
+        assert_equal(list(segment_file(path)), expected)
+
+    # 3
+    path = "./tests/metamorphosis_kafka.txt"
+    with open(path, encoding='utf-8', newline='') as fin:
+        text = fin.read()
+
+    result = list(segment_file(path))
+    assert_equal([item[2] for item in result], get_sentences(text))
+
+    with open(path, 'rb') as fin:
+        data = fin.read()
+
+    assert_equal([data[start:end].decode('utf-8') for start, end, _ in result],
+                 [text[start:end] for start, end in get_sentence_spans(text)])
+
+
 def test_get_words():
     '''CASES:
         1. Non-string passed
@@ -319,6 +481,90 @@ def test_get_words():
 
 
 
+def test_count_words():
+    '''CASES:
+        1. Non-string passed
+        2. Empty or blank string
+        3. Same count as get_words: symbols, dashes, other whitespace
+        4. Non-ASCII text
+        5. Long text
+     '''
+
+    # 1
+    assert_raises(TypeError, count_words, None)
+
+    # 2
+    assert_equal(count_words(""), 0)
+    assert_equal(count_words("   \n "), 0)
+
+    # 3
+    texts = ["Giovanni loves pizza! Do you?",
+             "My dog-sitter likes hot-dogs—how unsettling.",
+             "WWII lasted from 1939–1945.",
+             string.punctuation + " " + LEADERS + QEX + DQUOTES,
+             "This\nis\ta\rsample.\x1cOK",
+             "––– ––– [x] ‘!"]
+
+    for text in texts:
+        assert_equal(count_words(text), len(get_words(text)))
+
+    # 4
+    assert_equal(count_words("“Café”\u3000au lait… s’il vous plaît"), 6)
+
+    # 5
+    with open("./tests/metamorphosis_kafka.txt") as fin:
+        text = fin.read()
+
+    assert_equal(count_words(text), len(get_words(text)))
+
+
+def test_analyze():
+    '''CASES:
+        1. Non-positive word max
+        2. Empty text
+        3. Spans, word counts, flags, whitespace and totals
+        4. Precomputed spans
+        5. Precomputed word counts
+    '''
+
+    # 1
+    assert_raises(ValueError, analyze, "Hi.", 0)
+
+    # 2
+    expected = {'sentences': [], 'wordcounts': {'original': 0, 'parsed': 0},
+                'over': 0}
+    assert_equal(analyze("", 20), expected)
+
+    # 3
+    text = "  Hi there. Dr. Smith is here!\n\nBye. No"
+    result = analyze(text, 2)
+
+    expected = [
+        {'sentence': 'Hi there.', 'start': 2, 'end': 11, 'wordcount': 2,
+         'is_over': False, 'whitespace': '  '},
+        {'sentence': ' Dr. Smith is here!', 'start': 12, 'end': 30,
+         'wordcount': 4, 'is_over': True, 'whitespace': ' '},
+        {'sentence': '\n\nBye.', 'start': 32, 'end': 36, 'wordcount': 1,
+         'is_over': False, 'whitespace': '\n\n'}]
+    assert_equal(result['sentences'], expected)
+    assert_equal(result['wordcounts'], {'original': 8, 'parsed': 7})
+    assert_equal(result['over'], 1)
+
+    # 4
+    result = analyze(text, 2, spans=[(0, 30), (30, 36)])
+    assert_equal([item['sentence'] for item in result['sentences']],
+                 ['  Hi there. Dr. Smith is here!', '\n\nBye.'])
+    assert_equal([item['start'] for item in result['sentences']], [2, 32])
+    assert_equal(result['over'], 1)
+
+    # 5
+    result = analyze(text, 2, spans=[(0, 30), (30, 36)], wordcounts=[1, 5])
+    assert_equal([item['wordcount'] for item in result['sentences']], [1, 5])
+    assert_equal([item['is_over'] for item in result['sentences']],
+                 [False, True])
+    assert_equal(result['wordcounts'], {'original': 8, 'parsed': 6})
+
+
 def test_find_start_end():
     '''CASES:
     1. Bad type for sentence parameter
@@ -392,6 +638,93 @@ def test_find_start_end():
     assert_equal(find_start_end(sentence, text, start_search=0), (4, 4+ len(sentence)))
 
 
+def test_text_index():
+    '''CASES:
+    1. Text is cleaned once, on creation
+    2. Searches start at the cursor, which moves past each match
+    3. Explicit start position overrides the cursor
+    4. Substring only found before start: start index is -1, cursor stays
+    5. Substring not in text; empty substring
+    6. Locating a list of sentences in turn
+    7. Replacing part of the text keeps it cleaned
+    8. Scanning from a given start
+    9. Counting words of any part of the text
+    10. Finding where words start and end
+    '''
+
+    # 1
+    text = "“Tomorrow she is not.” So it goes."
+    index = TextIndex(text)
+    assert_equal(index.text, text)
+    assert_equal(index.clean, clean_text(text))
+
+    # 2
+    text = "Yesterday she was here. Yesterday she was here."
+    sentence = "Yesterday she was here."
+    index = TextIndex(text)
+    assert_equal(index.find(sentence), (0, 23))
+    assert_equal(index.cursor, 23)
+    assert_equal(index.find(sentence), (24, 47))
+
+    # 3
+    assert_equal(index.find(sentence, 0), (0, 23))
+    assert_equal(index.find(sentence, 1), find_start_end(sentence, text, 1))
+
+    # 4
+    index = TextIndex(text)
+    assert_equal(index.find(sentence, 30), find_start_end(sentence, text, 30))
+    assert_equal(index.cursor, 0)
+
+    # 5
+    assert_raises(NotInTextError, index.find, "Tomorrow she is not.")
+    assert_raises(ValueError, index.find, "  ")
+    assert_raises(ValueError, TextIndex("  ").find, sentence)
+
+    # 6
+    text = '  “Here.” There.\nAnd everywhere.  '
+    index = TextIndex(text)
+    sentlist = get_sentences(text)
+    assert_equal(index.locate(sentlist), get_sentence_spans(text))
+    assert_equal(index.locate([]), [])
+
+    # 7
+    index.replace(2, 9, '“Where?”')
+    assert_equal(index.text, '  “Where?” There.\nAnd everywhere.  ')
+    assert_equal(index.clean, clean_text(index.text))
+    index.replace(0, len(index.text), '')
+    assert_equal((index.text, index.clean), ('', ''))
+    index.replace(0, 0, 'Here.')
+    assert_equal(index.clean, clean_text('Here.'))
+
+    # 8
+    index = TextIndex(text)
+    assert_equal(list(index.scan()), get_sentence_spans(text))
+    assert_equal(list(index.scan(9)), get_sentence_spans(text)[1:])
+
+    # 9
+    text = '“Don’t,” he said—then—“stop... now!” A-B c.d'
+    index = TextIndex(text)
+    clean = clean_text(text)
+    for start, end in [(0, len(text)), (0, 8), (2, 9), (3, 20), (16, 17),
+                       (20, 30), (30, 30), (40, 45), (44, 100)]:
+        assert_equal(index.count_words(start, end),
+                     count_words(clean[start:end]))
+    assert_equal(index.count_words(), count_words(clean))
+    index.replace(0, 8, "No")
+    assert_equal(index.count_words(), count_words(clean_text(index.text)))
+
+    # 10
+    text = '“Don’t,” he said—then—“stop... now!” A-B c.d'
+    index = TextIndex(text)
+    words = [text[start:end] for start, end in index.word_spans()]
+    assert_equal(words, ['Don’t', 'he', 'said', 'then', 'stop', 'now', 'A-B',
+                         'c.d'])
+    assert_equal(len(index.word_bounds), 2 * count_words(text))
+    assert_equal(index.word_spans(3, 20), [(3, 6), (9, 11), (12, 16), (17, 20)])
+    assert_equal(index.word_spans(7, 9), [])
+    index.replace(0, 8, "No")
+    assert_equal(index.word_spans(0, 5), [(0, 2), (3, 5)])
+
 def test_ussr():
     # N.B. This test will fail once you add U.S.S.R to abbreviation list
 
@@ -408,6 +741,43 @@ def test_ussr():
     assert_equal(get_sentences(text), expected)
 
 
+def test_abbreviations_and_quotes():
+    '''
+    CASES:
+    1. Abbreviation followed by more sentences
+    2. Once an abbreviation is skipped, only '. ' ends the sentence
+    3. Exclamation mark found before a skipped abbreviation
+    4. Quote followed by lowercase word is not the end of a sentence
+    5. Abbreviation at the very end of the text
+    '''
+
+    # 1
+    text = "Dr. Dunne does dissections diligently. Bx. Barry borrows bananas."
+    expected = ['Dr. Dunne does dissections diligently.', ' Bx.',
+                ' Barry borrows bananas.']
+    assert_equal(get_sentences(text), expected)
+
+    # 2
+    text = "Dr. Smith left.\nHe came back. End."
+    expected = ['Dr. Smith left.\nHe came back.', ' End.']
+    assert_equal(get_sentences(text), expected)
+
+    # 3
+    text = "Hi! Mr. Smith came. Bye."
+    expected = ['Hi!', ' Mr. Smith came.', ' Bye.']
+    assert_equal(get_sentences(text), expected)
+
+    # 4
+    text = '"Stop!" he said. "Go!" She left.'
+    expected = ['"Stop!" he said.', ' "Go!"', ' She left.']
+    assert_equal(get_sentences(text), expected)
+
+    # 5
+    text = "Welcome the Fl."
+    expected = ['Welcome the Fl.']
+    assert_equal(get_sentences(text), expected)
+
+
 def test_offset():
     text = "      Once upon a time, there was a dog called Tutu."
     expected = 6